@@ -1,20 +1,18 @@
-from flask import Flask, render_template, request, jsonify, send_file, session
+from flask import Flask, Response, render_template, request, jsonify, session
 import os
-import threading
-import tempfile
 import uuid
 from datetime import datetime
 import json
 import time
 
-# Importar todos os downloaders originais
-from youtube_downloader import YouTubeDownloader
-from instagram_downloader import InstagramDownloader
-from facebook_downloader import FacebookDownloader
-from tiktok_downloader import TikTokDownloader
-from twitch_downloader import TwitchDownloader
+from download_engine import get_download_engine
+from job_store import get_job_store
+from lazy_imports import lazy_instance
+from progress_events import get_progress_broker, progress_hook
+from storage_manager import configure_file_serving, get_storage_manager, send_managed_file
 
 app = Flask(__name__)
+configure_file_serving(app)
 
 # SECRET KEY SEGURO - Usar variável de ambiente ou gerar aleatório
 app.secret_key = os.environ.get('SECRET_KEY') or os.urandom(24).hex()
@@ -27,15 +25,17 @@ is_vercel = (
     'vercel' in os.environ.get('HOSTNAME', '').lower()
 )
 
-# Cache para downloads em progresso
-downloads_cache = {}
+# Registro persistente de downloads (SQLite, compartilhado entre workers)
+job_store = get_job_store()
+storage = get_storage_manager()
+progress_broker = get_progress_broker()
 
-# Inicializar downloaders
-youtube_downloader = YouTubeDownloader()
-instagram_downloader = InstagramDownloader()
-facebook_downloader = FacebookDownloader()
-tiktok_downloader = TikTokDownloader()
-twitch_downloader = TwitchDownloader()
+# Downloaders (módulo importado e instância criada no primeiro download da plataforma)
+youtube_downloader = lazy_instance('youtube_downloader', 'YouTubeDownloader')
+instagram_downloader = lazy_instance('instagram_downloader', 'InstagramDownloader')
+facebook_downloader = lazy_instance('facebook_downloader', 'FacebookDownloader')
+tiktok_downloader = lazy_instance('tiktok_downloader', 'TikTokDownloader')
+twitch_downloader = lazy_instance('twitch_downloader', 'TwitchDownloader')
 
 @app.route('/')
 def index():
@@ -73,9 +73,6 @@ def download_video():
         # Gerar ID único para o download
         download_id = str(uuid.uuid4())
         
-        # Criar diretório temporário
-        temp_dir = tempfile.mkdtemp()
-        
         # Selecionar downloader baseado na plataforma
         downloader_map = {
             'youtube': youtube_downloader,
@@ -89,13 +86,18 @@ def download_video():
         if not downloader:
             return jsonify({'success': False, 'message': f'Plataforma {platform} não suportada'}), 400
         
-        def progress_callback(progress_info):
-            """Callback para progresso do download - SEM SOCKETIO"""
-            # Armazenar progresso no cache para polling HTTP
-            downloads_cache[download_id + '_progress'] = progress_info
-        
-        def download_thread():
-            """Thread para executar o download"""
+        # Progresso publicado no broker (SSE em /events) e gravado em lote no JobStore
+        progress_callback = progress_hook(
+            download_id,
+            on_progress=lambda progress: job_store.update_progress(download_id, progress)
+        )
+        
+        def download_job():
+            """Job executado por um worker do DownloadEngine"""
+            job_store.put(download_id, {'status': 'downloading'})
+            # Diretório gerenciado (cota/expiração), protegido durante o download
+            temp_dir = storage.create_dir()
+            completed = False
             try:
                 # Executar download
                 result = downloader.download_video(
@@ -108,33 +110,43 @@ def download_video():
                 
                 if result and 'file_path' in result:
                     # Armazenar informações do arquivo no cache
-                    downloads_cache[download_id] = {
+                    job_store.put(download_id, {
                         'file_path': result['file_path'],
                         'filename': result.get('filename', 'video.mp4'),
                         'timestamp': datetime.now(),
                         'status': 'completed'
-                    }
+                    })
+                    completed = True
                 else:
-                    downloads_cache[download_id] = {
+                    job_store.put(download_id, {
                         'status': 'failed',
                         'error': 'Download falhou'
-                    }
+                    })
                         
             except Exception as e:
-                downloads_cache[download_id] = {
+                job_store.put(download_id, {
                     'status': 'failed',
                     'error': str(e)
-                }
-        
-        # Iniciar download em thread separada
-        thread = threading.Thread(target=download_thread)
-        thread.daemon = True
-        thread.start()
+                })
+            finally:
+                storage.release(temp_dir)
+                if not completed:
+                    storage.remove(temp_dir)
+        
+        # Enfileirar download no pool de workers compartilhado
+        job_store.put(download_id, {'status': 'queued'})
+        engine = get_download_engine()
+        engine.submit(
+            download_job,
+            job_id=download_id,
+            metadata={'url': url, 'platform': platform}
+        )
         
         return jsonify({
             'success': True,
             'download_id': download_id,
-            'message': 'Download iniciado'
+            'queue_position': engine.queue_position(download_id),
+            'message': 'Download adicionado à fila'
         })
         
     except Exception as e:
@@ -144,21 +156,20 @@ def download_video():
 def download_file(download_id):
     """Endpoint para servir arquivos baixados"""
     try:
-        if download_id not in downloads_cache:
+        download_info = job_store.get(download_id)
+        if download_info is None:
             return jsonify({'error': 'Download não encontrado'}), 404
         
-        download_info = downloads_cache[download_id]
-        
         if download_info.get('status') != 'completed':
             return jsonify({'error': 'Download não concluído'}), 400
         
         file_path = download_info.get('file_path')
         filename = download_info.get('filename', 'video.mp4')
         
-        if not file_path or not os.path.exists(file_path):
+        response = send_managed_file(file_path, filename) if file_path else None
+        if response is None:
             return jsonify({'error': 'Arquivo não encontrado'}), 404
-        
-        return send_file(file_path, as_attachment=True, download_name=filename)
+        return response
         
     except Exception as e:
         return jsonify({'error': f'Erro ao servir arquivo: {str(e)}'}), 500
@@ -166,28 +177,40 @@ def download_file(download_id):
 @app.route('/api/download_status/<download_id>')
 def download_status(download_id):
     """Endpoint para verificar status do download"""
-    if download_id not in downloads_cache:
+    download_info = job_store.get(download_id)
+    if download_info is None:
         return jsonify({'status': 'not_found'}), 404
     
-    download_info = downloads_cache[download_id]
-    
     # Incluir progresso se disponível
-    progress_info = downloads_cache.get(download_id + '_progress', {})
+    progress_info = download_info.get('progress', {})
     
     return jsonify({
         'status': download_info.get('status', 'unknown'),
+        'queue_position': get_download_engine().queue_position(download_id),
         'filename': download_info.get('filename'),
         'error': download_info.get('error'),
         'progress': progress_info
     })
 
+@app.route('/events/<download_id>')
+def download_events(download_id):
+    """Progresso do download via Server-Sent Events"""
+    def snapshot():
+        return job_store.get(download_id) or {'status': 'not_found'}
+    
+    return Response(
+        progress_broker.stream(download_id, snapshot),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     # Criar diretórios necessários
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
     
     print("🚀 Iniciando Universal Video Downloader Web App (SIMPLIFIED)...")
-    print("⚡ VERSÃO SEM SOCKETIO - Usando HTTP polling para progresso")
+    print("⚡ VERSÃO SEM SOCKETIO - Progresso via Server-Sent Events (/events)")
     
     if is_vercel:
         print("🌐 AMBIENTE VERCEL DETECTADO")
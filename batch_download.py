@@ -0,0 +1,280 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from config import Config
+from info_cache import normalize_url
+from platform_profiles import normalize_platform
+
+# Domínio -> nome da plataforma usado pela UI e pelas rotas
+PLATFORM_HOSTS = (
+    (('youtube.com', 'youtu.be', 'youtube-nocookie.com'), 'YouTube'),
+    (('instagram.com',), 'Instagram'),
+    (('facebook.com', 'fb.watch', 'fb.com'), 'Facebook'),
+    (('tiktok.com',), 'TikTok'),
+    (('twitter.com', 'x.com'), 'X/Twitter'),
+    (('twitch.tv',), 'Twitch'),
+)
+
+
+def detect_platform(url):
+    """
+    Identificar a plataforma pelo domínio da URL
+
+    Returns:
+        str: Nome da plataforma (ex.: 'X/Twitter') ou None se desconhecida
+    """
+    host = urlsplit(url.strip()).netloc.lower().split(':')[0]
+    for domains, platform in PLATFORM_HOSTS:
+        if any(host == domain or host.endswith('.' + domain) for domain in domains):
+            return platform
+    return None
+
+
+_platform_gates = {}
+_platform_gates_lock = threading.Lock()
+
+
+def platform_gate(key):
+    """
+    Semáforo do processo para a plataforma canônica
+
+    Compartilhado por todos os batches: o limite de BATCH_CONFIG['platform_limits']
+    vale para o processo inteiro, não só para cada batch.
+    """
+    with _platform_gates_lock:
+        gate = _platform_gates.get(key)
+        if gate is None:
+            limits = Config.BATCH_CONFIG['platform_limits']
+            gate = _platform_gates[key] = threading.BoundedSemaphore(max(1, limits.get(key, limits['generic'])))
+        return gate
+
+
+class BatchDownloader:
+    """Download de muitas URLs em paralelo, com limite de concorrência por plataforma"""
+
+    def __init__(self, download_func, max_workers=None, platform_limits=None, max_items=None):
+        """
+        Inicializar o batch
+
+        Args:
+            download_func (callable): download_func(url, platform, quality, format_type) -> dict;
+                deve levantar exceção (ou retornar False/None) em caso de falha
+            max_workers (int): Itens em andamento ao mesmo tempo neste batch
+            platform_limits (dict): Itens em andamento por plataforma canônica neste batch
+                (o limite do processo é o de platform_gate())
+            max_items (int): Quantidade máxima de URLs por batch
+        """
+        config = Config.BATCH_CONFIG
+        self.download_func = download_func
+        self.max_workers = max(1, int(max_workers or config['max_workers']))
+        self.platform_limits = dict(config['platform_limits'], **(platform_limits or {}))
+        self.max_items = max_items or config['max_items']
+
+    def _limit(self, key):
+        return max(1, self.platform_limits.get(key, self.platform_limits['generic']))
+
+    def prepare(self, items, platform=None, quality='best', format_type='mp4'):
+        """
+        Normalizar e deduplicar a lista de entrada
+
+        Args:
+            items (list): URLs (str) ou dicts com url/platform/quality/format
+            platform (str): Plataforma padrão (detectada pela URL se omitida)
+            quality (str): Qualidade padrão
+            format_type (str): Formato padrão
+
+        Returns:
+            list: Uma entrada por item da lista original, na mesma ordem
+        """
+        if len(items) > self.max_items:
+            raise ValueError(f"Batch com {len(items)} URLs (máximo {self.max_items})")
+
+        entries = []
+        seen = {}
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'url': item}
+            elif not isinstance(item, dict):
+                item = {}
+            url = str(item.get('url') or '').strip()
+            entry = {
+                'index': index,
+                'url': url,
+                'platform': item.get('platform') or platform or detect_platform(url),
+                'quality': item.get('quality') or quality,
+                'format': item.get('format') or format_type,
+                'status': 'queued',
+                'duplicate_of': None,
+            }
+            if not url.startswith(('http://', 'https://')):
+                entry.update(status='invalid', error='URL inválida')
+            elif entry['platform'] is None:
+                entry.update(status='invalid', error='Plataforma não suportada')
+            else:
+                # Mesma URL (sem rastreamento) com o mesmo perfil: baixar uma vez só
+                key = (normalize_url(url), normalize_platform(entry['platform']), entry['quality'], entry['format'])
+                if key in seen:
+                    entry.update(status='duplicate', duplicate_of=seen[key])
+                else:
+                    seen[key] = index
+            entries.append(entry)
+        return entries
+
+    def iter_results(self, items, platform=None, quality='best', format_type='mp4'):
+        """
+        Executar o batch, produzindo cada resultado assim que termina
+
+        Itens inválidos saem primeiro; duplicatas saem junto com o item
+        original, com o mesmo resultado. Se o consumidor parar de iterar, os
+        itens ainda na fila são descartados (os que já estão baixando terminam).
+
+        Yields:
+            dict: Entrada do item com status 'completed', 'failed' ou 'invalid'
+        """
+        entries = self.prepare(items, platform, quality, format_type)
+        duplicates = {}
+        queues = OrderedDict()
+        for entry in entries:
+            if entry['status'] == 'invalid':
+                yield entry
+            elif entry['status'] == 'duplicate':
+                duplicates.setdefault(entry['duplicate_of'], []).append(entry)
+            else:
+                queues.setdefault(normalize_platform(entry['platform']), deque()).append(entry)
+
+        running = {}
+        active = {key: 0 for key in queues}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch')
+        try:
+            while queues or running:
+                # Rodízio entre plataformas: cada uma até o seu limite
+                dispatched = True
+                while dispatched and len(running) < self.max_workers:
+                    dispatched = False
+                    for key in list(queues):
+                        if len(running) >= self.max_workers:
+                            break
+                        if active[key] >= self._limit(key):
+                            continue
+                        entry = queues[key].popleft()
+                        if not queues[key]:
+                            del queues[key]
+                        entry['status'] = 'running'
+                        entry['started_at'] = datetime.now().isoformat()
+                        active[key] += 1
+                        future = executor.submit(self._run_item, entry)
+                        running[future] = (key, entry)
+                        dispatched = True
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, entry = running.pop(future)
+                    active[key] -= 1
+                    yield entry
+                    for duplicate in duplicates.pop(entry['index'], []):
+                        duplicate.update(
+                            {k: entry[k] for k in ('status', 'result', 'error', 'error_details') if k in entry}
+                        )
+                        yield duplicate
+        finally:
+            executor.shutdown(wait=False)
+
+    def run(self, items, platform=None, quality='best', format_type='mp4', on_result=None):
+        """
+        Executar o batch até o fim
+
+        Args:
+            items (list): URLs (str) ou dicts com url/platform/quality/format
+            platform (str): Plataforma padrão (detectada pela URL se omitida)
+            quality (str): Qualidade padrão
+            format_type (str): Formato padrão
+            on_result (callable): Chamado com cada resultado assim que termina
+
+        Returns:
+            dict: Manifesto do batch (ver manifest())
+        """
+        started = time.time()
+        results = []
+        for entry in self.iter_results(items, platform, quality, format_type):
+            results.append(entry)
+            if on_result:
+                on_result(entry)
+        return manifest(results, time.time() - started)
+
+    def _run_item(self, entry):
+        """Baixar um item (na thread do pool); falhas viram status 'failed'"""
+        started = time.time()
+        try:
+            with platform_gate(normalize_platform(entry['platform'])):
+                result = self.download_func(entry['url'], entry['platform'], entry['quality'], entry['format'])
+            if result is None or result is False:
+                entry.update(status='failed', error='Download falhou')
+            else:
+                entry.update(status='completed', result=result)
+        except Exception as e:
+            entry.update(status='failed', error=str(e), error_details=getattr(e, 'details', {}))
+        entry['elapsed'] = round(time.time() - started, 3)
+        entry['finished_at'] = datetime.now().isoformat()
+        return entry
+
+
+def manifest(results, elapsed=None, batch_id=None):
+    """
+    Manifesto estruturado de um batch
+
+    Args:
+        results (list): Entradas produzidas por iter_results()
+        elapsed (float): Duração total em segundos
+        batch_id (str): ID do batch (gerado se omitido)
+
+    Returns:
+        dict: Contagens por status e os itens na ordem da entrada
+    """
+    items = sorted(results, key=lambda entry: entry['index'])
+    counts = {'completed': 0, 'failed': 0, 'invalid': 0}
+    for entry in items:
+        if entry['status'] in counts:
+            counts[entry['status']] += 1
+    return {
+        'batch_id': batch_id or str(uuid.uuid4()),
+        'total': len(items),
+        'unique': sum(1 for entry in items if entry['duplicate_of'] is None and entry['status'] != 'invalid'),
+        'duplicates': sum(1 for entry in items if entry['duplicate_of'] is not None),
+        'completed': counts['completed'],
+        'failed': counts['failed'],
+        'invalid': counts['invalid'],
+        'elapsed': round(elapsed, 3) if elapsed is not None else None,
+        'items': items,
+    }
+
+
+def download_batch(urls, download_func, platform=None, quality='best', format_type='mp4', on_result=None, **options):
+    """
+    Baixar várias URLs em paralelo (atalho para BatchDownloader.run)
+
+    Args:
+        urls (list): URLs (str) ou dicts com url/platform/quality/format
+        download_func (callable): download_func(url, platform, quality, format_type) -> dict
+        platform (str): Plataforma padrão (detectada pela URL se omitida)
+        quality (str): Qualidade padrão
+        format_type (str): Formato padrão
+        on_result (callable): Chamado com cada resultado assim que termina
+        **options: max_workers, platform_limits, max_items
+
+    Returns:
+        dict: Manifesto do batch
+    """
+    return BatchDownloader(download_func, **options).run(urls, platform, quality, format_type, on_result)
+
+
+def legacy_results(batch_manifest):
+    """Resultado no formato antigo dos download_multiple_* ({'success': [...], 'failed': [...]})"""
+    results = {'success': [], 'failed': [], 'manifest': batch_manifest}
+    for entry in batch_manifest['items']:
+        results['success' if entry['status'] == 'completed' else 'failed'].append(entry['url'])
+    return results
@@ -0,0 +1,297 @@
+"""
+Benchmark de carga dos caminhos de download, offline
+
+Sobe o CDN falso (benchmarks/fake_cdn.py) em outro processo e dispara
+jobs pelos caminhos reais do app: o download_video de cada *Downloader,
+o recorte de VOD do TwitchDownloader (fragmentos HLS) e os endpoints
+Flask /download (+ /status e /file), /download_direct e /api/batch.
+Para cada alvo reporta vazão (jobs/s e MB/s), latência p50/p99 e CPU
+do processo por job (o CPU do CDN fica fora da conta).
+
+Cada job usa uma URL própria (ver fake_cdn.py), então os caches de info e
+a deduplicação do app não mascaram o download; --reuse-urls mede o
+caminho com cache. O rate limiter do app fica desligado (RATE_LIMIT=0),
+já que o CDN é local; --rate-limit mede com ele.
+
+Uso:
+    python benchmarks/download_load.py
+    python benchmarks/download_load.py tiktok flask_download --jobs 20 --concurrency 4
+    python benchmarks/download_load.py --latency 80 --bandwidth 3000 --error-rate 0.02 --json
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class BenchContext:
+    """Estado compartilhado pelos jobs: URLs do CDN, diretório de saída e instâncias"""
+
+    def __init__(self, base_url, workdir, reuse_urls=False):
+        self.base_url = base_url
+        self.workdir = workdir
+        self.reuse_urls = reuse_urls
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def video_url(self):
+        token = '' if self.reuse_urls else '-' + uuid.uuid4().hex[:12]
+        return f'{self.base_url}/video{token}.mp4'
+
+    def vod_url(self):
+        token = '' if self.reuse_urls else '-' + uuid.uuid4().hex[:12]
+        return f'{self.base_url}/vod{token}/index.m3u8'
+
+    def output_dir(self):
+        return tempfile.mkdtemp(dir=self.workdir)
+
+    def instance(self, key, factory):
+        """Uma instância por alvo (downloaders e test client do Flask), como no app"""
+        with self._lock:
+            if key not in self._instances:
+                self._instances[key] = factory()
+            return self._instances[key]
+
+    def client(self):
+        def factory():
+            import app
+            return app.app.test_client()
+        return self.instance('flask', factory)
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(base, name))
+               for base, _, names in os.walk(path) for name in names)
+
+
+def _downloader_job(module, cls, method='download_video', *args):
+    """Job que chama <cls>.<method>(url, output_path, *args) e mede o que foi gravado"""
+    def job(ctx):
+        import importlib
+        downloader = ctx.instance(cls, lambda: getattr(importlib.import_module(module), cls)())
+        output_path = ctx.output_dir()
+        if not getattr(downloader, method)(ctx.video_url(), output_path, *args):
+            raise RuntimeError(f'{cls}.{method} retornou False')
+        return _dir_size(output_path)
+    return job
+
+
+def _twitch_segment(ctx):
+    from twitch_downloader import TwitchDownloader
+    downloader = ctx.instance('TwitchDownloader', TwitchDownloader)
+    output_path = ctx.output_dir()
+    if not downloader.download_vod_segment(ctx.vod_url(), output_path, '00:10', '00:30'):
+        raise RuntimeError('download_vod_segment retornou False')
+    return _dir_size(output_path)
+
+
+def _twitch_clips(ctx):
+    from twitch_downloader import TwitchDownloader
+    downloader = ctx.instance('TwitchDownloader', TwitchDownloader)
+    output_path = ctx.output_dir()
+    report = downloader.download_vod_clips(ctx.vod_url(), output_path, [(5, 15, None), (10, 25, None), (40, 50, None)])
+    if report.get('failed'):
+        error = next(clip.get('error') for clip in report['clips'] if clip['status'] != 'completed')
+        raise RuntimeError(f"{report['failed']} recortes falharam: {error}")
+    return _dir_size(output_path)
+
+
+def _flask_download(ctx):
+    client = ctx.client()
+    data = client.post('/download', json={'url': ctx.video_url(), 'platform': 'YouTube'}).get_json()
+    if not data.get('success'):
+        raise RuntimeError(data.get('error'))
+    while True:
+        status = client.get(data['status_url']).get_json()
+        if status['status'] == 'completed':
+            break
+        if status['status'] in ('error', 'not_found'):
+            raise RuntimeError(status.get('error'))
+        time.sleep(0.02)
+    response = client.get(data['download_url'])
+    size = len(response.get_data())
+    response.close()
+    return size
+
+
+def _flask_direct(ctx):
+    response = ctx.client().post('/download_direct', json={'url': ctx.video_url(), 'platform': 'TikTok'})
+    if response.mimetype == 'application/json':
+        raise RuntimeError(response.get_json().get('error'))
+    size = len(response.get_data())
+    response.close()
+    return size
+
+
+def _flask_batch(ctx):
+    client = ctx.client()
+    urls = [ctx.video_url() for _ in range(3)]
+    data = client.post('/api/batch', json={'urls': urls, 'platform': 'TikTok', 'stream': False}).get_json()
+    if not data.get('success'):
+        raise RuntimeError(data.get('error'))
+    if data['failed']:
+        error = next(item.get('error') for item in data['items'] if item['status'] == 'failed')
+        raise RuntimeError(f"{data['failed']} itens falharam: {error}")
+    size = 0
+    for item in data['items']:
+        response = client.get(item['result']['download_url'])
+        size += len(response.get_data())
+        response.close()
+    return size
+
+
+TARGETS = {
+    'youtube': _downloader_job('youtube_downloader', 'YouTubeDownloader', 'download_video', 'best', 'mp4'),
+    'tiktok': _downloader_job('tiktok_downloader', 'TikTokDownloader'),
+    'instagram': _downloader_job('instagram_downloader', 'InstagramDownloader', 'download_post'),
+    'facebook': _downloader_job('facebook_downloader', 'FacebookDownloader'),
+    'twitch': _downloader_job('twitch_downloader', 'TwitchDownloader'),
+    'twitch_segment': _twitch_segment,
+    'twitch_clips': _twitch_clips,
+    'flask_download': _flask_download,
+    'flask_direct': _flask_direct,
+    'flask_batch': _flask_batch,
+}
+
+
+def percentile(values, pct):
+    """Percentil por posição mais próxima (values ordenados)"""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_target(name, ctx, jobs, concurrency, warmup):
+    """
+    Executar os jobs de um alvo
+
+    Returns:
+        dict: Vazão, latências, CPU por job e erros
+    """
+    job = TARGETS[name]
+    for _ in range(warmup):
+        try:
+            job(ctx)
+        except Exception:
+            pass
+
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            return True, job(ctx), time.perf_counter() - started, None
+        except Exception as e:
+            return False, 0, time.perf_counter() - started, str(e)
+
+    cpu_before, started = _cpu_seconds(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(jobs)))
+    elapsed = time.perf_counter() - started
+    cpu = _cpu_seconds() - cpu_before
+
+    latencies = sorted(seconds for ok, _, seconds, _ in results if ok)
+    completed = len(latencies)
+    total_bytes = sum(size for ok, size, _, _ in results if ok)
+    return {
+        'target': name,
+        'jobs': jobs,
+        'completed': completed,
+        'failed': jobs - completed,
+        'elapsed_s': round(elapsed, 3),
+        'jobs_per_s': round(completed / elapsed, 2) if elapsed else None,
+        'mb_per_s': round(total_bytes / elapsed / 1e6, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'cpu_ms_per_job': round(cpu / jobs * 1000, 1),
+        'errors': sorted({error for ok, _, _, error in results if not ok})[:5],
+    }
+
+
+def start_cdn(args):
+    """Subir o fake_cdn.py em outro processo; retorna (processo, base_url)"""
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_cdn.py'), '--port', '0',
+               '--latency', str(args.latency), '--jitter', str(args.jitter),
+               '--bandwidth', str(args.bandwidth), '--error-rate', str(args.error_rate),
+               '--duration', str(args.duration), '--bitrate', str(args.bitrate)]
+    if args.seed is not None:
+        command += ['--seed', str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('FAKE_CDN '):
+        process.kill()
+        raise RuntimeError('fake_cdn.py não iniciou')
+    return process, line.split()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*', choices=[[]] + list(TARGETS), help='Alvos (padrão: todos)')
+    parser.add_argument('--jobs', type=int, default=10, help='Jobs por alvo')
+    parser.add_argument('--concurrency', type=int, default=4, help='Jobs simultâneos')
+    parser.add_argument('--warmup', type=int, default=1, help='Jobs de aquecimento por alvo (fora da conta)')
+    parser.add_argument('--reuse-urls', action='store_true', help='Mesma URL em todos os jobs (caches/deduplicação)')
+    parser.add_argument('--rate-limit', action='store_true', help='Manter o rate limiter do app ligado')
+    parser.add_argument('--latency', type=float, default=20, help='Latência do CDN por requisição (ms)')
+    parser.add_argument('--jitter', type=float, default=10, help='Latência extra aleatória (ms)')
+    parser.add_argument('--bandwidth', type=float, default=0, help='Banda por conexão (KB/s, 0 = sem limite)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 503 do CDN')
+    parser.add_argument('--duration', type=int, default=60, help='Duração da mídia (s)')
+    parser.add_argument('--bitrate', type=int, default=2000, help='Bitrate da mídia (kbps)')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true', help='Mostrar os logs do app')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    args = parser.parse_args()
+
+    if not args.rate_limit:
+        os.environ['RATE_LIMIT'] = '0'
+    cdn, base_url = start_cdn(args)
+    workdir = tempfile.mkdtemp(prefix='uvd_load_')
+    ctx = BenchContext(base_url, workdir, args.reuse_urls)
+    results = []
+    # Aberto até o fim: instâncias do yt-dlp guardam o sys.stdout da criação
+    devnull = open(os.devnull, 'w')
+    try:
+        for name in args.targets or list(TARGETS):
+            with contextlib.ExitStack() as quiet:
+                if not args.verbose:
+                    quiet.enter_context(contextlib.redirect_stdout(devnull))
+                    quiet.enter_context(contextlib.redirect_stderr(devnull))
+                results.append(run_target(name, ctx, args.jobs, args.concurrency, args.warmup))
+            if not args.json:
+                r = results[-1]
+                print(f"{name:15} {r['completed']:>3}/{r['jobs']:<3} {r['jobs_per_s']:>7} jobs/s {r['mb_per_s']:>8} MB/s "
+                      f"p50 {r['p50_ms']} ms  p99 {r['p99_ms']} ms  CPU {r['cpu_ms_per_job']} ms/job", flush=True)
+                for error in r['errors']:
+                    print(f"    erro: {error}")
+    finally:
+        cdn.terminate()
+        cdn.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+        devnull.close()
+
+    if args.json:
+        print(json.dumps({'cdn': {k: getattr(args, k) for k in ('latency', 'jitter', 'bandwidth', 'error_rate', 'duration', 'bitrate')},
+                          'results': results}, indent=2))
+    return 1 if any(r['failed'] for r in results) and not args.error_rate else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Benchmark e regressão offline dos caminhos quentes de extração
+
+Reproduz extrações gravadas (extraction_fixtures) nos caminhos que
+processam o info dict: seleção de formatos de YouTubeDownloader
+(get_available_formats, debug_complete_flow), get_video_info do
+InstagramDownloader (escolha da thumbnail) e a busca de VODs do
+TwitchDownloader. Nenhuma requisição de rede no modo run: cada chamada
+passa pelo process_ie_result do yt-dlp com os dados gravados, e o
+resultado é comparado com o gravado na captura.
+
+Uso:
+    # gravar (com rede) as fixtures e os resultados esperados
+    python benchmarks/extraction_replay.py capture --youtube URL --instagram URL --twitch USUARIO
+    # medir e verificar offline
+    python benchmarks/extraction_replay.py run --iterations 200 --concurrency 4
+    # aceitar os resultados atuais como esperados (mudança intencional)
+    python benchmarks/extraction_replay.py run --update-golden
+
+Sai com código 1 se algum resultado divergir ou faltar fixture.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+from extraction_fixtures import ExtractionFixtures, set_extraction_fixtures  # noqa: E402
+from info_cache import get_info_cache  # noqa: E402
+
+SUITE_FILE = 'suite.json'
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    sys.stdout por thread durante as medições
+
+    Os logs do app são descartados, e capture() guarda o que a thread atual
+    imprimiu (redirect_stdout não serve: troca o sys.stdout do processo).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.write(text)
+        return len(text)
+
+    @contextlib.contextmanager
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+_output = _ThreadOutput()
+
+
+def _youtube_formats(arg):
+    from youtube_downloader import YouTubeDownloader
+    get_info_cache().invalidate(arg, 'YouTube')
+    return YouTubeDownloader().get_available_formats(arg)
+
+
+def _youtube_debug_flow(arg):
+    from youtube_downloader import YouTubeDownloader
+    get_info_cache().invalidate(arg, 'YouTube')
+    with _output.capture() as output:
+        YouTubeDownloader().debug_complete_flow(arg, '720p', 'mp4')
+    # Sem as linhas da própria captura ([Fixtures] ...), que só existem no modo capture
+    return [line.rstrip() for line in output.getvalue().splitlines()
+            if line.strip() and not line.startswith('[Fixtures]')]
+
+
+def _instagram_info(arg):
+    from instagram_downloader import InstagramDownloader
+    get_info_cache().invalidate(arg, 'Instagram')
+    info = InstagramDownloader().get_video_info(arg)
+    if info is None:
+        raise RuntimeError('get_video_info retornou None')
+    # formats carregam headers com User-Agent sorteado: compara só a quantidade
+    return dict({k: v for k, v in info.items() if k not in ('formats', 'entries')},
+                formats=len(info['formats']), entries=len(info['entries']))
+
+
+def _twitch_vods(arg):
+    from twitch_downloader import TwitchDownloader
+    return TwitchDownloader().search_user_vods(arg, max_vods=10, refresh=True)
+
+
+HOT_PATHS = {
+    'youtube_formats': _youtube_formats,
+    'youtube_debug_flow': _youtube_debug_flow,
+    'instagram_info': _instagram_info,
+    'twitch_vods': _twitch_vods,
+}
+
+# Caminhos exercitados por cada opção do capture
+CAPTURE_OPTIONS = {
+    'youtube': ('youtube_formats', 'youtube_debug_flow'),
+    'instagram': ('instagram_info',),
+    'twitch': ('twitch_vods',),
+}
+
+
+def _normalized(result):
+    """Resultado como sairia em JSON (comparação estável)"""
+    return json.loads(json.dumps(result, sort_keys=True, default=str))
+
+
+def _call(path, arg):
+    """Chamar um caminho quente com os logs do app descartados"""
+    with contextlib.redirect_stdout(_output):
+        return HOT_PATHS[path](arg)
+
+
+def _quiet():
+    """stdout do processo em _output enquanto as threads medem (restaurado uma vez, no fim)"""
+    return contextlib.redirect_stdout(_output)
+
+
+def load_suite(directory):
+    try:
+        with open(os.path.join(directory, SUITE_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except OSError:
+        return {'cases': []}
+
+
+def save_suite(directory, suite):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, SUITE_FILE), 'w', encoding='utf-8') as f:
+        json.dump(suite, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def capture(args):
+    """Gravar fixtures (com rede) e os resultados esperados de cada caso"""
+    set_extraction_fixtures(ExtractionFixtures('capture', args.dir))
+    suite = load_suite(args.dir)
+    cases = {(case['path'], case['arg']): case for case in suite['cases']}
+    failed = 0
+    for option, paths in CAPTURE_OPTIONS.items():
+        for arg in getattr(args, option) or []:
+            for path in paths:
+                try:
+                    cases[(path, arg)] = {'path': path, 'arg': arg, 'expected': _normalized(_call(path, arg))}
+                    print(f"gravado: {path} {arg}")
+                except Exception as e:
+                    failed += 1
+                    print(f"FALHOU: {path} {arg}: {e}")
+    suite['cases'] = sorted(cases.values(), key=lambda case: (case['path'], case['arg']))
+    save_suite(args.dir, suite)
+    print(f"{len(suite['cases'])} casos em {os.path.join(args.dir, SUITE_FILE)}")
+    return 1 if failed else 0
+
+
+def run(args):
+    """Reproduzir os casos offline: tempo por chamada e comparação com o esperado"""
+    fixtures = ExtractionFixtures('replay', args.dir)
+    set_extraction_fixtures(fixtures)
+    suite = load_suite(args.dir)
+    cases = [case for case in suite['cases'] if not args.paths or case['path'] in args.paths]
+    if not cases:
+        print(f"Nenhum caso em {os.path.join(args.dir, SUITE_FILE)}; grave com: extraction_replay.py capture ...")
+        return 1
+
+    problems, results = [], []
+    for case in cases:
+        try:
+            actual = _normalized(_call(case['path'], case['arg']))
+        except Exception as e:
+            problems.append(f"{case['path']} {case['arg']}: {e}")
+            continue
+        if actual != case['expected']:
+            if args.update_golden:
+                case['expected'] = actual
+            else:
+                problems.append(f"{case['path']} {case['arg']}: resultado diferente do gravado")
+                continue
+
+        def timed(_, case=case):
+            started = time.perf_counter()
+            HOT_PATHS[case['path']](case['arg'])
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with _quiet(), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            samples = sorted(pool.map(timed, range(args.iterations)))
+        elapsed = time.perf_counter() - started
+        results.append({
+            'path': case['path'],
+            'arg': case['arg'],
+            'iterations': args.iterations,
+            'ops_per_s': round(args.iterations / elapsed, 1),
+            'mean_ms': round(statistics.mean(samples) * 1000, 3),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3),
+        })
+
+    if args.update_golden:
+        save_suite(args.dir, suite)
+    if args.json:
+        print(json.dumps({'results': results, 'problems': problems, 'fixtures': fixtures.stats}, indent=2))
+    else:
+        for r in results:
+            print(f"{r['path']:20} {r['ops_per_s']:>9} ops/s  média {r['mean_ms']} ms  "
+                  f"p50 {r['p50_ms']} ms  p99 {r['p99_ms']} ms  ({r['arg']})")
+        for problem in problems:
+            print(f"FALHOU: {problem}")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dir', default=Config.EXTRACTION_FIXTURES_CONFIG['dir'], help='Diretório das fixtures')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    capture_parser = commands.add_parser('capture', help='Gravar fixtures (usa a rede)')
+    capture_parser.add_argument('--youtube', action='append', help='URL de vídeo do YouTube')
+    capture_parser.add_argument('--instagram', action='append', help='URL de post/reel do Instagram')
+    capture_parser.add_argument('--twitch', action='append', help='Usuário do Twitch')
+
+    run_parser = commands.add_parser('run', help='Reproduzir offline, medir e comparar')
+    run_parser.add_argument('paths', nargs='*', choices=[[]] + list(HOT_PATHS), help='Caminhos (padrão: todos)')
+    run_parser.add_argument('--iterations', type=int, default=100)
+    run_parser.add_argument('--concurrency', type=int, default=1)
+    run_parser.add_argument('--update-golden', action='store_true', help='Aceitar os resultados atuais como esperados')
+    run_parser.add_argument('--json', action='store_true', help='Saída em JSON')
+
+    args = parser.parse_args()
+    return capture(args) if args.command == 'capture' else run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
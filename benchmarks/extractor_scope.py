@@ -0,0 +1,146 @@
+"""
+Benchmark do registro de extractors: escopo do app x registro completo do yt-dlp
+
+Para cada modo (EXTRACTOR_SCOPE=0 e =1) roda um processo novo que mede a
+memória residente (RSS) depois de criar as instâncias do YoutubeDL, o tempo
+de criação, o casamento de URLs de exemplo de cada plataforma e a latência
+da primeira extração (URL direta, que cai no GenericIE, o último da lista).
+
+Uso:
+    python benchmarks/extractor_scope.py
+    python benchmarks/extractor_scope.py --url http://127.0.0.1:8000/video.mp4
+    python benchmarks/extractor_scope.py --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_URLS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://www.twitch.tv/videos/1234567890',
+    'https://kick.com/canal/videos/abc',
+    'https://www.tiktok.com/@usuario/video/7100000000000000000',
+    'https://www.instagram.com/p/abc123/',
+    'https://www.facebook.com/watch?v=1234567890',
+    'https://x.com/usuario/status/1234567890',
+]
+
+# Executado no processo filho: imprime um JSON com as medidas
+_CHILD = r'''
+import json, sys, time
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+args = json.loads(sys.argv[1])
+base_rss = rss_kb()
+from rate_limiter import RateLimitedYoutubeDL
+
+started = time.perf_counter()
+ydl = RateLimitedYoutubeDL({'quiet': True, 'no_warnings': True})
+first_init = time.perf_counter() - started
+started = time.perf_counter()
+for _ in range(args['instances'] - 1):
+    RateLimitedYoutubeDL({'quiet': True, 'no_warnings': True})
+next_init = (time.perf_counter() - started) / max(args['instances'] - 1, 1)
+
+started = time.perf_counter()
+matched = {}
+for url in args['urls']:
+    matched[url] = next((key for key, ie in ydl._ies.items() if ie.suitable(url)), None)
+match_time = time.perf_counter() - started
+
+extraction = None
+if args['url']:
+    started = time.perf_counter()
+    info = ydl.extract_info(args['url'], download=False)
+    extraction = {'seconds': time.perf_counter() - started, 'extractor': info.get('extractor')}
+
+print(json.dumps({
+    'extractors': len(ydl._ies),
+    'rss_mb': round(rss_kb() / 1024, 1),
+    'rss_delta_mb': round((rss_kb() - base_rss) / 1024, 1),
+    'first_init_ms': round(first_init * 1000, 1),
+    'next_init_ms': round(next_init * 1000, 2),
+    'match_ms': round(match_time * 1000, 1),
+    'matched': matched,
+    'first_extraction_ms': round(extraction['seconds'] * 1000, 1) if extraction else None,
+    'first_extractor': extraction['extractor'] if extraction else None,
+}))
+'''
+
+
+def run_mode(scoped, url, instances):
+    """Medir um modo em processo novo"""
+    env = dict(os.environ, EXTRACTOR_SCOPE='1' if scoped else '0',
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    payload = json.dumps({'url': url, 'urls': SAMPLE_URLS, 'instances': instances})
+    result = subprocess.run([sys.executable, '-c', _CHILD, payload], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'benchmark falhou (EXTRACTOR_SCOPE={int(scoped)}):\n{result.stderr[-2000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_run(scoped, url, instances, runs):
+    """Mediana de cada medida numérica em N processos (o primeiro só aquece o __pycache__)"""
+    run_mode(scoped, url, instances)
+    samples = [run_mode(scoped, url, instances) for _ in range(runs)]
+    result = dict(samples[-1])
+    for key, value in result.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values = sorted(s[key] for s in samples)
+            result[key] = values[len(values) // 2]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='URL para a primeira extração (padrão: nenhuma)')
+    parser.add_argument('--instances', type=int, default=5, help='Instâncias do YoutubeDL por processo')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    args = parser.parse_args()
+
+    results = {
+        'full': median_run(False, args.url, args.instances, args.runs),
+        'scoped': median_run(True, args.url, args.instances, args.runs),
+    }
+    mismatched = [url for url in SAMPLE_URLS
+                  if results['full']['matched'][url] != results['scoped']['matched'][url]]
+
+    if args.json:
+        print(json.dumps(dict(results, mismatched=mismatched), indent=2))
+        return 1 if mismatched else 0
+
+    rows = [
+        ('extractors registrados', 'extractors', ''),
+        ('RSS do processo', 'rss_mb', ' MB'),
+        ('RSS após criar o YoutubeDL', 'rss_delta_mb', ' MB'),
+        ('1ª instância', 'first_init_ms', ' ms'),
+        ('instâncias seguintes (média)', 'next_init_ms', ' ms'),
+        (f'casar {len(SAMPLE_URLS)} URLs', 'match_ms', ' ms'),
+        ('1ª extração', 'first_extraction_ms', ' ms'),
+    ]
+    print(f"{'':32} {'completo':>12} {'escopo':>12}")
+    for label, key, unit in rows:
+        full, scoped = results['full'][key], results['scoped'][key]
+        if full is None:
+            continue
+        print(f"{label:32} {str(full) + unit:>12} {str(scoped) + unit:>12}")
+    for url in mismatched:
+        print(f"DIVERGÊNCIA: {url}: {results['full']['matched'][url]} x {results['scoped']['matched'][url]}")
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
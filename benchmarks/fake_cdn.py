@@ -0,0 +1,320 @@
+"""
+CDN de mídia falso para benchmarks offline
+
+Serve um MP4 progressivo (/video.mp4) e um VOD HLS (/vod/index.m3u8 +
+fragmentos .ts) gerados localmente, com latência, banda por conexão e
+taxa de erro configuráveis. A mídia é gerada com o ffmpeg (lavfi
+testsrc2 + sine); sem ffmpeg, usa arquivos sintéticos do mesmo tamanho
+(bytes aleatórios com a estrutura mínima de MP4/TS), suficientes para os
+caminhos de download do yt-dlp, mas não para ffprobe/ffmpeg.
+
+/video-<token>.mp4 e /vod-<token>/... servem a mesma mídia que
+/video.mp4 e /vod/...: cada job pode usar uma URL (e um ID no yt-dlp)
+própria, sem passar pelos caches e pela deduplicação do app.
+
+Uso:
+    python benchmarks/fake_cdn.py --port 8765 --latency 50 --bandwidth 4000 --error-rate 0.02
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+CHUNK_SIZE = 64 * 1024
+CONTENT_TYPES = {
+    '.mp4': 'video/mp4',
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cliente que desiste da conexão (cancelamento, retry) não é erro do CDN
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MediaSet:
+    """Arquivos servidos pelo CDN (gerados uma vez por combinação de parâmetros)"""
+
+    def __init__(self, duration=60, bitrate_kbps=2000, segment_seconds=4, media_dir=None):
+        """
+        Args:
+            duration (int): Duração da mídia em segundos
+            bitrate_kbps (int): Bitrate total aproximado (vídeo + áudio)
+            segment_seconds (int): Duração de cada fragmento HLS
+            media_dir (str): Diretório dos arquivos (padrão: cache no diretório temporário)
+        """
+        self.duration = duration
+        self.bitrate_kbps = bitrate_kbps
+        self.segment_seconds = segment_seconds
+        key = hashlib.sha1(f'{duration}:{bitrate_kbps}:{segment_seconds}'.encode()).hexdigest()[:12]
+        self.root = os.path.abspath(media_dir or os.path.join(tempfile.gettempdir(), 'uvd_fake_cdn', key))
+        self.synthetic = False
+
+    def ensure(self):
+        """Gerar a mídia se ainda não existir; retorna self"""
+        marker = os.path.join(self.root, 'media.json')
+        if os.path.exists(marker):
+            with open(marker, encoding='utf-8') as f:
+                self.synthetic = json.load(f)['synthetic']
+            return self
+        os.makedirs(os.path.join(self.root, 'vod'), exist_ok=True)
+        if shutil.which('ffmpeg'):
+            self._generate_ffmpeg()
+        else:
+            self._generate_synthetic()
+            self.synthetic = True
+        with open(marker, 'w', encoding='utf-8') as f:
+            json.dump({'synthetic': self.synthetic, 'duration': self.duration,
+                       'bitrate_kbps': self.bitrate_kbps, 'segment_seconds': self.segment_seconds}, f)
+        return self
+
+    def _generate_ffmpeg(self):
+        fps = 30
+        video = os.path.join(self.root, 'video.mp4')
+        subprocess.run([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate={fps}',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000',
+            '-t', str(self.duration),
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(fps * self.segment_seconds),
+            '-b:v', f'{max(self.bitrate_kbps - 128, 64)}k',
+            '-c:a', 'aac', '-b:a', '128k',
+            '-movflags', '+faststart', video,
+        ], check=True)
+        subprocess.run([
+            'ffmpeg', '-y', '-loglevel', 'error', '-i', video, '-c', 'copy',
+            '-f', 'hls', '-hls_time', str(self.segment_seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(self.root, 'vod', 's%03d.ts'),
+            os.path.join(self.root, 'vod', 'index.m3u8'),
+        ], check=True)
+
+    def _generate_synthetic(self):
+        rng = random.Random(0)
+        bytes_per_second = self.bitrate_kbps * 1000 // 8
+
+        payload = rng.randbytes(bytes_per_second * self.duration)
+        ftyp = b'\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2'
+        mdat = (len(payload) + 8).to_bytes(4, 'big') + b'mdat'
+        with open(os.path.join(self.root, 'video.mp4'), 'wb') as f:
+            f.write(ftyp + mdat + payload)
+
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{self.segment_seconds}',
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+        remaining, index = self.duration, 0
+        while remaining > 0:
+            seconds = min(self.segment_seconds, remaining)
+            packets = bytes_per_second * seconds // 188
+            with open(os.path.join(self.root, 'vod', f's{index:03d}.ts'), 'wb') as f:
+                f.write(b''.join(b'\x47' + rng.randbytes(187) for _ in range(packets)))
+            lines += [f'#EXTINF:{seconds:.3f},', f's{index:03d}.ts']
+            remaining -= seconds
+            index += 1
+        lines.append('#EXT-X-ENDLIST')
+        with open(os.path.join(self.root, 'vod', 'index.m3u8'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def path(self, url_path):
+        """Arquivo local de um caminho da URL (None se não existir ou sair do diretório)"""
+        url_path = re.sub(r'^/(video|vod)-\w+', r'/\1', url_path)
+        path = os.path.normpath(os.path.join(self.root, url_path.lstrip('/')))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+
+class FakeCDN:
+    """
+    Servidor HTTP do CDN falso
+
+    Cada requisição espera latency (+ jitter aleatório), falha com 503 com
+    probabilidade error_rate e envia o corpo limitado a bandwidth_kbps por
+    conexão. Suporta HEAD e Range (206). Contadores em GET /_stats.
+    """
+
+    def __init__(self, media, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0,
+                 bandwidth_kbps=0, error_rate=0.0, seed=None):
+        """
+        Args:
+            media (MediaSet): Arquivos servidos
+            host (str): Endereço de escuta
+            port (int): Porta (0 = livre)
+            latency_ms (float): Atraso antes de responder
+            jitter_ms (float): Atraso extra aleatório (0 a jitter_ms)
+            bandwidth_kbps (float): Banda por conexão em KB/s (0 = sem limite)
+            error_rate (float): Fração das requisições respondidas com 503
+            seed (int): Semente do sorteio de erros/jitter
+        """
+        self.media = media
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.bandwidth = bandwidth_kbps * 1024
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors_injected': 0, 'bytes_sent': 0, 'not_found': 0}
+        self.server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def _draw(self):
+        """(atraso, injetar erro) da próxima requisição"""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            return delay, self._random.random() < self.error_rate
+
+    def _handler(self):
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                self._serve(body=False)
+
+            def do_GET(self):
+                self._serve(body=True)
+
+            def _reply(self, code, data, content_type='text/plain'):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(data)
+
+            def _serve(self, body):
+                path = urlsplit(self.path).path
+                if path == '/_stats':
+                    with cdn._lock:
+                        data = json.dumps(dict(cdn.stats, synthetic=cdn.media.synthetic)).encode()
+                    return self._reply(200, data, 'application/json')
+
+                cdn._count(requests=1)
+                delay, fail = cdn._draw()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    cdn._count(errors_injected=1)
+                    return self._reply(503, b'injected error')
+                filepath = cdn.media.path(path)
+                if filepath is None:
+                    cdn._count(not_found=1)
+                    return self._reply(404, b'not found')
+
+                size = os.path.getsize(filepath)
+                start, end = 0, size - 1
+                byte_range = self.headers.get('Range', '')
+                if byte_range.startswith('bytes='):
+                    first, _, last = byte_range[6:].split(',')[0].partition('-')
+                    if first:
+                        start, end = int(first), min(int(last), size - 1) if last else size - 1
+                    elif last:
+                        start = max(size - int(last), 0)
+                    if start >= size:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{size}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                else:
+                    self.send_response(200)
+                length = end - start + 1
+                self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(filepath)[1], 'application/octet-stream'))
+                self.send_header('Content-Length', str(length))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                if body:
+                    self._send_file(filepath, start, length)
+
+            def _send_file(self, filepath, start, length):
+                started, sent = time.monotonic(), 0
+                try:
+                    with open(filepath, 'rb') as f:
+                        f.seek(start)
+                        while sent < length:
+                            chunk = f.read(min(CHUNK_SIZE, length - sent))
+                            if not chunk:
+                                break
+                            self.wfile.write(chunk)
+                            sent += len(chunk)
+                            if cdn.bandwidth:
+                                ahead = sent / cdn.bandwidth - (time.monotonic() - started)
+                                if ahead > 0:
+                                    time.sleep(ahead)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    cdn._count(bytes_sent=sent)
+
+        return Handler
+
+    def start(self):
+        """Servir em uma thread de fundo; retorna self"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='FakeCDN', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help='Porta (0 = livre; a URL é impressa ao iniciar)')
+    parser.add_argument('--latency', type=float, default=0, help='Latência por requisição (ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='Latência extra aleatória (ms)')
+    parser.add_argument('--bandwidth', type=float, default=0, help='Banda por conexão (KB/s, 0 = sem limite)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 503')
+    parser.add_argument('--duration', type=int, default=60, help='Duração da mídia (s)')
+    parser.add_argument('--bitrate', type=int, default=2000, help='Bitrate da mídia (kbps)')
+    parser.add_argument('--segment', type=int, default=4, help='Duração dos fragmentos HLS (s)')
+    parser.add_argument('--media-dir', help='Diretório da mídia gerada')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    media = MediaSet(args.duration, args.bitrate, args.segment, args.media_dir).ensure()
+    cdn = FakeCDN(media, args.host, args.port, args.latency, args.jitter,
+                  args.bandwidth, args.error_rate, args.seed)
+    print(f'FAKE_CDN {cdn.base_url} media={media.root} synthetic={media.synthetic}', flush=True)
+    try:
+        cdn.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cdn.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark do tempo de import (cold start) dos pontos de entrada Flask
+
+Roda 'python -X importtime -c "import <módulo>"' em processos novos, usa a
+mediana das execuções e compara com benchmarks/import_budget.json (tempo
+máximo e módulos que não podem ser carregados no import, como o yt-dlp).
+
+Uso:
+    python benchmarks/import_time.py              # todos os pontos de entrada do budget
+    python benchmarks/import_time.py app --top 20 # um módulo, 20 maiores imports
+    python benchmarks/import_time.py --json       # saída em JSON (CI)
+
+Sai com código 1 se algum ponto de entrada estourar o budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, 'benchmarks', 'import_budget.json')
+
+
+def parse_importtime(stderr):
+    """
+    Ler a saída do -X importtime
+
+    Returns:
+        dict: módulo -> (self_us, cumulative_us) do primeiro import do módulo
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure(module):
+    """Uma execução em processo novo: dict módulo -> (self_us, cumulative_us)"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} falhou:\n{result.stderr[-2000:]}')
+    return parse_importtime(result.stderr)
+
+
+def benchmark(module, runs, top=10):
+    """
+    Medir o import de um módulo
+
+    A primeira execução só aquece o cache de bytecode (__pycache__) e
+    não entra na mediana.
+
+    Returns:
+        dict: Mediana total (ms), maiores imports por tempo próprio e módulos carregados
+    """
+    measure(module)
+    samples = [measure(module) for _ in range(runs)]
+    totals = [sample[module][1] / 1000 for sample in samples if module in sample]
+    last = samples[-1]
+    heaviest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'module': module,
+        'runs': runs,
+        'median_ms': round(statistics.median(totals), 1),
+        'min_ms': round(min(totals), 1),
+        'max_ms': round(max(totals), 1),
+        'top': [{'module': name, 'self_ms': round(s / 1000, 1), 'cumulative_ms': round(c / 1000, 1)}
+                for name, (s, c) in heaviest],
+        'loaded': sorted(last),
+    }
+
+
+def check(result, budget):
+    """Violações do budget (lista de mensagens)"""
+    problems = []
+    if budget.get('max_ms') is not None and result['median_ms'] > budget['max_ms']:
+        problems.append(f"{result['module']}: {result['median_ms']} ms > budget {budget['max_ms']} ms")
+    for forbidden in budget.get('forbidden', []):
+        if any(name == forbidden or name.startswith(forbidden + '.') for name in result['loaded']):
+            problems.append(f"{result['module']}: importa {forbidden} no cold start")
+    return problems
+
+
+def main():
+    with open(BUDGET_FILE, encoding='utf-8') as f:
+        budget = json.load(f)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*', help='Módulos a medir (padrão: pontos de entrada do budget)')
+    parser.add_argument('--runs', type=int, default=budget.get('runs', 7))
+    parser.add_argument('--top', type=int, default=10, help='Maiores imports por tempo próprio')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    args = parser.parse_args()
+
+    modules = args.modules or list(budget['entry_points'])
+    results, problems = [], []
+    for module in modules:
+        result = benchmark(module, args.runs, args.top)
+        results.append(result)
+        problems += check(result, budget['entry_points'].get(module, {}))
+
+    if args.json:
+        print(json.dumps({'results': [dict(r, loaded=len(r['loaded'])) for r in results], 'problems': problems}, indent=2))
+    else:
+        for result in results:
+            limit = budget['entry_points'].get(result['module'], {}).get('max_ms')
+            print(f"{result['module']}: mediana {result['median_ms']} ms "
+                  f"(min {result['min_ms']}, max {result['max_ms']}, {result['runs']} execuções)"
+                  + (f" / budget {limit} ms" if limit else ''))
+            for item in result['top']:
+                print(f"    {item['self_ms']:8.1f} ms  {item['cumulative_ms']:8.1f} ms  {item['module']}")
+        for problem in problems:
+            print(f"FALHOU: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
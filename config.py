@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 class Config:
@@ -74,12 +75,282 @@ class Config:
     NETWORK_CONFIG = {
         'timeout': 30,
         'retries': 3,
-        'concurrent_downloads': 1,
+        'concurrent_downloads': int(os.environ.get('MAX_CONCURRENT_DOWNLOADS', 3)),  # Workers do DownloadEngine
         'rate_limit': None,  # None = sem limite
         'proxy': None,
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
     
+    # Perfis de rede por plataforma (fragmentos HLS/DASH em paralelo, blocos HTTP)
+    NETWORK_PROFILES = {
+        'default': {
+            'concurrent_fragment_downloads': 4,
+            'http_chunk_size': None,
+            'buffersize': 64 * 1024,
+        },
+        'youtube': {
+            'concurrent_fragment_downloads': 4,
+            'http_chunk_size': 10 * 1024 * 1024,  # Blocos de 10MB evitam o throttling de downloads longos
+            'buffersize': 64 * 1024,
+        },
+        'twitch': {
+            'concurrent_fragment_downloads': 8,  # VODs HLS com centenas de fragmentos
+            'http_chunk_size': None,
+            'buffersize': 128 * 1024,
+        },
+        'facebook': {
+            'concurrent_fragment_downloads': 4,
+            'http_chunk_size': None,
+            'buffersize': 64 * 1024,
+        },
+        'instagram': {
+            'concurrent_fragment_downloads': 2,
+            'http_chunk_size': None,
+            'buffersize': 32 * 1024,
+        },
+        'tiktok': {
+            'concurrent_fragment_downloads': 2,
+            'http_chunk_size': None,
+            'buffersize': 32 * 1024,
+        },
+    }
+
+    # Ajuste adaptativo dos perfis de rede pela vazão medida
+    ADAPTIVE_NETWORK_CONFIG = {
+        'enabled': os.environ.get('ADAPTIVE_NETWORK', '1') != '0',
+        'min_fragments': 1,
+        'max_fragments': 16,
+        'min_buffersize': 16 * 1024,
+        'max_buffersize': 1024 * 1024,
+        'min_sample_bytes': 1024 * 1024,  # Downloads menores não são medidos
+        'smoothing': 0.3,  # Peso da nova amostra na média móvel
+    }
+
+    # Cache de metadados (extract_info sem download)
+    INFO_CACHE_CONFIG = {
+        'max_entries': 256,
+        'default_ttl': 300,
+        # TTL em segundos por plataforma (URLs de mídia expiram)
+        'ttl': {
+            'youtube': 1800,
+            'twitch': 900,
+            'facebook': 600,
+            'x/twitter': 600,
+            'instagram': 300,
+            'tiktok': 300,
+        },
+        'persist_dir': os.environ.get('INFO_CACHE_DIR'),  # None = apenas memória
+    }
+
+    # Deduplicação de downloads idênticos (mesmo vídeo, formato e pós-processamento)
+    DOWNLOAD_STORE_CONFIG = {
+        'max_entries': 512,
+        'max_age': 3600,  # Segundos que um arquivo pronto pode ser reaproveitado
+    }
+
+    # Entrega em streaming do /download_direct (formatos progressivos sem mux/transcode)
+    STREAM_DELIVERY_CONFIG = {
+        'enabled': os.environ.get('STREAM_DELIVERY', '1') != '0',
+        # Qualidade das respostas com o arquivo (/download_direct e index.py): até 720p
+        # para caber no limite de resposta do Vercel; só o /download (jobs) usa 'best'
+        'quality': os.environ.get('DIRECT_QUALITY', '720p'),
+        'chunk_size': 256 * 1024,
+        'buffer_chunks': 8,  # Blocos em memória entre upstream e cliente
+    }
+
+    # Canal de progresso via Server-Sent Events (/events/<download_id>)
+    PROGRESS_EVENTS_CONFIG = {
+        'min_interval': 0.5,  # Intervalo mínimo entre eventos de progresso por conexão
+        'keepalive': 15,  # Comentário SSE para manter a conexão aberta
+        'snapshot_interval': 2,  # Sem eventos locais, reconsultar o status (downloads em outro worker)
+        'max_duration': int(os.environ.get('PROGRESS_EVENTS_MAX_DURATION', 600)),  # Vida máxima de uma conexão (s)
+        'max_channels': 1000,
+    }
+
+    # Registro persistente de downloads (SQLite em modo WAL, compartilhado entre workers)
+    JOB_STORE_CONFIG = {
+        'db_path': os.environ.get('JOB_DB_PATH') or os.path.join(tempfile.gettempdir(), 'video_downloader_jobs.db'),
+        'max_age': 24 * 3600,  # Segundos sem atualização até o registro expirar
+        'sweep_interval': 300,
+        'progress_flush_interval': 1.0,  # Janela de agrupamento das escritas de progresso
+    }
+
+    # Diretórios de download gerenciados (cota e expiração)
+    STORAGE_CONFIG = {
+        'root': os.environ.get('DOWNLOAD_ROOT') or os.path.join(tempfile.gettempdir(), 'video_downloader'),
+        'quota_bytes': int(os.environ.get('STORAGE_QUOTA_MB', 2048)) * 1024 * 1024,
+        'max_age': 6 * 3600,  # Segundos desde o último envio até o arquivo expirar
+        'enforce_interval': 60,
+        'lease_ttl': 12 * 3600,  # Leases de um worker que morreu sem liberar expiram
+    }
+
+    # Entrega dos arquivos baixados (/file)
+    FILE_SERVING_CONFIG = {
+        # Delegar o envio ao proxy (nginx/Apache) via X-Sendfile
+        'use_x_sendfile': os.environ.get('USE_X_SENDFILE') == '1',
+        'max_age': 3600,  # Cache privado do navegador; depois revalida com ETag
+        'x_sendfile_lease': 3600,  # Com X-Sendfile, tempo protegido para o proxy ler o arquivo
+    }
+
+    # Instâncias YoutubeDL reutilizadas por perfil (extractors carregados e conexões keep-alive)
+    YDL_POOL_CONFIG = {
+        'enabled': os.environ.get('YDL_POOL', '1') != '0',
+        'max_idle_per_profile': 4,  # Instâncias ociosas mantidas por perfil
+        'max_uses': 100,  # Recriar a instância depois de N empréstimos (cookies/estado)
+        'idle_timeout': 300,  # Segundos ociosa até ser fechada
+    }
+
+    # Modo corrida do YouTubeUltimate (estratégias de extração em paralelo)
+    YOUTUBE_RACING_CONFIG = {
+        'enabled': os.environ.get('YOUTUBE_RACING', '1') != '0',
+        'max_parallel': 4,  # Estratégias extraindo ao mesmo tempo
+        'stagger': 1.0,  # Segundos entre o início de cada estratégia (0 = todas juntas)
+        'timeout': 120,  # Tempo máximo da corrida
+    }
+
+    # Scores das estratégias anti-bot do YouTube (bandit com esquecimento)
+    STRATEGY_SCORES_CONFIG = {
+        'db_path': os.environ.get('STRATEGY_DB_PATH') or os.path.join(tempfile.gettempdir(), 'video_downloader_strategies.db'),
+        'half_life': 6 * 3600,  # Segundos para um resultado perder metade do peso
+        'latency_scale': 30,  # Latência (s) que reduz o score à metade
+    }
+
+    # Downloads em lote (/api/batch e download_multiple_*)
+    BATCH_CONFIG = {
+        'max_items': int(os.environ.get('BATCH_MAX_ITEMS', 500)),  # URLs por batch
+        'max_workers': int(os.environ.get('BATCH_MAX_WORKERS', 6)),  # Itens em andamento por batch (downloads limitados pelo DownloadEngine)
+        # Downloads simultâneos por plataforma no processo, somando todos os batches (evita bloqueios)
+        'platform_limits': {
+            'youtube': 2,
+            'instagram': 2,
+            'tiktok': 2,
+            'facebook': 3,
+            'twitter': 3,
+            'twitch': 2,
+            'generic': 2,
+        },
+    }
+
+    # Limite de requisições por (plataforma, host) com token buckets
+    RATE_LIMIT_CONFIG = {
+        'enabled': os.environ.get('RATE_LIMIT', '1') != '0',
+        # Banco SQLite para dividir os buckets entre processos (None = só este processo)
+        'db_path': os.environ.get('RATE_LIMIT_DB_PATH') or None,
+        # Requisições por segundo e rajada máxima por plataforma (cada host tem o seu bucket)
+        'platforms': {
+            'youtube': {'rate': 1.0, 'burst': 6},
+            'instagram': {'rate': 0.5, 'burst': 4},
+            'tiktok': {'rate': 1.0, 'burst': 5},
+            'facebook': {'rate': 1.0, 'burst': 5},
+            'twitter': {'rate': 1.0, 'burst': 5},
+            'twitch': {'rate': 4.0, 'burst': 10},
+            'generic': {'rate': 10.0, 'burst': 20},
+        },
+        # CDNs de mídia conhecidos: nunca consomem tokens (downloads e fragmentos
+        # de qualquer host já são isentos, ver RateLimitedYoutubeDL.media_requests)
+        'exempt_hosts': (
+            'googlevideo.com', 'fbcdn.net', 'cdninstagram.com', 'tiktokcdn.com',
+            'tiktokcdn-us.com', 'video.twimg.com', 'ttvnw.net', 'jtvnw.net',
+        ),
+        # Trechos de erro que indicam limite da plataforma
+        'error_patterns': (
+            '429', 'too many requests', 'rate limit', 'rate-limit', 'ratelimit',
+            'dneb_', 'please wait a few minutes', 'temporarily blocked',
+        ),
+        'cooldown': 5,  # Pausa após um erro de limite (dobra a cada erro seguido)
+        'max_cooldown': 300,
+        'backoff_factor': 0.5,  # Taxa multiplicada a cada erro de limite
+        'min_rate_factor': 0.05,
+        'recovery_half_life': 300,  # Segundos para recuperar metade da taxa perdida
+        'penalty_merge_window': 2,  # Erros dentro dessa janela contam uma vez só
+    }
+
+    # Playlists e canais (itens em paralelo, retomada pelo arquivo de IDs)
+    PLAYLIST_CONFIG = {
+        'max_workers': int(os.environ.get('PLAYLIST_MAX_WORKERS', 3)),  # Itens baixados ao mesmo tempo
+        'archive_name': '.download_archive.txt',  # Arquivo de IDs concluídos, no diretório de destino
+    }
+
+    # Busca de VODs do Twitch (listagem flat em cache, detalhes sob demanda)
+    TWITCH_CATALOG_CONFIG = {
+        'ttl': int(os.environ.get('TWITCH_CATALOG_TTL', 300)),  # Segundos que a listagem de um usuário vale
+        'max_users': 128,  # Usuários mantidos em cache (LRU)
+        'enrich_workers': 4,  # Extrações de detalhes em paralelo
+    }
+
+    # Recorte de VODs HLS (só os fragmentos do intervalo)
+    SEGMENT_CONFIG = {
+        'enabled': os.environ.get('SEGMENT_ENGINE', '1') != '0',  # 0 = sempre ffmpeg sobre o VOD inteiro
+        'workers': int(os.environ.get('SEGMENT_WORKERS', 6)),  # Fragmentos baixados em paralelo
+        'fragment_retries': 3,
+        'clip_workers': int(os.environ.get('SEGMENT_CLIP_WORKERS', 3)),  # Recortes gerados em paralelo (processos ffmpeg)
+        'max_clips': 50,  # Recortes por pedido no /api/twitch/clips
+        'frame_accurate': False,  # Padrão: corte no keyframe, sem reencode
+    }
+
+    # Extractors registrados em cada YoutubeDL (só as plataformas usadas)
+    EXTRACTOR_SCOPE_CONFIG = {
+        'enabled': os.environ.get('EXTRACTOR_SCOPE', '1') != '0',  # 0 = registro completo do yt-dlp
+        'extra_platforms': ('twitter', 'generic'),  # Além de SUPPORTED_PLATFORMS (X/Twitter e URLs diretas do app)
+        # ie_key dos extractors de cada plataforma (regex, casado no início)
+        'patterns': {
+            'youtube': r'Youtube',
+            'twitch': r'Twitch',
+            'kick': r'Kick(VOD|Clip)?$',
+            'instagram': r'Instagram',
+            'facebook': r'Facebook',
+            'tiktok': r'TikTok',
+            'twitter': r'Twitter',
+            'generic': r'Generic$',
+        },
+    }
+
+    # Fixtures de extração (benchmarks/testes offline): 'capture' grava, 'replay' reproduz sem rede
+    EXTRACTION_FIXTURES_CONFIG = {
+        'mode': os.environ.get('EXTRACTION_FIXTURES', 'off'),  # off, capture ou replay
+        'dir': os.environ.get('EXTRACTION_FIXTURES_DIR') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures'),
+        # Opções que mudam o resultado da extração (entram na chave da fixture)
+        'key_params': ('extract_flat', 'noplaylist', 'playlistend', 'playliststart', 'playlist_items'),
+    }
+
+    # Métricas no formato do Prometheus (GET /metrics)
+    METRICS_CONFIG = {
+        'enabled': os.environ.get('METRICS', '1') != '0',
+        'namespace': 'uvd',
+        # Limites (segundos) dos buckets de cada histograma
+        'buckets': {
+            'extraction': (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+            'download': (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+            'postprocess': (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+            'http': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+        },
+        # Valores aceitos no rótulo platform (o resto vira 'generic': cardinalidade fixa)
+        'platforms': ('youtube', 'twitch', 'kick', 'instagram', 'facebook', 'tiktok', 'twitter', 'generic'),
+    }
+
+    # Pós-processamento: reencodar só quando o codec não serve para o formato pedido
+    POSTPROCESS_CONFIG = {
+        # Codecs aceitos por formato (None = qualquer); mp4 fica em H.264/AAC por compatibilidade
+        'compatible': {
+            'mp4': {'video': ('h264',), 'audio': ('aac', 'mp3')},
+            'mov': {'video': ('h264', 'hevc', 'prores', 'mjpeg'), 'audio': ('aac', 'alac', 'pcm_s16le')},
+            'webm': {'video': ('vp8', 'vp9', 'av1'), 'audio': ('opus', 'vorbis')},
+            'mkv': {'video': None, 'audio': None},
+            'avi': {'video': ('mpeg4', 'h264', 'mjpeg'), 'audio': ('mp3', 'ac3', 'pcm_s16le')},
+            'flv': {'video': ('h264', 'flv1'), 'audio': ('aac', 'mp3')},
+        },
+        # Encoders usados quando o reencode é necessário
+        'encoders': {
+            'mp4': {'video': ('libx264', '-preset', 'fast'), 'audio': ('aac',)},
+            'mov': {'video': ('libx264', '-preset', 'fast'), 'audio': ('aac',)},
+            'mkv': {'video': ('libx264', '-preset', 'fast'), 'audio': ('aac',)},
+            'flv': {'video': ('libx264', '-preset', 'fast'), 'audio': ('aac',)},
+            'webm': {'video': ('libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8'), 'audio': ('libopus',)},
+            'avi': {'video': ('libxvid', '-vtag', 'XVID'), 'audio': ('libmp3lame',)},
+        },
+    }
+
     # Plataformas suportadas (futuro)
     SUPPORTED_PLATFORMS = {
         'youtube': {
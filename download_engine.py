@@ -0,0 +1,292 @@
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from config import Config
+
+
+class JobError(Exception):
+    """Erro de job com detalhes extras (error_type, suggestion, ...) para a API"""
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+
+class DownloadJob:
+    """Job de download gerenciado pelo DownloadEngine"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    # Transições válidas da máquina de estados
+    TRANSITIONS = {
+        QUEUED: (RUNNING, CANCELLED),
+        RUNNING: (COMPLETED, FAILED),
+        COMPLETED: (),
+        FAILED: (),
+        CANCELLED: (),
+    }
+
+    def __init__(self, func, args=(), kwargs=None, job_id=None, metadata=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.metadata = metadata or {}
+        self.state = self.QUEUED
+        self.result = None
+        self.error = None
+        self.error_details = {}
+        self.progress = {}
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        """Job terminou (com sucesso, falha ou cancelado)"""
+        return self.state in (self.COMPLETED, self.FAILED, self.CANCELLED)
+
+    def _transition(self, new_state):
+        """Aplicar transição de estado validando a máquina de estados"""
+        if new_state not in self.TRANSITIONS[self.state]:
+            raise ValueError(f"Transição inválida: {self.state} -> {new_state}")
+        self.state = new_state
+        if new_state == self.RUNNING:
+            self.started_at = datetime.now().isoformat()
+        elif self.finished:
+            self.finished_at = datetime.now().isoformat()
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        Aguardar o job terminar
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            bool: True se o job terminou dentro do tempo
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        """Representação serializável do job"""
+        return {
+            'id': self.id,
+            'state': self.state,
+            'error': self.error,
+            'error_details': self.error_details,
+            'progress': self.progress,
+            'metadata': self.metadata,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+_local = threading.local()
+
+
+def current_job():
+    """Retornar o DownloadJob em execução na thread atual (ou None)"""
+    return getattr(_local, 'job', None)
+
+
+class DownloadEngine:
+    """Pool limitado de workers para executar downloads em fila"""
+
+    def __init__(self, max_workers=None, max_finished_jobs=1000):
+        """
+        Inicializar o engine
+
+        Args:
+            max_workers (int): Quantidade de workers (padrão: Config.NETWORK_CONFIG['concurrent_downloads'])
+            max_finished_jobs (int): Quantidade de jobs finalizados mantidos em memória
+        """
+        if max_workers is None:
+            max_workers = Config.NETWORK_CONFIG.get('concurrent_downloads') or 1
+        self.max_workers = max(1, int(max_workers))
+        self.max_finished_jobs = max_finished_jobs
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._jobs = {}
+        self._finished = deque()
+        self._workers = []
+        self._active = 0
+        self._shutdown = False
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        Registrar callback chamado a cada mudança de estado de um job
+
+        Args:
+            callback (callable): Função que recebe o DownloadJob (chamada fora do lock)
+        """
+        with self._cond:
+            self._listeners.append(callback)
+
+    def submit(self, func, *args, job_id=None, metadata=None, **kwargs):
+        """
+        Enfileirar um job
+
+        Args:
+            func (callable): Função executada pelo worker com *args/**kwargs
+            job_id (str): ID do job (gerado se omitido)
+            metadata (dict): Informações extras (url, plataforma, ...)
+
+        Returns:
+            DownloadJob: Job criado
+        """
+        job = DownloadJob(func, args, kwargs, job_id=job_id, metadata=metadata)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("DownloadEngine foi encerrado")
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        """Retornar job pelo ID (ou None)"""
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id):
+        """
+        Posição do job na fila
+
+        Returns:
+            int: 1 = próximo a executar, 0 = já em execução/finalizado, None = desconhecido
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state != DownloadJob.QUEUED:
+                return 0
+            for position, queued in enumerate(self._queue, 1):
+                if queued is job:
+                    return position
+            return 0
+
+    def cancel(self, job_id):
+        """
+        Cancelar um job que ainda está na fila
+
+        Returns:
+            bool: True se cancelado
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != DownloadJob.QUEUED:
+                return False
+            self._queue.remove(job)
+            job._transition(DownloadJob.CANCELLED)
+            self._remember_finished(job)
+        self._notify(job)
+        return True
+
+    def stats(self):
+        """Estatísticas atuais do pool"""
+        with self._cond:
+            return {
+                'max_workers': self.max_workers,
+                'active_workers': self._active,
+                'queued': len(self._queue),
+                'tracked_jobs': len(self._jobs),
+            }
+
+    def shutdown(self, wait=True):
+        """Encerrar workers (jobs em fila continuam sendo processados)"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _ensure_workers(self):
+        """Criar workers sob demanda até max_workers (chamado com lock)"""
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < min(self.max_workers, len(self._queue) + self._active):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"download-worker-{len(self._workers) + 1}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _remember_finished(self, job):
+        """Manter apenas os últimos jobs finalizados (chamado com lock)"""
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished_jobs:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _notify(self, job):
+        """Avisar listeners sobre o estado atual do job"""
+        with self._cond:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"[Engine] Erro no listener do job {job.id}: {e}")
+
+    def _worker_loop(self):
+        """Loop principal de cada worker"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                job._transition(DownloadJob.RUNNING)
+                self._active += 1
+            self._notify(job)
+
+            _local.job = job
+            started = time.time()
+            try:
+                job.result = job.func(*job.args, **job.kwargs)
+                new_state = DownloadJob.COMPLETED
+            except Exception as e:
+                job.error = str(e)
+                job.error_details = getattr(e, 'details', {}) or {}
+                new_state = DownloadJob.FAILED
+                print(f"[Engine] Job {job.id} falhou: {e}")
+            finally:
+                _local.job = None
+
+            with self._cond:
+                job._transition(new_state)
+                self._active -= 1
+                self._remember_finished(job)
+            self._notify(job)
+            print(f"[Engine] Job {job.id} {new_state} em {time.time() - started:.1f}s")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_download_engine():
+    """Retornar o DownloadEngine compartilhado do processo"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DownloadEngine()
+        return _engine
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from config import Config
+
+
+def _json_default(value):
+    """Serializar valores não-JSON das opções (perfis congelados, funções)"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def make_content_key(info, ydl_opts):
+    """
+    Chave de conteúdo de um download
+
+    Combina o ID canônico do vídeo (extractor + id), o seletor de formato e o
+    perfil de pós-processamento. Dois pedidos com a mesma chave produzem o
+    mesmo arquivo.
+
+    Args:
+        info (dict): Info dict do yt-dlp
+        ydl_opts (dict): Opções do yt-dlp usadas no download
+
+    Returns:
+        str: Chave (hash sha1)
+    """
+    extractor = info.get('extractor_key') or info.get('extractor') or 'generic'
+    video_id = info.get('id') or info.get('webpage_url') or info.get('original_url')
+    profile = {
+        'format': ydl_opts.get('format'),
+        'postprocessors': ydl_opts.get('postprocessors') or [],
+        'postprocessor_args': ydl_opts.get('postprocessor_args'),
+        'merge_output_format': ydl_opts.get('merge_output_format'),
+    }
+    raw = f"{extractor}:{video_id}|" + json.dumps(profile, sort_keys=True, default=_json_default)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class _StoreEntry:
+    """Entrada do DownloadStore (em andamento ou concluída)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+    @property
+    def ready(self):
+        return self.event.is_set() and self.error is None
+
+
+class DownloadStore:
+    """Deduplicação de downloads por conteúdo (coalescência + reaproveitamento)"""
+
+    def __init__(self, max_entries=None, max_age=None, on_evict=None):
+        """
+        Inicializar o store
+
+        Args:
+            max_entries (int): Quantidade máxima de arquivos lembrados (LRU)
+            max_age (int): Idade máxima em segundos de um arquivo reaproveitável
+            on_evict (callable): Callback chamado com o resultado de cada entrada removida
+        """
+        config = Config.DOWNLOAD_STORE_CONFIG
+        self.max_entries = max_entries or config['max_entries']
+        self.max_age = max_age or config['max_age']
+        self.on_evict = on_evict
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def fetch(self, key, producer):
+        """
+        Obter o arquivo para a chave, baixando no máximo uma vez
+
+        - Arquivo já baixado e ainda existente: retorna imediatamente
+        - Download idêntico em andamento: aguarda e compartilha o resultado
+        - Caso contrário: executa producer() e guarda o resultado
+
+        Args:
+            key (str): Chave de conteúdo (make_content_key)
+            producer (callable): Função que baixa e retorna dict com 'filepath'
+
+        Returns:
+            dict: Resultado do download (com 'deduplicated' indicando reaproveitamento)
+        """
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.ready and not self._usable(entry):
+                evicted.append(self._entries.pop(key))
+                entry = None
+
+            if entry is None:
+                entry = self._entries[key] = _StoreEntry()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                if entry.ready:
+                    self.hits += 1
+                else:
+                    self.coalesced += 1
+                entry.last_used = time.time()
+                self._entries.move_to_end(key)
+        self._notify_evicted(evicted)
+
+        if not leader:
+            entry.event.wait()
+            if entry.error is not None:
+                raise entry.error
+            return dict(entry.result, deduplicated=True)
+
+        try:
+            entry.result = producer()
+        except Exception as e:
+            entry.error = e
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.event.set()
+
+        self._evict()
+        return dict(entry.result, deduplicated=False)
+
+    def stats(self):
+        """Estatísticas do store"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'in_flight': sum(1 for e in self._entries.values() if not e.event.is_set()),
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+            }
+
+    def _usable(self, entry):
+        """Entrada concluída que ainda pode ser servida (chamado com lock)"""
+        filepath = (entry.result or {}).get('filepath')
+        return (
+            filepath is not None
+            and time.time() - entry.created_at < self.max_age
+            and os.path.exists(filepath)
+        )
+
+    def _evict(self):
+        """Remover entradas antigas ou excedentes (LRU)"""
+        evicted = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.ready and not self._usable(entry):
+                    evicted.append(self._entries.pop(key))
+            while len(self._entries) > self.max_entries:
+                key, entry = next(iter(self._entries.items()))
+                if not entry.event.is_set():
+                    break
+                evicted.append(self._entries.pop(key))
+        self._notify_evicted(evicted)
+
+    def _notify_evicted(self, entries):
+        if not self.on_evict:
+            return
+        for entry in entries:
+            if entry.result:
+                try:
+                    self.on_evict(entry.result)
+                except Exception as e:
+                    print(f"[DownloadStore] Erro no callback de remoção: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_download_store():
+    """Retornar o DownloadStore compartilhado do processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DownloadStore()
+        return _store
@@ -0,0 +1,166 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import yt_dlp
+
+from config import Config
+from info_cache import normalize_url
+
+MODES = ('off', 'capture', 'replay')
+
+
+class FixtureNotFound(LookupError):
+    """Extração sem fixture gravada no modo replay"""
+
+
+class ExtractionFixtures:
+    """
+    Gravação e reprodução dos resultados de extract_info(download=False)
+
+    No modo 'capture' cada extração feita pelo app é gravada em JSON antes
+    do processamento (seleção de formato, filtros de playlist); no modo
+    'replay' o resultado gravado entra direto no process_ie_result do
+    YoutubeDL, sem rede. Assim a seleção de formato e o que vem depois rodam
+    de verdade sobre dados reais e fixos. Playlists são gravadas já
+    processadas (as entradas da extração são geradores paginados).
+    """
+
+    def __init__(self, mode=None, directory=None, key_params=None):
+        """
+        Args:
+            mode (str): 'off', 'capture' ou 'replay' (padrão: Config.EXTRACTION_FIXTURES_CONFIG)
+            directory (str): Diretório das fixtures
+            key_params (tuple): Opções do yt-dlp que entram na chave
+        """
+        config = Config.EXTRACTION_FIXTURES_CONFIG
+        self.mode = (mode or config['mode']).lower()
+        if self.mode not in MODES:
+            raise ValueError(f"Modo de fixtures inválido: {self.mode} (use {', '.join(MODES)})")
+        self.directory = directory or config['dir']
+        self.key_params = tuple(key_params or config['key_params'])
+
+        self._lock = threading.Lock()
+        self._loaded = {}
+        self.stats = {'replayed': 0, 'captured': 0, 'missing': 0}
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def key(self, url, params):
+        """
+        Chave da fixture: URL normalizada + opções que mudam o resultado
+
+        Returns:
+            tuple: (nome do arquivo, material da chave)
+        """
+        material = {'url': normalize_url(url)}
+        material.update({name: params.get(name) for name in self.key_params if params.get(name) is not None})
+        digest = hashlib.sha1(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        parts = urlsplit(material['url'])
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', parts.netloc + parts.path).strip('_')[:60]
+        return f'{slug}-{digest}.json', material
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def extract_info(self, ydl, url, extract_raw, process=True, extra_info=None):
+        """
+        extract_info(download=False) gravando ou reproduzindo a extração
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): Instância que processa o resultado
+            url (str): URL pedida
+            extract_raw (callable): Extração real sem processamento (process=False)
+            process (bool): Processar o resultado (como no extract_info)
+            extra_info (dict): Repassado ao process_ie_result
+
+        Returns:
+            dict: Info dict (processado por ydl se process)
+        """
+        filename, material = self.key(url, ydl.params)
+        if self.mode == 'replay':
+            raw = self.load(filename, url)
+            with self._lock:
+                self.stats['replayed'] += 1
+        else:
+            raw = extract_raw()
+            if raw is None:
+                return None
+            if raw.get('_type') in ('playlist', 'multi_video'):
+                if not process:
+                    return raw  # Entradas ainda paginadas: não dá para gravar
+                info = ydl.process_ie_result(raw, download=False, extra_info=extra_info)
+                self.save(filename, material, url, info, processed=True)
+                return info
+            self.save(filename, material, url, raw, processed=False)
+        return ydl.process_ie_result(raw, download=False, extra_info=extra_info) if process else raw
+
+    def load(self, filename, url=None):
+        """
+        Resultado gravado (cópia), lido do disco uma vez por processo
+
+        Raises:
+            FixtureNotFound: Se não houver fixture para a chave
+        """
+        with self._lock:
+            raw = self._loaded.get(filename)
+        if raw is None:
+            try:
+                with open(self.path(filename), encoding='utf-8') as f:
+                    raw = json.load(f)['info']
+            except (OSError, ValueError, KeyError):
+                with self._lock:
+                    self.stats['missing'] += 1
+                raise FixtureNotFound(f'Sem fixture de extração para {url or filename} ({filename} em {self.directory})')
+            with self._lock:
+                self._loaded[filename] = raw
+        return copy.deepcopy(raw)
+
+    def save(self, filename, material, url, info, processed):
+        """Gravar o resultado (sanitizado) de forma atômica"""
+        os.makedirs(self.directory, exist_ok=True)
+        data = {
+            'url': url,
+            'key': material,
+            'processed': processed,
+            'captured_at': datetime.now().isoformat(timespec='seconds'),
+            'yt_dlp_version': yt_dlp.version.__version__,
+            'info': yt_dlp.YoutubeDL.sanitize_info(info),
+        }
+        path = self.path(filename)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._loaded[filename] = data['info']
+            self.stats['captured'] += 1
+        print(f"[Fixtures] Extração gravada: {url} -> {filename}")
+
+
+_fixtures = None
+_fixtures_lock = threading.Lock()
+
+
+def get_extraction_fixtures():
+    """Retornar as ExtractionFixtures compartilhadas do processo"""
+    global _fixtures
+    with _fixtures_lock:
+        if _fixtures is None:
+            _fixtures = ExtractionFixtures()
+        return _fixtures
+
+
+def set_extraction_fixtures(fixtures):
+    """Trocar as fixtures do processo (benchmarks e testes); retorna as anteriores"""
+    global _fixtures
+    with _fixtures_lock:
+        previous, _fixtures = _fixtures, fixtures
+        return previous
@@ -0,0 +1,69 @@
+import re
+import threading
+
+import yt_dlp
+from yt_dlp.extractor import gen_extractor_classes
+
+from config import Config
+from extraction_fixtures import get_extraction_fixtures
+
+_classes = None
+_classes_lock = threading.Lock()
+
+
+def scope_platforms():
+    """Plataformas cujos extractors são registrados (SUPPORTED_PLATFORMS + as usadas pelo app)"""
+    config = Config.EXTRACTOR_SCOPE_CONFIG
+    return list(dict.fromkeys(list(Config.SUPPORTED_PLATFORMS) + list(config['extra_platforms'])))
+
+
+def scoped_extractor_classes():
+    """
+    Classes de extractor das plataformas do escopo, na ordem do yt-dlp
+
+    Calculado uma vez por processo (o GenericIE continua por último).
+
+    Returns:
+        list: Classes (lazy) de extractor
+    """
+    global _classes
+    with _classes_lock:
+        if _classes is None:
+            patterns = Config.EXTRACTOR_SCOPE_CONFIG['patterns']
+            regex = re.compile('|'.join(f'(?:{patterns[p]})' for p in scope_platforms() if p in patterns))
+            _classes = [ie for ie in gen_extractor_classes() if ie._ENABLED and regex.match(ie.ie_key())]
+        return _classes
+
+
+class ScopedYoutubeDL(yt_dlp.YoutubeDL):
+    """
+    YoutubeDL que registra só os extractors das plataformas suportadas
+
+    O casamento de URL percorre dezenas de extractors em vez de ~1800.
+    Extractors fora do escopo continuam acessíveis por ie_key (url_result
+    de um embed, por exemplo): o yt-dlp os carrega sob demanda. Com
+    EXTRACTOR_SCOPE=0 ou 'allowed_extractors' nas opções, vale o registro
+    completo do yt-dlp.
+
+    Também é o ponto único das fixtures de extração (ver
+    extraction_fixtures): com EXTRACTION_FIXTURES=capture/replay, o
+    extract_info(download=False) grava ou reproduz a extração.
+    """
+
+    def add_default_info_extractors(self):
+        if not Config.EXTRACTOR_SCOPE_CONFIG['enabled'] or self.params.get('allowed_extractors'):
+            return super().add_default_info_extractors()
+        classes = scoped_extractor_classes()
+        for ie in classes:
+            self.add_info_extractor(ie)
+        self.write_debug(f'Loaded {len(classes)} extractors (escopo: {", ".join(scope_platforms())})')
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True, force_generic_extractor=False):
+        fixtures = get_extraction_fixtures()
+        if not fixtures.enabled or download:
+            return super().extract_info(url, download, ie_key, extra_info, process, force_generic_extractor)
+        return fixtures.extract_info(
+            self, url,
+            lambda: super(ScopedYoutubeDL, self).extract_info(url, False, ie_key, None, False, force_generic_extractor),
+            process, extra_info,
+        )
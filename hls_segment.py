@@ -0,0 +1,446 @@
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+
+from yt_dlp.networking import Request
+from yt_dlp.utils import sanitize_filename
+
+from config import Config
+
+# Encoder usado para refazer os GOPs das bordas (mesmo codec do stream copiado)
+BOUNDARY_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+
+_ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class SegmentError(Exception):
+    """Recorte por fragmentos indisponível (sem HLS, criptografado, sem ffmpeg...)"""
+
+
+def _attributes(line):
+    """Atributos de uma tag HLS (KEY=VALUE,...)"""
+    return {key: value.strip('"') for key, value in _ATTRIBUTE_RE.findall(line.split(':', 1)[1])}
+
+
+def _byterange(value, previous_end):
+    """'<tamanho>[@<início>]' -> (início, fim) inclusivo"""
+    length, _, offset = value.partition('@')
+    start = int(offset) if offset else previous_end
+    return start, start + int(length) - 1
+
+
+def parse_media_playlist(text, base_url):
+    """
+    Ler uma media playlist HLS
+
+    Args:
+        text (str): Conteúdo do .m3u8
+        base_url (str): URL da playlist (para resolver URIs relativas)
+
+    Returns:
+        tuple: (fragmentos, init) — cada fragmento com url, start, duration e
+            byterange; init é o EXT-X-MAP (fMP4) ou None
+    """
+    if '#EXT-X-STREAM-INF' in text:
+        raise SegmentError('Master playlist: esperada a playlist de mídia do formato')
+
+    fragments = []
+    init = None
+    position = 0.0
+    duration = None
+    byterange = None
+    range_end = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXTINF:'):
+            duration = float(line[8:].split(',', 1)[0])
+        elif line.startswith('#EXT-X-BYTERANGE:'):
+            byterange = _byterange(line.split(':', 1)[1], range_end)
+        elif line.startswith('#EXT-X-KEY:'):
+            if _attributes(line).get('METHOD', 'NONE') != 'NONE':
+                raise SegmentError('Fragmentos criptografados')
+        elif line.startswith('#EXT-X-MAP:'):
+            attributes = _attributes(line)
+            init = {
+                'url': urljoin(base_url, attributes['URI']),
+                'byterange': _byterange(attributes['BYTERANGE'], 0) if 'BYTERANGE' in attributes else None,
+            }
+        elif not line.startswith('#'):
+            if duration is None:
+                raise SegmentError(f'Fragmento sem #EXTINF: {line}')
+            fragments.append({
+                'index': len(fragments),
+                'url': urljoin(base_url, line),
+                'start': position,
+                'duration': duration,
+                'byterange': byterange,
+            })
+            position += duration
+            if byterange:
+                range_end = byterange[1] + 1
+            duration = byterange = None
+    if not fragments:
+        raise SegmentError('Playlist sem fragmentos')
+    return fragments, init
+
+
+def select_fragments(fragments, start, end):
+    """Fragmentos que cobrem [start, end) (segundos)"""
+    return [f for f in fragments if f['start'] < end and f['start'] + f['duration'] > start]
+
+
+def select_hls_format(ydl, info):
+    """
+    Selecionar o formato do download e verificar se é HLS recortável
+
+    Args:
+        ydl (yt_dlp.YoutubeDL): Instância com as opções do download
+        info (dict): Info dict (de extract_info sem download ou do cache)
+
+    Returns:
+        dict: Info dict com o formato selecionado (url = media playlist)
+    """
+    processed = ydl.process_ie_result(info, download=False)
+    if not processed or processed.get('_type', 'video') != 'video':
+        raise SegmentError('Resultado não é um vídeo único')
+    if processed.get('requested_formats'):
+        raise SegmentError('Formato com áudio e vídeo separados')
+    if not str(processed.get('protocol', '')).startswith('m3u8') or not processed.get('url'):
+        raise SegmentError(f"Formato não é HLS ({processed.get('protocol')})")
+    return processed
+
+
+class SegmentExtractor:
+    """
+    Recorte de VODs HLS baixando só os fragmentos do intervalo
+
+    Os fragmentos que cobrem o intervalo são baixados em paralelo,
+    concatenados e copiados (sem reencode) a partir do keyframe anterior ao
+    início. Com frame_accurate, só os GOPs das bordas são reencodados.
+    Vários recortes do mesmo VOD (extract_clips) resolvem a playlist e
+    baixam cada fragmento uma vez só.
+    """
+
+    def __init__(self, ydl, workers=None, fragment_retries=None, clip_workers=None):
+        """
+        Args:
+            ydl (RateLimitedYoutubeDL): Instância usada nas requisições (headers, proxy, rate limit)
+            workers (int): Fragmentos baixados em paralelo
+            fragment_retries (int): Tentativas por fragmento
+            clip_workers (int): Recortes gerados em paralelo (processos ffmpeg)
+        """
+        config = Config.SEGMENT_CONFIG
+        self.ydl = ydl
+        self.workers = max(1, int(workers or config['workers']))
+        self.fragment_retries = fragment_retries if fragment_retries is not None else config['fragment_retries']
+        self.clip_workers = max(1, int(clip_workers or config['clip_workers']))
+
+    def extract(self, info, start, end, frame_accurate=False, progress_hook=None):
+        """
+        Baixar o trecho [start, end] do VOD
+
+        Args:
+            info (dict): Info dict do VOD
+            start (float): Início em segundos
+            end (float): Fim em segundos
+            frame_accurate (bool): Reencodar os GOPs das bordas para cortar no frame exato
+            progress_hook (callable): Hook no formato do yt-dlp
+
+        Returns:
+            dict: Relatório (arquivo, intervalo real, fragmentos, bytes baixados e economizados)
+        """
+        report = self.extract_clips(info, [(start, end)], frame_accurate, progress_hook)
+        clip = report['clips'][0]
+        if clip['status'] != 'completed':
+            raise SegmentError(clip['error'])
+        totals = ('fragments', 'fragments_total', 'bytes_downloaded', 'bytes_full_estimate', 'bytes_saved', 'elapsed')
+        return dict(clip, **{key: report[key] for key in totals})
+
+    def extract_clips(self, info, clips, frame_accurate=False, progress_hook=None):
+        """
+        Gerar vários recortes do mesmo VOD de uma vez
+
+        A playlist é lida uma vez, a união dos fragmentos é baixada uma vez
+        e os recortes saem em paralelo desse cache local. A falha de um
+        recorte não interrompe os outros: recortes inválidos (início >= fim,
+        negativos) ou fora do VOD ficam como 'failed' no relatório, sem
+        baixar nada para eles.
+
+        Args:
+            info (dict): Info dict do VOD
+            clips (list): (início, fim[, nome]) em segundos ou dicts com start/end/name
+            frame_accurate (bool): Reencodar os GOPs das bordas para cortar no frame exato
+            progress_hook (callable): Hook no formato do yt-dlp; cada recorte pronto
+                gera um 'finished' com 'segment_report'
+
+        Returns:
+            dict: Relatório com o estado de cada recorte e os bytes baixados,
+                economizados e compartilhados entre recortes
+        """
+        if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+            raise SegmentError('ffmpeg/ffprobe não encontrados')
+        clips = [self._clip(position, clip) for position, clip in enumerate(clips, 1)]
+        if not clips:
+            raise SegmentError('Nenhum recorte informado')
+
+        started = time.time()
+        fmt = select_hls_format(self.ydl, info)
+        headers = fmt.get('http_headers') or {}
+        fragments, init = parse_media_playlist(self._fetch(fmt['url'], headers).decode('utf-8', 'replace'), fmt['url'])
+        total_duration = fragments[-1]['start'] + fragments[-1]['duration']
+        for clip in clips:
+            if clip['error']:
+                continue
+            clip['fragments'] = select_fragments(fragments, clip['start'], clip['end'])
+            if not clip['fragments']:
+                clip['error'] = f"Recorte {clip['position']} fora do VOD ({total_duration:.0f}s)"
+        valid = [clip for clip in clips if not clip['error']]
+        needed = [fragments[i] for i in sorted({f['index'] for clip in valid for f in clip['fragments']})]
+
+        base = os.path.splitext(self.ydl.prepare_filename(fmt))[0]
+        directory = os.path.dirname(base) or '.'
+        os.makedirs(directory, exist_ok=True)
+        self._assign_filenames(valid, base, directory)
+
+        reports = {}
+        for clip in clips:
+            if clip['error']:
+                print(f"[Segment] {clip['error']}")
+                reports[clip['position']] = {'name': clip['name'], 'filename': '', 'requested': [clip['start'], clip['end']],
+                                             'fragments': 0, 'bytes': 0, 'status': 'failed', 'error': clip['error']}
+        sizes = {}
+        if valid:
+            workdir = tempfile.mkdtemp(prefix='.segment-', dir=directory)
+            try:
+                sizes = self._download(needed, init, headers, workdir, valid[0]['filename'], progress_hook)
+                with ThreadPoolExecutor(max_workers=min(self.clip_workers, len(valid)), thread_name_prefix='clip') as executor:
+                    for clip, clip_report in zip(valid, executor.map(
+                        lambda clip: self._emit(clip, workdir, bool(init), sizes, total_duration, frame_accurate, progress_hook),
+                        valid,
+                    )):
+                        reports[clip['position']] = clip_report
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        reports = [reports[position] for position in sorted(reports)]
+
+        downloaded = sum(sizes.values())
+        needed_duration = sum(f['duration'] for f in needed)
+        if all(f['byterange'] for f in fragments):
+            full_size = sum(f['byterange'][1] - f['byterange'][0] + 1 for f in fragments)
+        else:
+            # Sem tamanhos na playlist: estimativa pela taxa média do trecho baixado
+            full_size = int(downloaded * total_duration / needed_duration) if needed_duration else downloaded
+        report = {
+            'clips': reports,
+            'completed': sum(1 for clip in reports if clip['status'] == 'completed'),
+            'failed': sum(1 for clip in reports if clip['status'] != 'completed'),
+            'fragments': len(needed),
+            'fragments_total': len(fragments),
+            'bytes_downloaded': downloaded,
+            'bytes_full_estimate': full_size,
+            'bytes_saved': max(0, full_size - downloaded),
+            # Bytes que recortes sobrepostos teriam baixado de novo, cada um por conta própria
+            'bytes_shared': sum(clip['bytes'] for clip in reports) - downloaded,
+            'elapsed': round(time.time() - started, 3),
+        }
+        print(f"[Segment] {len(clips)} recorte(s), {len(needed)}/{len(fragments)} fragmentos, "
+              f"{downloaded / 1e6:.1f} MB baixados, ~{report['bytes_saved'] / 1e6:.1f} MB economizados "
+              f"em {report['elapsed']:.1f}s")
+        return report
+
+    @staticmethod
+    def _clip(position, clip):
+        """Normalizar um recorte da entrada ('error' preenchido se inválido)"""
+        if isinstance(clip, dict):
+            start, end, name = clip.get('start'), clip.get('end'), clip.get('name')
+        else:
+            start, end, name = (list(clip) + [None])[:3]
+        error = None
+        try:
+            start, end = float(start), float(end)
+        except (TypeError, ValueError):
+            error = f'Recorte {position}: início/fim inválidos'
+        else:
+            if not (math.isfinite(start) and math.isfinite(end)) or start < 0 or start >= end:
+                error = f'Recorte {position}: início deve ser maior ou igual a 0 e menor que o fim'
+        # Inválido: vira 'failed' no relatório sem interromper os outros recortes
+        return {'position': position, 'start': start, 'end': end, 'name': name, 'error': error}
+
+    @staticmethod
+    def _assign_filenames(clips, base, directory):
+        """Nome de cada recorte (nome informado ou título + intervalo), sem repetições"""
+        used = set()
+        for clip in clips:
+            if clip['name']:
+                stem = os.path.join(directory, sanitize_filename(os.path.splitext(str(clip['name']))[0]))
+            elif len(clips) == 1:
+                stem = base
+            else:
+                stem = f"{base} [{clip['start']:.0f}-{clip['end']:.0f}]"
+            filename, counter = stem + '.mp4', 2
+            while filename in used:
+                filename = f'{stem} ({counter}).mp4'
+                counter += 1
+            used.add(filename)
+            clip['filename'] = filename
+
+    def _fetch(self, url, headers, byterange=None):
+        """Conteúdo de uma URL (com tentativas)"""
+        if byterange:
+            headers = dict(headers, Range=f'bytes={byterange[0]}-{byterange[1]}')
+        for attempt in range(self.fragment_retries + 1):
+            try:
+                with self.ydl.media_requests(), self.ydl.urlopen(Request(url, headers=headers)) as response:
+                    return response.read()
+            except Exception as e:
+                if attempt == self.fragment_retries:
+                    raise
+                print(f"[Segment] Falha em {url} ({e}), tentativa {attempt + 2}/{self.fragment_retries + 1}")
+                time.sleep(0.5 * 2 ** attempt)
+
+    @staticmethod
+    def _fragment_path(workdir, key):
+        return os.path.join(workdir, f'{key}.frag')
+
+    def _download(self, fragments, init, headers, workdir, filename, progress_hook):
+        """Baixar os fragmentos em paralelo para o cache local; retorna {índice|'init': bytes}"""
+        def fetch(key, url, byterange):
+            data = self._fetch(url, headers, byterange)
+            with open(self._fragment_path(workdir, key), 'wb') as f:
+                f.write(data)
+            return len(data)
+
+        sizes = {}
+        if init:
+            sizes['init'] = fetch('init', init['url'], init['byterange'])
+        downloaded = sizes.get('init', 0)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(fragments)), thread_name_prefix='segment') as executor:
+            futures = {executor.submit(fetch, f['index'], f['url'], f['byterange']): f['index'] for f in fragments}
+            for done, future in enumerate(as_completed(futures), 1):
+                sizes[futures[future]] = future.result()
+                downloaded += sizes[futures[future]]
+                if progress_hook:
+                    progress_hook({
+                        'status': 'downloading',
+                        'filename': filename,
+                        'downloaded_bytes': downloaded,
+                        'total_bytes_estimate': int(downloaded * len(fragments) / done),
+                        'fragment_index': done,
+                        'fragment_count': len(fragments),
+                    })
+        return sizes
+
+    def _emit(self, clip, workdir, has_init, sizes, total_duration, frame_accurate, progress_hook):
+        """Montar e cortar um recorte a partir do cache de fragmentos (thread do pool)"""
+        fragments = clip['fragments']
+        keys = (['init'] if has_init else []) + [f['index'] for f in fragments]
+        clipdir = os.path.join(workdir, f"clip{clip['position']}")
+        os.mkdir(clipdir)
+        offset = fragments[0]['start']
+        report = {
+            'name': clip['name'],
+            'filename': clip['filename'],
+            'requested': [clip['start'], clip['end']],
+            'fragments': len(fragments),
+            'bytes': sum(sizes[key] for key in keys),
+        }
+        try:
+            source = os.path.join(clipdir, 'source' + ('.mp4' if has_init else '.ts'))
+            with open(source, 'wb') as out:
+                for key in keys:
+                    with open(self._fragment_path(workdir, key), 'rb') as f:
+                        shutil.copyfileobj(f, out)
+            rel_start, rel_end = clip['start'] - offset, min(clip['end'], total_duration) - offset
+            cut_start, accurate = self._cut(source, clip['filename'], clipdir, rel_start, rel_end, frame_accurate)
+            report.update(
+                status='completed',
+                actual=[round(offset + cut_start, 3), round(offset + rel_end, 3)],
+                frame_accurate=accurate,
+            )
+        except Exception as e:
+            print(f"[Segment] Falha no recorte {clip['position']} ({clip['filename']}): {e}")
+            report.update(status='failed', error=str(e))
+        finally:
+            shutil.rmtree(clipdir, ignore_errors=True)
+
+        if progress_hook and report['status'] == 'completed':
+            progress_hook({'status': 'finished', 'filename': clip['filename'], 'downloaded_bytes': report['bytes'],
+                           'total_bytes': report['bytes'], 'segment_report': report})
+        return report
+
+    def _cut(self, source, filename, workdir, rel_start, rel_end, frame_accurate):
+        """Cortar [rel_start, rel_end] do arquivo; retorna (início real, se foi exato)"""
+        probe = self._probe(source)
+        keyframes = probe['keyframes']
+        cut_start = max([k for k in keyframes if k <= rel_start + 1e-3] or [0.0])
+
+        accurate = frame_accurate and abs(cut_start - rel_start) > 1e-3
+        if accurate and probe['codec'] not in BOUNDARY_ENCODERS:
+            print(f"[Segment] Codec {probe['codec']} sem encoder de borda: corte no keyframe")
+            accurate = False
+        if accurate:
+            self._smart_cut(source, filename, workdir, rel_start, rel_end, keyframes, probe)
+            return rel_start, True
+        self._ffmpeg('-ss', f'{cut_start:.3f}', '-i', source, '-t', f'{rel_end - cut_start:.3f}',
+                     '-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero',
+                     '-movflags', '+faststart', filename)
+        # Início já num keyframe: corte exato mesmo sem reencode
+        return cut_start, abs(cut_start - rel_start) <= 1e-3
+
+    def _probe(self, source):
+        """Codec, pix_fmt e keyframes (segundos desde o início do arquivo) do vídeo"""
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'stream=codec_name,pix_fmt:packet=pts_time,flags:format=start_time',
+             '-of', 'json', source],
+            capture_output=True, text=True, check=True,
+        )
+        data = json.loads(result.stdout)
+        base = float((data.get('format') or {}).get('start_time') or 0)
+        stream = (data.get('streams') or [{}])[0]
+        keyframes = sorted(
+            float(p['pts_time']) - base for p in data.get('packets') or []
+            if 'K' in p.get('flags', '') and p.get('pts_time') not in (None, 'N/A')
+        )
+        return {'codec': stream.get('codec_name'), 'pix_fmt': stream.get('pix_fmt'), 'keyframes': keyframes}
+
+    def _smart_cut(self, source, filename, workdir, rel_start, rel_end, keyframes, probe):
+        """Reencodar só as bordas: [início, 1º keyframe) e [último keyframe, fim); o meio é copiado"""
+        head_end = min([k for k in keyframes if k > rel_start] or [rel_end])
+        tail_start = max([k for k in keyframes if head_end < k < rel_end] or [rel_end])
+        encode = ['-c:v', BOUNDARY_ENCODERS[probe['codec']], '-pix_fmt', probe['pix_fmt'] or 'yuv420p',
+                  '-preset', 'veryfast', '-crf', '18', '-c:a', 'copy']
+
+        pieces = []
+        for name, piece_start, piece_end, codec in (
+            ('head', rel_start, head_end, encode),
+            ('body', head_end, tail_start, ['-c', 'copy']),
+            ('tail', tail_start, rel_end, encode),
+        ):
+            if piece_end - piece_start <= 1e-3:
+                continue
+            piece = os.path.join(workdir, f'{name}.ts')
+            self._ffmpeg('-ss', f'{piece_start:.3f}', '-i', source, '-t', f'{piece_end - piece_start:.3f}',
+                         '-map', '0', *codec, '-f', 'mpegts', piece)
+            pieces.append(piece)
+
+        listing = os.path.join(workdir, 'pieces.txt')
+        with open(listing, 'w', encoding='utf-8') as f:
+            f.writelines(f"file '{os.path.basename(piece)}'\n" for piece in pieces)
+        self._ffmpeg('-f', 'concat', '-safe', '0', '-i', listing, '-map', '0', '-c', 'copy',
+                     '-movflags', '+faststart', filename)
+
+    @staticmethod
+    def _ffmpeg(*args):
+        result = subprocess.run(['ffmpeg', '-y', '-v', 'error', *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise SegmentError(f'ffmpeg falhou: {result.stderr.strip()[-300:]}')
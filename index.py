@@ -1,15 +1,26 @@
-from flask import Flask, jsonify, request, send_file, render_template
+from flask import Flask, Response, jsonify, request, render_template
 import os
-import tempfile
 import uuid
-import yt_dlp
 from datetime import datetime
-import threading
+
+from config import Config
+from download_engine import get_download_engine
+from job_store import get_job_store
+from progress_events import get_progress_broker, progress_hook
+from lazy_imports import LazyObject, lazy_import
+from storage_manager import configure_file_serving, get_storage_manager, send_managed_file
+
+# yt-dlp só é importado no primeiro download (cold start sem ele)
+get_ydl_pool = lazy_import('ydl_pool', 'get_ydl_pool')
 
 app = Flask(__name__)
+configure_file_serving(app)
 
-# Cache para downloads
-downloads_cache = {}
+# Registro persistente de downloads (SQLite, compartilhado entre workers)
+job_store = get_job_store()
+storage = get_storage_manager()
+progress_broker = get_progress_broker()
+ydl_pool = LazyObject(get_ydl_pool, 'YDLPool')
 
 @app.route('/')
 def index():
@@ -39,62 +50,30 @@ def api_info():
 
 def download_video_yt_dlp(url, platform, download_id):
     """Download usando yt-dlp para todas as plataformas"""
+    temp_dir = None
+    completed = False
     try:
         print(f"🚀 Iniciando download {platform}: {url}")
         
-        # Configurações base do yt-dlp
-        temp_dir = tempfile.mkdtemp()
-        
-        ydl_opts = {
-            'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
-            'format': 'best[height<=720]',
-            'noplaylist': True,
-            'extractaudio': False,
-            'audioformat': 'mp3',
-            'embed_subs': False,
-            'writesubtitles': False,
-            'writeautomaticsub': False,
-        }
-        
-        # Configurações específicas por plataforma
-        if platform.lower() == 'instagram':
-            ydl_opts.update({
-                'format': 'best',
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            })
-        elif platform.lower() == 'facebook':
-            ydl_opts.update({
-                'format': 'best',
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            })
-        elif platform.lower() == 'tiktok':
-            ydl_opts.update({
-                'format': 'best',
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            })
-        elif platform.lower() in ['x/twitter', 'twitter', 'x']:
-            ydl_opts.update({
-                'format': 'best',
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            })
+        # Configurações base do yt-dlp (diretório protegido pelo StorageManager até o fim)
+        temp_dir = storage.create_dir()
         
         # Atualizar status
-        downloads_cache[download_id].update({
-            'status': 'downloading',
-            'progress': 50,
-            'message': f'Baixando {platform}...'
-        })
+        job_store.update(
+            download_id,
+            status='downloading',
+            progress=50,
+            message=f'Baixando {platform}...'
+        )
         
-        # Download com yt-dlp
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        # Download com yt-dlp (instância aquecida do pool, perfil da plataforma até 720p:
+        # limite de tamanho das respostas no Vercel)
+        with ydl_pool.lease(
+            platform,
+            Config.STREAM_DELIVERY_CONFIG['quality'],
+            outtmpl=os.path.join(temp_dir, '%(title)s.%(ext)s'),
+            progress_hooks=[progress_hook(download_id)],
+        ) as ydl:
             info = ydl.extract_info(url, download=True)
             
             # Encontrar arquivo baixado
@@ -103,31 +82,40 @@ def download_video_yt_dlp(url, platform, download_id):
                     file_path = os.path.join(temp_dir, file)
                     
                     # Atualizar cache com sucesso
-                    downloads_cache[download_id].update({
-                        'status': 'completed',
-                        'progress': 100,
-                        'message': f'Download {platform} concluído!',
-                        'file_path': file_path,
-                        'filename': file,
-                        'title': info.get('title', 'Video'),
-                        'duration': info.get('duration', 0)
-                    })
+                    job_store.update(
+                        download_id,
+                        status='completed',
+                        progress=100,
+                        message=f'Download {platform} concluído!',
+                        file_path=file_path,
+                        filename=file,
+                        title=info.get('title', 'Video'),
+                        duration=info.get('duration', 0)
+                    )
                     
                     print(f"✅ Download {platform} concluído: {file}")
+                    completed = True
                     return
         
         # Se chegou aqui, não encontrou arquivo
-        downloads_cache[download_id].update({
-            'status': 'error',
-            'message': f'Erro: arquivo não encontrado após download {platform}'
-        })
+        job_store.update(
+            download_id,
+            status='error',
+            message=f'Erro: arquivo não encontrado após download {platform}'
+        )
         
     except Exception as e:
         print(f"❌ Erro no download {platform}: {str(e)}")
-        downloads_cache[download_id].update({
-            'status': 'error',
-            'message': f'Erro no download {platform}: {str(e)}'
-        })
+        job_store.update(
+            download_id,
+            status='error',
+            message=f'Erro no download {platform}: {str(e)}'
+        )
+    finally:
+        if temp_dir is not None:
+            storage.release(temp_dir)
+            if not completed:
+                storage.remove(temp_dir)
 
 @app.route('/download', methods=['POST'])
 def download():
@@ -143,27 +131,29 @@ def download():
         # Gerar ID único para o download
         download_id = str(uuid.uuid4())
         
-        # Inicializar cache
-        downloads_cache[download_id] = {
-            'status': 'started',
+        # Registrar download (visível para todos os workers)
+        job_store.put(download_id, {
+            'status': 'queued',
             'progress': 0,
-            'message': f'Iniciando download {platform}...',
+            'message': f'Download {platform} na fila...',
             'url': url,
             'platform': platform
-        }
+        })
         
-        # Iniciar download em thread separada
-        thread = threading.Thread(
-            target=download_video_yt_dlp,
-            args=(url, platform, download_id)
+        # Enfileirar download no pool de workers compartilhado
+        engine = get_download_engine()
+        engine.submit(
+            download_video_yt_dlp, url, platform, download_id,
+            job_id=download_id,
+            metadata={'url': url, 'platform': platform}
         )
-        thread.start()
         
         return jsonify({
             'success': True,
             'download_id': download_id,
             'platform': platform,
-            'message': f'Download {platform} iniciado'
+            'queue_position': engine.queue_position(download_id),
+            'message': f'Download {platform} adicionado à fila'
         })
         
     except Exception as e:
@@ -173,29 +163,43 @@ def download():
 @app.route('/status/<download_id>')
 def download_status(download_id):
     """Status do download"""
-    if download_id not in downloads_cache:
+    status = job_store.get(download_id)
+    if status is None:
         return jsonify({'status': 'not_found'}), 404
     
-    return jsonify(downloads_cache[download_id])
+    if status.get('status') == 'queued':
+        status['queue_position'] = get_download_engine().queue_position(download_id)
+    return jsonify(status)
+
+@app.route('/events/<download_id>')
+def download_events(download_id):
+    """Progresso do download via Server-Sent Events"""
+    def snapshot():
+        return job_store.get(download_id) or {'status': 'not_found'}
+    
+    return Response(
+        progress_broker.stream(download_id, snapshot),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/file/<download_id>')
 def download_file(download_id):
     """Download do arquivo"""
-    if download_id not in downloads_cache:
+    download_info = job_store.get(download_id)
+    if download_info is None:
         return jsonify({'error': 'Download não encontrado'}), 404
     
-    download_info = downloads_cache[download_id]
-    
     if download_info.get('status') != 'completed':
         return jsonify({'error': 'Download não concluído'}), 400
     
     file_path = download_info.get('file_path')
     filename = download_info.get('filename', 'video.mp4')
     
-    if not file_path or not os.path.exists(file_path):
+    response = send_managed_file(file_path, filename) if file_path else None
+    if response is None:
         return jsonify({'error': 'Arquivo não encontrado'}), 404
-    
-    return send_file(file_path, as_attachment=True, download_name=filename)
+    return response
 
 @app.route('/privacy-policy')
 def privacy_policy():
@@ -0,0 +1,263 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import yt_dlp
+
+from config import Config
+
+# Parâmetros de rastreamento que não mudam o conteúdo da URL
+TRACKING_PARAMS = {
+    'si', 'feature', 'igshid', 'igsh', 'fbclid', 'gclid', 'is_from_webapp',
+    'sender_device', 'sender_web_id', 'share_app_id', 'share_link_id',
+    'ref', 'ref_src', 'ref_url', 's', 't_source', 'mibextid', 'rdid',
+}
+
+
+def normalize_url(url):
+    """
+    Normalizar URL para uso como chave de cache
+
+    Remove prefixos www./m., parâmetros de rastreamento (utm_*, igshid, ...),
+    fragmento e barra final.
+
+    Args:
+        url (str): URL original
+
+    Returns:
+        str: URL normalizada
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ('www.', 'm.', 'mobile.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ]
+    query.sort()
+
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(((parts.scheme or 'https').lower(), host, path, urlencode(query), ''))
+
+
+class InfoCache:
+    """Cache de resultados de extract_info(download=False) com TTL e LRU"""
+
+    def __init__(self, max_entries=None, ttls=None, default_ttl=None, persist_dir=None):
+        """
+        Inicializar o cache
+
+        Args:
+            max_entries (int): Quantidade máxima de entradas em memória (LRU)
+            ttls (dict): TTL em segundos por plataforma
+            default_ttl (int): TTL para plataformas sem configuração
+            persist_dir (str): Diretório para persistência em disco (opcional)
+        """
+        config = Config.INFO_CACHE_CONFIG
+        self.max_entries = max_entries or config['max_entries']
+        self.ttls = {k.lower(): v for k, v in (ttls or config['ttl']).items()}
+        self.default_ttl = default_ttl or config['default_ttl']
+        self.persist_dir = persist_dir if persist_dir is not None else config['persist_dir']
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.persist_dir:
+            os.makedirs(self.persist_dir, exist_ok=True)
+
+    def make_key(self, url, platform):
+        """Chave do cache: plataforma + URL normalizada"""
+        return f"{(platform or 'unknown').lower()}:{normalize_url(url)}"
+
+    def ttl_for(self, platform):
+        """TTL em segundos para a plataforma"""
+        return self.ttls.get((platform or '').lower(), self.default_ttl)
+
+    def get(self, url, platform):
+        """
+        Obter info em cache
+
+        Returns:
+            dict: Cópia do info dict, ou None se ausente/expirado
+        """
+        key = self.make_key(url, platform)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                del self._entries[key]
+
+        entry = self._load_from_disk(key, now)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._store(key, entry)
+            self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def put(self, url, platform, info):
+        """Armazenar info dict (sanitizado) no cache"""
+        if not info:
+            return
+        key = self.make_key(url, platform)
+        entry = (time.time() + self.ttl_for(platform), yt_dlp.YoutubeDL.sanitize_info(info))
+        with self._lock:
+            self._store(key, entry)
+        self._save_to_disk(key, entry)
+
+    def get_or_extract(self, url, platform, extract):
+        """
+        Obter info do cache ou extrair uma única vez
+
+        Chamadas concorrentes para a mesma chave aguardam a extração em andamento.
+
+        Args:
+            url (str): URL do vídeo
+            platform (str): Nome da plataforma
+            extract (callable): Função sem argumentos que retorna o info dict
+
+        Returns:
+            dict: Info dict (cópia)
+        """
+        info = self.get(url, platform)
+        if info is not None:
+            return info
+
+        key = self.make_key(url, platform)
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            info = self.get(url, platform)
+            if info is not None:
+                return info
+            return extract()
+
+        try:
+            info = extract()
+            self.put(url, platform, info)
+            return info
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def invalidate(self, url, platform):
+        """Remover uma entrada do cache"""
+        key = self.make_key(url, platform)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.persist_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Estatísticas do cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persist_dir': self.persist_dir,
+            }
+
+    def _store(self, key, entry):
+        """Inserir entrada aplicando LRU (chamado com lock)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.persist_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _save_to_disk(self, key, entry):
+        if not self.persist_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'expires_at': entry[0], 'info': entry[1]}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[InfoCache] Erro ao salvar cache em disco: {e}")
+
+    def _load_from_disk(self, key, now):
+        if not self.persist_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != key or data.get('expires_at', 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return (data['expires_at'], data['info'])
+
+
+def download_with_cached_info(ydl, url, platform):
+    """
+    Baixar reaproveitando o info dict em cache
+
+    Se houver info em cache, usa ydl.process_ie_result() e evita uma nova
+    extração; caso contrário, extrai normalmente com download.
+
+    Args:
+        ydl (yt_dlp.YoutubeDL): Instância configurada do yt-dlp
+        url (str): URL do vídeo
+        platform (str): Nome da plataforma
+
+    Returns:
+        dict: Info dict resultante do download
+    """
+    info = get_info_cache().get(url, platform)
+    if info is not None:
+        print(f"[InfoCache] Reutilizando info em cache para {platform}: {url}")
+        return ydl.process_ie_result(info, download=True)
+    return ydl.extract_info(url, download=True)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_info_cache():
+    """Retornar o InfoCache compartilhado do processo"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = InfoCache()
+        return _cache
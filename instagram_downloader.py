@@ -1,9 +1,12 @@
 import os
 import re
-import yt_dlp
 from pathlib import Path
 import json
 
+from batch_download import download_batch, legacy_results
+from info_cache import download_with_cached_info, get_info_cache
+from ydl_pool import get_ydl_pool
+
 
 class InstagramDownloader:
     """Downloader para Instagram - Posts, Reels e Stories"""
@@ -23,14 +26,11 @@ class InstagramDownloader:
             dict: Informações do conteúdo
         """
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
+            def extract():
+                with get_ydl_pool().lease(self.platform, quiet=True, no_warnings=True) as ydl:
+                    return ydl.extract_info(url, download=False)
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+            info = get_info_cache().get_or_extract(url, self.platform, extract)
                 
             # Função para obter a melhor thumbnail
             def get_best_thumbnail(info_dict):
@@ -114,27 +114,15 @@ class InstagramDownloader:
             # Configurar nome do arquivo de saída
             output_template = os.path.join(output_path, '%(uploader)s_%(title)s.%(ext)s')
             
-            # Configurações do yt-dlp para Instagram - FORMATO ORIGINAL
-            ydl_opts = {
-                'format': 'best',  # Sempre o melhor formato disponível
-                'outtmpl': output_template,
-                'writeinfojson': False,
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-                'ignoreerrors': False,
-                'no_warnings': False,
-                'embed_subs': False,
-            }
-            
-            # Adicionar hook de progresso se fornecido
-            if progress_hook:
-                ydl_opts['progress_hooks'] = [progress_hook]
-            
-            # Executar download
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Executar download (instância do pool com o perfil da plataforma)
+            with get_ydl_pool().lease(
+                self.platform,
+                outtmpl=output_template,
+                progress_hooks=[progress_hook] if progress_hook else [],
+            ) as ydl:
                 print(f"Iniciando download do Instagram: {url}")
                 print("Formato: Melhor qualidade disponível (original)")
-                ydl.download([url])
+                download_with_cached_info(ydl, url, self.platform)
                 
             print("Download do Instagram concluído com sucesso!")
             return True
@@ -147,31 +135,26 @@ class InstagramDownloader:
         """
         Baixar múltiplos posts do Instagram no formato original
         
+        As URLs são deduplicadas e baixadas em paralelo (limite por plataforma
+        em Config.BATCH_CONFIG).
+        
         Args:
             urls (list): Lista de URLs do Instagram
             output_path (str): Caminho para salvar
             progress_hook (callable): Função de callback para progresso
             
         Returns:
-            dict: Resultados do download (sucessos e falhas)
+            dict: Resultados do download (sucessos, falhas e manifesto do batch)
         """
-        results = {'success': [], 'failed': []}
-        
-        for i, url in enumerate(urls, 1):
-            try:
-                print(f"Baixando post {i}/{len(urls)}: {url}")
-                success = self.download_post(url, output_path, progress_hook)
-                
-                if success:
-                    results['success'].append(url)
-                else:
-                    results['failed'].append(url)
-                    
-            except Exception as e:
-                print(f"Erro ao baixar {url}: {e}")
-                results['failed'].append(url)
+        def download(url, platform, quality, format_type):
+            return self.download_post(url, output_path, progress_hook)
         
-        return results
+        print(f"Baixando {len(urls)} URLs do Instagram em paralelo")
+        manifest = download_batch(
+            urls, download, platform=self.platform,
+            on_result=lambda entry: print(f"[Batch] {entry['status']}: {entry['url']}")
+        )
+        return legacy_results(manifest)
     
     def validate_url(self, url):
         """
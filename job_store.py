@@ -0,0 +1,217 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+"""
+
+
+class JobStore:
+    """Registro persistente de downloads em SQLite (WAL), compartilhado entre processos"""
+
+    def __init__(self, db_path=None, max_age=None, sweep_interval=None, progress_flush_interval=None):
+        """
+        Inicializar o store
+
+        Args:
+            db_path (str): Caminho do banco SQLite
+            max_age (int): Segundos sem atualização até um registro expirar
+            sweep_interval (int): Intervalo mínimo entre varreduras de expiração
+            progress_flush_interval (float): Janela de agrupamento das escritas de progresso
+        """
+        config = Config.JOB_STORE_CONFIG
+        self.db_path = db_path or config['db_path']
+        self.max_age = max_age or config['max_age']
+        self.sweep_interval = sweep_interval or config['sweep_interval']
+        self.progress_flush_interval = progress_flush_interval or config['progress_flush_interval']
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending_progress = {}
+        self._flush_timer = None
+        self._last_sweep = 0.0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        """Conexão SQLite da thread atual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, job_id, default=None):
+        """
+        Obter registro de um download
+
+        Returns:
+            dict: Dados do download (com 'status'), ou default se não existir
+        """
+        self._flush_progress(job_id)
+        row = self._conn().execute("SELECT status, data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return default
+        data = json.loads(row[1])
+        data['status'] = row[0]
+        return data
+
+    def __contains__(self, job_id):
+        return self._conn().execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    def put(self, job_id, data):
+        """Criar ou substituir o registro de um download"""
+        now = time.time()
+        data = dict(data)
+        status = data.pop('status', None) or 'unknown'
+        with self._lock:
+            self._pending_progress.pop(job_id, None)
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at, data = excluded.data",
+            (job_id, status, now, now, json.dumps(data, default=str)),
+        )
+        self._maybe_sweep(now)
+
+    def update(self, job_id, **fields):
+        """
+        Mesclar campos no registro existente
+
+        Returns:
+            bool: False se o download não existe
+        """
+        self._flush_progress(job_id)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = self._merge(conn, job_id, fields, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return updated
+
+    def update_progress(self, job_id, progress):
+        """
+        Registrar progresso com escrita agrupada
+
+        Atualizações recebidas dentro de progress_flush_interval são gravadas
+        juntas, mantendo apenas a mais recente de cada download.
+        """
+        with self._lock:
+            self._pending_progress[job_id] = progress
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.progress_flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Gravar todo o progresso pendente em uma única transação"""
+        with self._lock:
+            pending, self._pending_progress = self._pending_progress, {}
+            self._flush_timer = None
+        self._write_progress(pending)
+
+    def sweep(self, now=None):
+        """
+        Remover registros sem atualização há mais de max_age e compactar o WAL
+
+        Returns:
+            int: Quantidade de registros removidos
+        """
+        now = now or time.time()
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.max_age,)).rowcount
+        if removed:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            print(f"[JobStore] {removed} registros expirados removidos")
+        return removed
+
+    def stats(self):
+        """Quantidade de registros por status"""
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {
+            'db_path': self.db_path,
+            'jobs': dict(rows),
+            'pending_progress': len(self._pending_progress),
+        }
+
+    def _merge(self, conn, job_id, fields, now):
+        """Mesclar campos em um registro (dentro de transação)"""
+        row = conn.execute("SELECT status, data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return False
+        data = json.loads(row[1])
+        fields = dict(fields)
+        status = fields.pop('status', None) or row[0]
+        data.update(fields)
+        conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, data = ? WHERE id = ?",
+            (status, now, json.dumps(data, default=str), job_id),
+        )
+        return True
+
+    def _flush_progress(self, job_id):
+        """Gravar progresso pendente de um download antes de lê-lo/alterá-lo"""
+        with self._lock:
+            progress = self._pending_progress.pop(job_id, None)
+        if progress is not None:
+            self._write_progress({job_id: progress})
+
+    def _write_progress(self, pending):
+        if not pending:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job_id, progress in pending.items():
+                self._merge(conn, job_id, {'progress': progress}, now)
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            print(f"[JobStore] Erro ao gravar progresso: {e}")
+
+    def _maybe_sweep(self, now):
+        """Executar a varredura de expiração no máximo a cada sweep_interval"""
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            self.sweep(now)
+        except sqlite3.Error as e:
+            print(f"[JobStore] Erro na varredura: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Retornar o JobStore compartilhado do processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
@@ -0,0 +1,99 @@
+import importlib
+import sys
+import threading
+
+
+class LazyAttribute:
+    """
+    Função ou classe de um módulo importado só no primeiro uso
+
+    Substitui 'from modulo import nome' nos pontos de entrada: chamar o
+    objeto (ou acessar um atributo dele) importa o módulo na hora.
+    """
+
+    def __init__(self, module, name):
+        """
+        Args:
+            module (str): Nome do módulo
+            name (str): Nome do atributo dentro do módulo
+        """
+        self._module = module
+        self._name = name
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Importar o módulo (uma vez) e retornar o atributo"""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = getattr(importlib.import_module(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        state = 'carregado' if self._target is not None else 'pendente'
+        return f"<lazy {self._module}.{self._name} ({state})>"
+
+
+class LazyObject:
+    """Objeto (singleton, downloader...) criado no primeiro acesso a um atributo"""
+
+    def __init__(self, factory, label=None):
+        """
+        Args:
+            factory (callable): Cria o objeto (chamada uma vez)
+            label (str): Nome exibido no repr
+        """
+        self._factory = factory
+        self._label = label or 'objeto'
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Criar o objeto (uma vez) e retorná-lo"""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        state = 'carregado' if self._target is not None else 'pendente'
+        return f"<lazy {self._label} ({state})>"
+
+
+def lazy_import(module, name):
+    """
+    Atalho para LazyAttribute
+
+    Exemplo:
+        get_ydl_pool = lazy_import('ydl_pool', 'get_ydl_pool')
+    """
+    return LazyAttribute(module, name)
+
+
+def lazy_instance(module, name, *args, **kwargs):
+    """
+    Objeto module.name(*args, **kwargs) criado no primeiro uso
+
+    Exemplo:
+        twitch_downloader = lazy_instance('twitch_downloader', 'TwitchDownloader')
+    """
+    return LazyObject(
+        lambda: getattr(importlib.import_module(module), name)(*args, **kwargs),
+        label=f'{module}.{name}',
+    )
+
+
+def is_loaded(module):
+    """Verificar se o módulo já foi importado no processo"""
+    return module in sys.modules
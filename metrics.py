@@ -0,0 +1,359 @@
+import bisect
+import math
+import threading
+import time
+
+from config import Config
+from download_engine import DownloadJob, get_download_engine
+from strategy_scores import classify_error
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shards:
+    """
+    Células de valores por thread
+
+    Cada thread escreve só na própria célula (sem lock no caminho quente);
+    a leitura soma as células. Células de threads encerradas são somadas
+    na base e descartadas.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells = []
+        self._base = [0] * size
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self._size
+            with self._lock:
+                self._cells.append((threading.current_thread(), cell))
+            return cell
+
+    def totals(self):
+        with self._lock:
+            alive = []
+            for thread, cell in self._cells:
+                if thread.is_alive():
+                    alive.append((thread, cell))
+                else:
+                    self._base = [a + b for a, b in zip(self._base, cell)]
+            self._cells = alive
+            totals = list(self._base)
+            cells = [cell for _, cell in alive]
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class _Metric:
+    """Métrica com rótulos: um filho por combinação de valores"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Filho da combinação de rótulos (criado no primeiro uso)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name}: esperados rótulos {self.labelnames}, recebidos {values}')
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        """(sufixo, rótulos, valor) de cada série"""
+        raise NotImplementedError
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class _CounterChild:
+    __slots__ = ('_shards',)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount=1):
+        self._shards.cell()[0] += amount
+
+    def value(self):
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def samples(self):
+        for values, child in self._items():
+            yield '', dict(zip(self.labelnames, values)), child.value()
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_shards')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        # Uma contagem por bucket, +Inf e a soma dos valores (última posição)
+        self._shards = _Shards(len(bounds) + 2)
+
+    def observe(self, value):
+        cell = self._shards.cell()
+        cell[bisect.bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    def totals(self):
+        return self._shards.totals()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def samples(self):
+        for values, child in self._items():
+            labels = dict(zip(self.labelnames, values))
+            totals = child.totals()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+                cumulative += count
+                yield '_bucket', dict(labels, le=_format_value(bound)), cumulative
+            yield '_sum', labels, totals[-1]
+            yield '_count', labels, cumulative
+
+
+class CallbackGauge(_Metric):
+    """Gauge lido na hora da coleta (callback retorna {valores dos rótulos: valor})"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, callback):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        for values, value in sorted(self.callback().items()):
+            yield '', dict(zip(self.labelnames, values)), value
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Conjunto de métricas e exposição no formato texto do Prometheus (0.0.4)"""
+
+    def __init__(self, namespace=''):
+        self.namespace = namespace
+        self._metrics = []
+
+    def _name(self, name):
+        return f'{self.namespace}_{name}' if self.namespace else name
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self._name(name), documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames, buckets):
+        return self.register(Histogram(self._name(name), documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames, callback):
+        return self.register(CallbackGauge(self._name(name), documentation, labelnames, callback))
+
+    def render(self):
+        """Texto de exposição de todas as métricas"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"[Metrics] Erro ao coletar {metric.name}: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {_escape(metric.documentation)}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labels, value in samples:
+                name = metric.name + suffix
+                if labels:
+                    name += '{' + ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items()) + '}'
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def platform_label(platform):
+    """Rótulo platform com cardinalidade fixa ('X/Twitter' -> 'twitter', desconhecida -> 'generic')"""
+    platform = (platform or '').strip().lower()
+    if platform in ('x', 'x/twitter'):
+        platform = 'twitter'
+    return platform if platform in Config.METRICS_CONFIG['platforms'] else 'generic'
+
+
+class AppMetrics:
+    """
+    Métricas do app: extração, download, pós-processamento, fila e erros
+
+    Alimentadas pelas instâncias do yt-dlp (RateLimitedYoutubeDL: extração e
+    progress hooks), pelo SmartConvertorPP, pelos jobs do DownloadEngine e
+    pelas rotas Flask (instrument_app). Rótulos platform/strategy: strategy
+    é o nome da estratégia anti-bot do YouTube ou 'default' (perfis do pool).
+    """
+
+    def __init__(self, namespace=None):
+        config = Config.METRICS_CONFIG
+        buckets = config['buckets']
+        self.enabled = config['enabled']
+        self.registry = registry = MetricsRegistry(namespace if namespace is not None else config['namespace'])
+
+        self.extraction_seconds = registry.histogram(
+            'extraction_seconds', 'Duração do extract_info sem download', ('platform', 'strategy'), buckets['extraction'])
+        self.download_seconds = registry.histogram(
+            'download_seconds', 'Duração do download de cada arquivo (progress hook finished)',
+            ('platform', 'strategy'), buckets['download'])
+        self.download_bytes = registry.counter(
+            'download_bytes_total', 'Bytes baixados', ('platform', 'strategy'))
+        self.postprocess_seconds = registry.histogram(
+            'postprocess_seconds', 'Duração do pós-processamento por ação do planner',
+            ('platform', 'strategy', 'action'), buckets['postprocess'])
+        self.errors = registry.counter(
+            'errors_total', 'Erros por etapa e classe (ver strategy_scores.classify_error)',
+            ('platform', 'strategy', 'stage', 'error_class'))
+        self.jobs = registry.counter(
+            'jobs_total', 'Jobs do DownloadEngine encerrados por estado', ('platform', 'state'))
+        self.http_seconds = registry.histogram(
+            'http_request_seconds', 'Duração das requisições HTTP por rota',
+            ('endpoint', 'method', 'status'), buckets['http'])
+        registry.gauge('queue_depth', 'Jobs aguardando na fila do DownloadEngine', (),
+                       lambda: {(): get_download_engine().stats()['queued']})
+        registry.gauge('active_workers', 'Workers do DownloadEngine executando jobs', (),
+                       lambda: {(): get_download_engine().stats()['active_workers']})
+        registry.gauge('max_workers', 'Workers máximos do DownloadEngine', (),
+                       lambda: {(): get_download_engine().stats()['max_workers']})
+
+    def observe_extraction(self, platform, strategy, seconds, error=None):
+        """Registrar uma extração (e o erro, se houver)"""
+        if not self.enabled:
+            return
+        platform = platform_label(platform)
+        self.extraction_seconds.labels(platform, strategy).observe(seconds)
+        if error is not None:
+            self.record_error(platform, strategy, 'extraction', error)
+
+    def observe_download(self, platform, strategy, seconds, nbytes):
+        if not self.enabled:
+            return
+        platform = platform_label(platform)
+        if seconds is not None:
+            self.download_seconds.labels(platform, strategy).observe(seconds)
+        if nbytes:
+            self.download_bytes.labels(platform, strategy).inc(nbytes)
+
+    def observe_postprocess(self, platform, strategy, action, seconds):
+        if self.enabled:
+            self.postprocess_seconds.labels(platform_label(platform), strategy, action).observe(seconds)
+
+    def record_error(self, platform, strategy, stage, error):
+        if self.enabled:
+            self.errors.labels(platform_label(platform), strategy, stage, classify_error(error)).inc()
+
+    def progress_hook(self, platform, strategy='default'):
+        """
+        Progress hook do yt-dlp que registra duração e bytes de cada arquivo
+
+        Os eventos 'downloading' (vários por segundo) só comparam o status;
+        erros de download são contados por RateLimitedYoutubeDL.extract_info.
+        """
+        platform = platform_label(platform)
+        duration = self.download_seconds.labels(platform, strategy)
+        transferred = self.download_bytes.labels(platform, strategy)
+
+        def hook(d):
+            if d.get('status') != 'finished' or not self.enabled:
+                return
+            if d.get('elapsed') is not None:
+                duration.observe(d['elapsed'])
+            nbytes = d.get('downloaded_bytes') or d.get('total_bytes')
+            if nbytes:
+                transferred.inc(nbytes)
+
+        return hook
+
+    def observe_job(self, job):
+        """Listener do DownloadEngine: jobs encerrados por estado e falhas por classe"""
+        if not self.enabled or not job.finished:
+            return
+        platform = platform_label(job.metadata.get('platform'))
+        self.jobs.labels(platform, job.state).inc()
+        if job.state == DownloadJob.FAILED:
+            self.record_error(platform, 'default', 'job', job.error or 'error')
+
+    def instrument_app(self, app):
+        """Medir a duração de cada requisição do Flask por rota, método e status"""
+        from flask import g, request
+
+        @app.before_request
+        def _metrics_start():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _metrics_observe(response):
+            started = g.pop('metrics_started', None)
+            if started is not None and self.enabled:
+                endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                self.http_seconds.labels(endpoint, request.method, str(response.status_code)).observe(
+                    time.perf_counter() - started)
+            return response
+
+        return app
+
+    def render(self):
+        return self.registry.render()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Retornar as AppMetrics compartilhadas do processo"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = AppMetrics()
+        return _metrics
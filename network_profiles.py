@@ -0,0 +1,188 @@
+import threading
+
+from config import Config
+
+# Protocolos em que concurrent_fragment_downloads tem efeito
+FRAGMENTED_PROTOCOLS = ('m3u8_native', 'http_dash_segments', 'ism', 'f4m')
+
+
+def _profile_key(platform):
+    """Chave do perfil: nome da plataforma em minúsculas"""
+    key = (platform or '').lower()
+    return key if key in Config.NETWORK_PROFILES else 'default'
+
+
+class ThroughputTracker:
+    """Vazão medida por plataforma e ajuste dos parâmetros de rede"""
+
+    def __init__(self, config=None):
+        """
+        Inicializar o tracker
+
+        Args:
+            config (dict): Limites do ajuste (padrão: Config.ADAPTIVE_NETWORK_CONFIG)
+        """
+        self.config = config or Config.ADAPTIVE_NETWORK_CONFIG
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def _platform_state(self, key):
+        """Estado de uma plataforma (chamado com lock)"""
+        state = self._state.get(key)
+        if state is None:
+            profile = Config.NETWORK_PROFILES[key]
+            state = self._state[key] = {
+                'fragments': profile['concurrent_fragment_downloads'],
+                'buffersize': profile['buffersize'],
+                'rate': None,  # Média móvel geral (bytes/s)
+                'rate_by_fragments': {},  # Média móvel por nível de paralelismo
+                'samples': 0,
+            }
+        return state
+
+    def current(self, platform):
+        """
+        Parâmetros atuais para a plataforma
+
+        Returns:
+            dict: {'fragments': int, 'buffersize': int}
+        """
+        with self._lock:
+            state = self._platform_state(_profile_key(platform))
+            return {'fragments': state['fragments'], 'buffersize': state['buffersize']}
+
+    def record(self, platform, total_bytes, elapsed, fragments=None):
+        """
+        Registrar a vazão de um download concluído
+
+        Para downloads fragmentados, compara a vazão do nível de paralelismo
+        usado com os níveis vizinhos: dobra enquanto a vazão melhora e volta
+        à metade quando o nível menor rendia mais (subida de encosta).
+
+        Args:
+            platform (str): Nome da plataforma
+            total_bytes (int): Bytes baixados
+            elapsed (float): Duração do download em segundos
+            fragments (int): Paralelismo usado (None para downloads progressivos)
+        """
+        if not total_bytes or not elapsed or total_bytes < self.config['min_sample_bytes']:
+            return
+        rate = total_bytes / elapsed
+        alpha = self.config['smoothing']
+
+        with self._lock:
+            state = self._platform_state(_profile_key(platform))
+            state['samples'] += 1
+            state['rate'] = rate if state['rate'] is None else (1 - alpha) * state['rate'] + alpha * rate
+
+            # Buffer de leitura proporcional a ~50ms de dados, dentro dos limites
+            state['buffersize'] = int(min(
+                self.config['max_buffersize'],
+                max(self.config['min_buffersize'], state['rate'] * 0.05)
+            ))
+
+            if fragments is None:
+                return
+            rates = state['rate_by_fragments']
+            previous = rates.get(fragments)
+            rates[fragments] = rate if previous is None else (1 - alpha) * previous + alpha * rate
+            if fragments != state['fragments']:
+                return
+
+            lower = rates.get(max(self.config['min_fragments'], fragments // 2))
+            higher_level = min(self.config['max_fragments'], fragments * 2)
+            if lower is not None and lower > rates[fragments] * 1.1 and fragments > self.config['min_fragments']:
+                state['fragments'] = max(self.config['min_fragments'], fragments // 2)
+            elif higher_level != fragments and (lower is None or rates[fragments] > lower * 1.1):
+                higher = rates.get(higher_level)
+                if higher is None or higher > rates[fragments]:
+                    state['fragments'] = higher_level
+
+    def stats(self):
+        """Estado atual por plataforma"""
+        with self._lock:
+            return {
+                key: {
+                    'fragments': state['fragments'],
+                    'buffersize': state['buffersize'],
+                    'rate': state['rate'],
+                    'samples': state['samples'],
+                }
+                for key, state in self._state.items()
+            }
+
+
+def network_opts(platform):
+    """
+    Opções de rede do yt-dlp para a plataforma
+
+    Returns:
+        dict: concurrent_fragment_downloads, buffersize e http_chunk_size (se definido)
+    """
+    key = _profile_key(platform)
+    profile = Config.NETWORK_PROFILES[key]
+    opts = {
+        'concurrent_fragment_downloads': profile['concurrent_fragment_downloads'],
+        'buffersize': profile['buffersize'],
+    }
+    if Config.ADAPTIVE_NETWORK_CONFIG['enabled']:
+        current = get_throughput_tracker().current(key)
+        opts['concurrent_fragment_downloads'] = current['fragments']
+        opts['buffersize'] = current['buffersize']
+    if profile['http_chunk_size']:
+        opts['http_chunk_size'] = profile['http_chunk_size']
+    return opts
+
+
+def throughput_hook(platform, fragments):
+    """Progress hook que mede a vazão de cada download concluído"""
+    tracker = get_throughput_tracker()
+
+    def hook(d):
+        if d.get('status') != 'finished':
+            return
+        protocol = (d.get('info_dict') or {}).get('protocol') or ''
+        fragmented = any(p in protocol for p in FRAGMENTED_PROTOCOLS)
+        tracker.record(
+            platform,
+            d.get('total_bytes') or d.get('downloaded_bytes'),
+            d.get('elapsed'),
+            fragments if fragmented else None,
+        )
+
+    return hook
+
+
+def apply_network_profile(ydl_opts, platform):
+    """
+    Aplicar o perfil de rede da plataforma às opções do yt-dlp
+
+    Valores já definidos em ydl_opts têm prioridade. Quando o ajuste
+    adaptativo está ativo, adiciona o hook que alimenta o ThroughputTracker.
+
+    Args:
+        ydl_opts (dict): Opções do yt-dlp (alteradas no lugar)
+        platform (str): Nome da plataforma
+
+    Returns:
+        dict: O mesmo ydl_opts
+    """
+    for key, value in network_opts(platform).items():
+        ydl_opts.setdefault(key, value)
+    if Config.ADAPTIVE_NETWORK_CONFIG['enabled']:
+        hook = throughput_hook(platform, ydl_opts['concurrent_fragment_downloads'])
+        ydl_opts['progress_hooks'] = list(ydl_opts.get('progress_hooks') or []) + [hook]
+    return ydl_opts
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_throughput_tracker():
+    """Retornar o ThroughputTracker compartilhado do processo"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ThroughputTracker()
+        return _tracker
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+from info_cache import download_with_cached_info
+from ydl_pool import get_ydl_pool
+
+
+class DownloadArchive:
+    """
+    IDs já baixados, um por linha ('extractor id')
+
+    Mesmo formato do --download-archive do yt-dlp: o arquivo pode ser
+    usado pelos dois lados.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Caminho do arquivo (criado no primeiro registro)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = set()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self._ids = {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def key(entry):
+        """Chave do item no arquivo (None se o item não tem id)"""
+        video_id = entry.get('id')
+        extractor = entry.get('ie_key') or entry.get('extractor_key') or entry.get('extractor')
+        if not video_id or not extractor:
+            return None
+        return f"{extractor.lower()} {video_id}"
+
+    def __contains__(self, entry):
+        key = self.key(entry)
+        with self._lock:
+            return key is not None and key in self._ids
+
+    def add(self, entry):
+        """Registrar um item concluído"""
+        key = self.key(entry)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._ids:
+                return
+            self._ids.add(key)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(key + '\n')
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+
+class PlaylistPipeline:
+    """Playlists e canais: extração flat única, itens em paralelo e retomada pelo arquivo de IDs"""
+
+    def __init__(self, platform, max_workers=None):
+        """
+        Inicializar o pipeline
+
+        Args:
+            platform (str): Nome da plataforma
+            max_workers (int): Itens baixados ao mesmo tempo (padrão: Config.PLAYLIST_CONFIG)
+        """
+        self.platform = platform
+        self.max_workers = max(1, int(max_workers or Config.PLAYLIST_CONFIG['max_workers']))
+
+    def extract_entries(self, url, max_items=None):
+        """
+        Listar os itens da playlist/canal sem extrair cada vídeo
+
+        Args:
+            url (str): URL da playlist ou canal
+            max_items (int): Limite de itens (None = todos)
+
+        Returns:
+            tuple: (info da playlist, lista de entradas flat)
+        """
+        options = {'quiet': True, 'no_warnings': True, 'noplaylist': False, 'extract_flat': 'in_playlist'}
+        if max_items:
+            options['playlistend'] = max_items
+        with get_ydl_pool().lease(self.platform, **options) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+        entries = [entry for entry in (info.get('entries') or []) if entry]
+        if info.get('_type') not in ('playlist', 'multi_video') and not entries:
+            # URL de um vídeo só: playlist de um item
+            entries = [info]
+        return info, entries[:max_items] if max_items else entries
+
+    def run(self, url, output_path, quality='best', format_type='mp4', progress_hook=None,
+            on_item=None, max_items=None, archive_path=None):
+        """
+        Baixar todos os itens, pulando os que já constam no arquivo de IDs
+
+        Uma falha em um item não interrompe os outros; rodar de novo baixa
+        apenas o que faltou.
+
+        Args:
+            url (str): URL da playlist ou canal
+            output_path (str): Diretório de destino
+            quality (str): Qualidade desejada
+            format_type (str): Formato do arquivo
+            progress_hook (callable): Hook do yt-dlp; o dict recebe 'playlist_item' (index, id, title)
+            on_item (callable): Chamado com o estado do item a cada mudança (queued, running, ...)
+            max_items (int): Limite de itens
+            archive_path (str): Arquivo de IDs (padrão: Config.PLAYLIST_CONFIG['archive_name'] no destino)
+
+        Returns:
+            dict: Manifesto com contagens e o estado de cada item
+        """
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        archive = DownloadArchive(archive_path or os.path.join(output_path, Config.PLAYLIST_CONFIG['archive_name']))
+        started = time.time()
+
+        info, entries = self.extract_entries(url, max_items)
+        width = len(str(len(entries)))
+        print(f"[Playlist] {info.get('title') or url}: {len(entries)} itens, {self.max_workers} em paralelo")
+
+        items = []
+        for index, entry in enumerate(entries, 1):
+            item = {
+                'index': index,
+                'id': entry.get('id'),
+                'title': entry.get('title'),
+                'url': entry.get('webpage_url') or entry.get('url'),
+                'status': 'skipped' if entry in archive else 'queued',
+            }
+            items.append(item)
+            self._notify(on_item, item)
+
+        pending = [(item, entry) for item, entry in zip(items, entries) if item['status'] == 'queued']
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='playlist') as executor:
+            futures = [
+                executor.submit(
+                    self._download_item, item, entry, archive, output_path, width,
+                    quality, format_type, progress_hook, on_item
+                )
+                for item, entry in pending
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+        counts = {status: sum(1 for item in items if item['status'] == status)
+                  for status in ('completed', 'skipped', 'failed')}
+        print(f"[Playlist] Concluído: {counts['completed']} baixados, {counts['skipped']} já baixados, {counts['failed']} falhas")
+        return dict(
+            counts,
+            playlist_id=info.get('id'),
+            title=info.get('title'),
+            total=len(items),
+            archive=archive.path,
+            elapsed=round(time.time() - started, 3),
+            items=items,
+        )
+
+    def _download_item(self, item, entry, archive, output_path, width, quality, format_type, progress_hook, on_item):
+        """Baixar um item (thread do pool); falhas ficam registradas no item"""
+        item.update(status='running', started_at=datetime.now().isoformat())
+        self._notify(on_item, item)
+
+        def hook(d):
+            item['progress'] = {
+                'status': d.get('status'),
+                'downloaded_bytes': d.get('downloaded_bytes'),
+                'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate'),
+                'speed': d.get('speed'),
+                'eta': d.get('eta'),
+            }
+            if progress_hook:
+                d['playlist_item'] = {'index': item['index'], 'id': item['id'], 'title': item['title']}
+                progress_hook(d)
+            if d.get('status') == 'downloading':
+                self._notify(on_item, item)
+
+        # Índice da playlist fixo no nome (o item é baixado isoladamente, sem playlist_index)
+        output_template = os.path.join(output_path, f"{item['index']:0{width}d} - %(title)s.%(ext)s")
+        try:
+            with get_ydl_pool().lease(
+                self.platform, quality, format_type,
+                outtmpl=output_template,
+                progress_hooks=[hook],
+            ) as ydl:
+                if entry.get('_type') in ('url', 'url_transparent'):
+                    result = download_with_cached_info(ydl, entry['url'], self.platform)
+                else:
+                    # Entrada já resolvida na listagem (sem URL própria para extrair de novo)
+                    result = ydl.process_ie_result(dict(entry), download=True)
+            # Mesma chave usada na checagem (entrada flat); sem id na listagem, a do resultado
+            archive.add(entry if archive.key(entry) else result or {})
+            item.update(status='completed', title=(result or {}).get('title') or item['title'])
+        except Exception as e:
+            print(f"[Playlist] Falha no item {item['index']} ({item['url']}): {str(e)[:100]}")
+            item.update(status='failed', error=str(e))
+        item['finished_at'] = datetime.now().isoformat()
+        self._notify(on_item, item)
+        return item
+
+    @staticmethod
+    def _notify(on_item, item):
+        if on_item:
+            try:
+                on_item(dict(item))
+            except Exception as e:
+                print(f"[Playlist] Erro no callback de progresso: {e}")
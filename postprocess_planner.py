@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+
+from yt_dlp.postprocessor import postprocessors
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+from yt_dlp.utils import prepend_extension, replace_extension
+
+from config import Config
+from metrics import get_metrics
+
+# Nomes do yt-dlp (vcodec/acodec do formato) -> codec_name do ffprobe
+_CODEC_PREFIXES = (
+    ('avc', 'h264'), ('h264', 'h264'), ('hev', 'hevc'), ('hvc', 'hevc'), ('h265', 'hevc'),
+    ('vp09', 'vp9'), ('vp9', 'vp9'), ('vp8', 'vp8'), ('av01', 'av1'), ('av1', 'av1'),
+    ('mp4a', 'aac'), ('aac', 'aac'), ('opus', 'opus'), ('vorbis', 'vorbis'), ('mp3', 'mp3'),
+)
+
+
+def normalize_codec(codec):
+    """Codec do formato do yt-dlp ('avc1.64001F', 'mp4a.40.2') no nome do ffprobe ('h264', 'aac')"""
+    codec = (codec or '').lower()
+    if codec in ('', 'none'):
+        return None
+    for prefix, name in _CODEC_PREFIXES:
+        if codec.startswith(prefix):
+            return name
+    return codec.split('.')[0]
+
+
+def plan(source_ext, target_ext, vcodec, acodec):
+    """
+    Escolher o pós-processamento mais barato que entrega o formato pedido
+
+    Args:
+        source_ext (str): Extensão do arquivo baixado
+        target_ext (str): Formato pedido pela interface
+        vcodec (str): Codec de vídeo (nome do ffprobe; None se não houver)
+        acodec (str): Codec de áudio (nome do ffprobe; None se não houver)
+
+    Returns:
+        dict: action ('noop', 'remux', 'audio_transcode' ou 'transcode'),
+            reason e os args de codec do ffmpeg
+    """
+    compatible = Config.POSTPROCESS_CONFIG['compatible'].get(target_ext, {})
+    encoders = Config.POSTPROCESS_CONFIG['encoders'].get(target_ext, Config.POSTPROCESS_CONFIG['encoders']['mp4'])
+    video_ok = vcodec is None or compatible.get('video') is None or vcodec in compatible['video']
+    audio_ok = acodec is None or compatible.get('audio') is None or acodec in compatible['audio']
+
+    if not video_ok:
+        audio_args = ['-c:a', 'copy'] if audio_ok else ['-c:a', *encoders['audio']]
+        return {
+            'action': 'transcode',
+            'reason': f'vídeo {vcodec} incompatível com {target_ext}',
+            'args': ['-c:v', *encoders['video'], *audio_args],
+        }
+    if not audio_ok:
+        return {
+            'action': 'audio_transcode',
+            'reason': f'áudio {acodec} incompatível com {target_ext}',
+            'args': ['-c:v', 'copy', '-c:a', *encoders['audio']],
+        }
+    if source_ext == target_ext:
+        return {'action': 'noop', 'reason': f'{vcodec}/{acodec} já em {target_ext}', 'args': []}
+    return {
+        'action': 'remux',
+        'reason': f'{vcodec}/{acodec} compatíveis, só troca o contêiner {source_ext} -> {target_ext}',
+        'args': ['-c', 'copy'],
+    }
+
+
+class PostprocessStats:
+    """Contagem e tempo total de cada caminho escolhido pelo planner"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, platform, action, elapsed):
+        with self._lock:
+            entry = self._stats.setdefault((platform, action), {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += elapsed
+
+    def report(self):
+        """
+        Returns:
+            list: Um dict por (plataforma, ação) com quantidade e tempo médio
+        """
+        with self._lock:
+            return [
+                {
+                    'platform': platform,
+                    'action': action,
+                    'count': entry['count'],
+                    'seconds': round(entry['seconds'], 3),
+                    'avg_seconds': round(entry['seconds'] / entry['count'], 3),
+                }
+                for (platform, action), entry in sorted(self._stats.items())
+            ]
+
+
+class SmartConvertorPP(FFmpegPostProcessor):
+    """
+    Substituto do FFmpegVideoConvertor que só reencoda quando precisa
+
+    Inspeciona os streams do arquivo baixado (ffprobe) e escolhe entre
+    nada, remux (-c copy), reencode só do áudio ou reencode completo. A
+    decisão e o tempo gasto ficam em info['postprocess'] e nas estatísticas
+    do processo (get_postprocess_stats).
+    """
+
+    def __init__(self, downloader=None, preferedformat='mp4'):
+        super().__init__(downloader)
+        self.target_ext = preferedformat
+
+    def _streams(self, info):
+        """Codecs de vídeo e áudio do arquivo (ffprobe; sem ffprobe, os do formato)"""
+        try:
+            streams = self.get_metadata_object(info['filepath']).get('streams') or []
+            vcodec = next((s.get('codec_name') for s in streams
+                           if s.get('codec_type') == 'video' and not (s.get('disposition') or {}).get('attached_pic')), None)
+            acodec = next((s.get('codec_name') for s in streams if s.get('codec_type') == 'audio'), None)
+            return vcodec, acodec
+        except Exception as e:
+            self.report_warning(f'ffprobe falhou ({e}); usando os codecs do formato')
+            return normalize_codec(info.get('vcodec')), normalize_codec(info.get('acodec'))
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        started = time.time()
+        filename, source_ext = info['filepath'], info['ext'].lower()
+        vcodec, acodec = self._streams(info)
+        decision = plan(source_ext, self.target_ext, vcodec, acodec)
+
+        files_to_delete = []
+        if decision['action'] != 'noop':
+            outpath = replace_extension(filename, self.target_ext, source_ext)
+            temp = prepend_extension(outpath, 'temp') if outpath == filename else outpath
+            self.to_screen(f"{decision['action']} ({decision['reason']}); Destination: {outpath}")
+            self.run_ffmpeg(filename, temp, ['-map', '0', '-dn', '-ignore_unknown', *decision['args']])
+            if temp != outpath:
+                os.replace(temp, outpath)
+            else:
+                files_to_delete.append(filename)
+            info['filepath'] = outpath
+            info['format'] = info['ext'] = self.target_ext
+
+        elapsed = time.time() - started
+        platform = info.get('extractor_key') or info.get('extractor') or 'generic'
+        info['postprocess'] = dict(decision, vcodec=vcodec, acodec=acodec, elapsed=round(elapsed, 3))
+        get_postprocess_stats().record(platform, decision['action'], elapsed)
+        # Rótulos da instância (RateLimitedYoutubeDL); extractor_key ('TwitchVod'...) não cabe no rótulo platform
+        get_metrics().observe_postprocess(
+            getattr(self._downloader, 'rate_platform', platform),
+            getattr(self._downloader, 'metrics_strategy', 'default'),
+            decision['action'], elapsed)
+        print(f"[PostProcess] {platform}: {decision['action']} em {elapsed:.2f}s ({decision['reason']})")
+        return files_to_delete, info
+
+
+# Disponível para o yt-dlp como {'key': 'SmartConvertor', 'preferedformat': ...}
+postprocessors.value.setdefault('SmartConvertorPP', SmartConvertorPP)
+
+
+def smart_convertor(format_type):
+    """Definição do pós-processador para as opções do yt-dlp"""
+    return {'key': 'SmartConvertor', 'preferedformat': format_type}
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_postprocess_stats():
+    """Retornar as PostprocessStats compartilhadas do processo"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = PostprocessStats()
+        return _stats
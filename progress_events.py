@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+from download_engine import get_download_engine
+
+# Status que encerram o stream de eventos
+TERMINAL_STATUSES = ('completed', 'error', 'failed', 'cancelled', 'not_found')
+
+
+def format_event(event, data):
+    """Formatar uma mensagem Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _Channel:
+    """Último estado de progresso de um download e assinantes aguardando"""
+
+    def __init__(self, lock):
+        self.cond = threading.Condition(lock)
+        self.data = {}
+        self.version = 0
+        self.finished = False
+
+
+class ProgressBroker:
+    """Distribui o progresso dos downloads para conexões SSE com coalescência"""
+
+    def __init__(self, min_interval=None, keepalive=None, max_channels=None, max_duration=None):
+        """
+        Inicializar o broker
+
+        Args:
+            min_interval (float): Intervalo mínimo entre eventos enviados a cada conexão
+            keepalive (float): Intervalo dos comentários de keepalive
+            max_channels (int): Quantidade máxima de canais em memória (LRU)
+            max_duration (float): Tempo máximo de uma conexão até o evento 'timeout'
+        """
+        config = Config.PROGRESS_EVENTS_CONFIG
+        self.min_interval = min_interval if min_interval is not None else config['min_interval']
+        self.keepalive = keepalive or config['keepalive']
+        self.snapshot_interval = config['snapshot_interval']
+        self.max_channels = max_channels or config['max_channels']
+        self.max_duration = max_duration or config['max_duration']
+
+        self._lock = threading.Lock()
+        self._channels = OrderedDict()
+
+    def _channel(self, channel_id):
+        """Obter ou criar canal (chamado com lock)"""
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = _Channel(self._lock)
+            while len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(channel_id)
+        return channel
+
+    def publish(self, channel_id, **fields):
+        """Atualizar o estado do canal e acordar os assinantes"""
+        with self._lock:
+            channel = self._channel(channel_id)
+            channel.data.update(fields)
+            channel.version += 1
+            channel.cond.notify_all()
+
+    def finish(self, channel_id):
+        """Marcar o download como terminado (assinantes enviam o evento final)"""
+        with self._lock:
+            channel = self._channel(channel_id)
+            channel.finished = True
+            channel.cond.notify_all()
+
+    def latest(self, channel_id):
+        """Último progresso publicado (cópia) ou dict vazio"""
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            return dict(channel.data) if channel else {}
+
+    def stream(self, channel_id, snapshot):
+        """
+        Gerador de eventos SSE para um download
+
+        Envia o estado atual, depois eventos 'progress' (no máximo um a cada
+        min_interval, sempre com o valor mais recente) e por fim 'done'. Se o
+        job não terminar em max_duration (registro preso em queued/running
+        após um restart, por exemplo), encerra com 'timeout' e o estado atual.
+
+        Args:
+            channel_id (str): ID do download
+            snapshot (callable): Função que retorna o status atual (mesmo formato do /status)
+
+        Yields:
+            str: Mensagens SSE
+        """
+        with self._lock:
+            channel = self._channel(channel_id)
+            seen = channel.version
+
+        state = snapshot()
+        if state.get('status') in TERMINAL_STATUSES:
+            yield format_event('done', state)
+            return
+        yield format_event('status', dict(state, **self.latest(channel_id)))
+
+        last_message = time.time()
+        deadline = last_message + self.max_duration
+        while True:
+            if time.time() >= deadline:
+                yield format_event('timeout', snapshot())
+                return
+            with self._lock:
+                if channel.version == seen and not channel.finished:
+                    channel.cond.wait(min(self.snapshot_interval, max(deadline - time.time(), 0)))
+                finished = channel.finished
+                changed = channel.version != seen
+                seen = channel.version
+                data = dict(channel.data)
+
+            if finished:
+                yield format_event('done', dict(data, **snapshot()))
+                return
+            if not changed:
+                # Sem eventos locais: o download pode estar em outro processo (JobStore)
+                state = snapshot()
+                if state.get('status') in TERMINAL_STATUSES:
+                    yield format_event('done', state)
+                    return
+                if time.time() - last_message >= self.keepalive:
+                    last_message = time.time()
+                    yield ": keepalive\n\n"
+                continue
+
+            last_message = time.time()
+            yield format_event('progress', data)
+            # Coalescência: atualizações recebidas durante o intervalo viram um único evento
+            time.sleep(self.min_interval)
+
+    def _on_job_state(self, job):
+        """Listener do DownloadEngine"""
+        if job.finished:
+            self.finish(job.id)
+        else:
+            self.publish(job.id, status=job.state)
+
+
+def progress_hook(channel_id, job=None, on_progress=None):
+    """
+    Criar progress hook do yt-dlp que publica no broker
+
+    Converte o dict bruto do yt-dlp (que inclui o info_dict inteiro) em um
+    resumo serializável com bytes, velocidade, ETA e percentual.
+
+    Args:
+        channel_id (str): ID do download
+        job (DownloadJob): Job cujo campo progress também é atualizado (opcional)
+        on_progress (callable): Recebe o resumo a cada atualização (ex.: JobStore.update_progress)
+
+    Returns:
+        callable: Hook para 'progress_hooks'
+    """
+    broker = get_progress_broker()
+
+    def hook(d):
+        downloaded = d.get('downloaded_bytes')
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if d.get('status') == 'finished':
+            status, percent = 'processing', 100.0
+        elif d.get('status') == 'downloading':
+            status = 'downloading'
+            percent = round(downloaded * 100.0 / total, 1) if downloaded and total else None
+        else:
+            status, percent = d.get('status'), None
+
+        progress = {
+            'status': status,
+            'downloaded_bytes': downloaded,
+            'total_bytes': total,
+            'speed': d.get('speed'),
+            'eta': d.get('eta'),
+            'percent': percent,
+            'filename': os.path.basename(d.get('filename') or '') or None,
+        }
+        if job is not None:
+            job.progress = progress
+        if on_progress is not None:
+            on_progress(progress)
+        broker.publish(channel_id, **progress)
+
+    return hook
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_progress_broker():
+    """Retornar o ProgressBroker compartilhado do processo (ligado ao DownloadEngine)"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = ProgressBroker()
+            get_download_engine().add_listener(_broker._on_job_state)
+        return _broker
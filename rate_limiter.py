@@ -0,0 +1,359 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from yt_dlp.networking.exceptions import HTTPError
+
+from config import Config
+from extractor_scope import ScopedYoutubeDL
+from metrics import get_metrics
+from platform_profiles import normalize_platform
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    platform TEXT NOT NULL,
+    host TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    factor REAL NOT NULL,
+    last_penalty REAL,
+    streak INTEGER NOT NULL DEFAULT 0,
+    penalties INTEGER NOT NULL DEFAULT 0,
+    waited REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (platform, host)
+);
+"""
+
+# Campos do estado de um bucket (mesma ordem das colunas)
+STATE_FIELDS = ('tokens', 'updated', 'factor', 'last_penalty', 'streak', 'penalties', 'waited')
+
+
+def is_rate_limit_error(error):
+    """Verificar se o erro indica limite de requisições da plataforma (429, 'rate limit', 'dneb_'...)"""
+    message = str(error).lower()
+    return any(pattern in message for pattern in Config.RATE_LIMIT_CONFIG['error_patterns'])
+
+
+def _retry_after(error):
+    """Segundos do header Retry-After de um HTTPError (None se ausente/inválido)"""
+    try:
+        return float(error.response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets por (plataforma, host), com recuo quando a plataforma limita"""
+
+    def __init__(self, config=None, db_path=None):
+        """
+        Inicializar o limitador
+
+        Args:
+            config (dict): Limites (padrão: Config.RATE_LIMIT_CONFIG)
+            db_path (str): Banco SQLite para dividir os buckets entre processos
+                (padrão: config['db_path']; None mantém os buckets em memória)
+        """
+        self.config = config or Config.RATE_LIMIT_CONFIG
+        self.db_path = db_path or self.config['db_path']
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._local = threading.local()
+        if self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._conn()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        """Conexão SQLite da thread atual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def limits(self, platform):
+        """Limites da plataforma: {'rate': tokens/s, 'burst': tokens}"""
+        platforms = self.config['platforms']
+        return platforms.get(normalize_platform(platform), platforms['generic'])
+
+    def exempt(self, host):
+        """Hosts de mídia (CDNs) não consomem tokens: só páginas e APIs são limitadas"""
+        host = (host or '').lower()
+        return not host or any(host == h or host.endswith('.' + h) for h in self.config['exempt_hosts'])
+
+    def acquire(self, platform, host, tokens=1):
+        """
+        Reservar tokens do bucket e esperar até estarem disponíveis
+
+        A reserva é feita na hora (o saldo pode ficar negativo), então quem
+        chega primeiro sai primeiro mesmo com muitos workers no mesmo host.
+
+        Args:
+            platform (str): Nome da plataforma
+            host (str): Host da requisição
+            tokens (int): Custo da requisição
+
+        Returns:
+            float: Segundos esperados
+        """
+        if not self.config['enabled'] or self.exempt(host):
+            return 0.0
+        wait = self._update(normalize_platform(platform), host.lower(), self._take, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, platform, host, retry_after=None, reason=None):
+        """
+        Recuar depois de um erro de limite da plataforma
+
+        Esvazia o bucket, bloqueia o host por um cooldown que dobra a cada erro
+        seguido (ou pelo Retry-After) e reduz a taxa, que volta ao normal aos
+        poucos (recovery_half_life). Erros em sequência rápida contam uma vez.
+
+        Args:
+            platform (str): Nome da plataforma
+            host (str): Host que respondeu com o erro
+            retry_after (float): Espera pedida pelo servidor, se houver
+            reason (str): Erro original (apenas para o log)
+        """
+        if not self.config['enabled'] or not host:
+            return
+        key = (normalize_platform(platform), host.lower())
+        blocked_for = self._update(*key, self._penalize, retry_after)
+        if blocked_for is not None:
+            print(f"[RateLimit] {key[0]}/{key[1]} limitado, pausa de {blocked_for:.1f}s: {str(reason or '')[:80]}")
+
+    def budgets(self):
+        """
+        Estado atual dos buckets
+
+        Returns:
+            list: Um dict por (plataforma, host) com taxa efetiva, tokens e bloqueio
+        """
+        now = time.time()
+        if self.db_path:
+            columns = ('platform', 'host') + STATE_FIELDS
+            rows = self._conn().execute(f"SELECT {', '.join(columns)} FROM rate_buckets").fetchall()
+            buckets = {(row[0], row[1]): dict(zip(STATE_FIELDS, row[2:])) for row in rows}
+        else:
+            with self._lock:
+                buckets = {key: dict(state) for key, state in self._buckets.items()}
+
+        report = []
+        for (platform, host), state in sorted(buckets.items()):
+            limits = self.limits(platform)
+            factor = self._factor(state, now)
+            rate = limits['rate'] * factor
+            tokens = min(limits['burst'], state['tokens'] + max(0.0, now - state['updated']) * rate)
+            report.append({
+                'platform': platform,
+                'host': host,
+                'rate': round(rate, 3),
+                'base_rate': limits['rate'],
+                'burst': limits['burst'],
+                'tokens': round(tokens, 2),
+                'blocked_for': round(max(0.0, state['updated'] - now), 1),
+                'penalties': state['penalties'],
+                'waited': round(state['waited'], 1),
+            })
+        return report
+
+    def _update(self, platform, host, func, *args):
+        """Aplicar func(estado, limites, agora, *args) ao bucket de forma atômica"""
+        limits = self.limits(platform)
+        now = time.time()
+        if not self.db_path:
+            with self._lock:
+                state = self._buckets.get((platform, host))
+                if state is None:
+                    state = self._buckets[(platform, host)] = self._new_state(limits, now)
+                return func(state, limits, now, *args)
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(STATE_FIELDS)} FROM rate_buckets WHERE platform = ? AND host = ?",
+                (platform, host),
+            ).fetchone()
+            state = dict(zip(STATE_FIELDS, row)) if row else self._new_state(limits, now)
+            result = func(state, limits, now, *args)
+            conn.execute(
+                f"INSERT OR REPLACE INTO rate_buckets (platform, host, {', '.join(STATE_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(STATE_FIELDS))})",
+                (platform, host) + tuple(state[field] for field in STATE_FIELDS),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _new_state(limits, now):
+        return {
+            'tokens': float(limits['burst']),
+            'updated': now,
+            'factor': 1.0,
+            'last_penalty': None,
+            'streak': 0,
+            'penalties': 0,
+            'waited': 0.0,
+        }
+
+    def _factor(self, state, now):
+        """Fração da taxa em uso: cai a cada erro de limite e se recupera com o tempo"""
+        if state['last_penalty'] is None:
+            return 1.0
+        recovered = 0.5 ** (max(0.0, now - state['last_penalty']) / self.config['recovery_half_life'])
+        return 1.0 - (1.0 - state['factor']) * recovered
+
+    def _take(self, state, limits, now, tokens):
+        """Reservar tokens; retorna a espera necessária (segundos)"""
+        rate = limits['rate'] * self._factor(state, now)
+        # 'updated' no futuro = host bloqueado até lá (sem reabastecer)
+        state['tokens'] = min(limits['burst'], state['tokens'] + max(0.0, now - state['updated']) * rate)
+        state['updated'] = max(state['updated'], now)
+        state['tokens'] -= tokens
+        wait = (state['updated'] - now) + max(0.0, -state['tokens']) / rate
+        state['waited'] += wait
+        return wait
+
+    def _penalize(self, state, limits, now, retry_after):
+        """Recuo após erro de limite; retorna a duração do bloqueio (None se já contado)"""
+        last = state['last_penalty']
+        if last is not None and now - last < self.config['penalty_merge_window']:
+            return None
+        config = self.config
+        factor = self._factor(state, now)
+        if last is not None and now - last < config['recovery_half_life']:
+            state['streak'] += 1
+        else:
+            state['streak'] = 1
+        state['factor'] = max(config['min_rate_factor'], factor * config['backoff_factor'])
+        state['last_penalty'] = now
+        state['penalties'] += 1
+
+        blocked_for = min(config['max_cooldown'], config['cooldown'] * 2 ** (state['streak'] - 1))
+        if retry_after:
+            blocked_for = min(config['max_cooldown'], max(blocked_for, retry_after))
+        # Ao fim da pausa, uma requisição de teste passa sem esperar pela taxa reduzida
+        state['tokens'] = 1.0
+        state['updated'] = max(state['updated'], now + blocked_for)
+        return blocked_for
+
+
+class RateLimitedYoutubeDL(ScopedYoutubeDL):
+    """
+    YoutubeDL que passa toda requisição pelo RateLimiter
+
+    Substitui sleep_interval/sleep_interval_requests: em vez de esperas
+    fixas, cada requisição consome um token do bucket (plataforma, host),
+    e erros de limite (HTTP 429, 'rate limit', 'dneb_'...) fazem o host recuar.
+    Só páginas e APIs consomem tokens: as requisições de mídia (downloads do
+    process_info, fragmentos e streaming, ver media_requests()) não esperam
+    pelo bucket, qualquer que seja o host (ex.: VODs da Twitch no CloudFront).
+    Também alimenta as métricas (metrics.py) com o tempo de extração, o
+    progress hook de download e os erros, rotulados por plataforma e estratégia.
+    """
+
+    def __init__(self, params=None, auto_init=True, platform=None, strategy=None):
+        """
+        Args:
+            params (dict): Opções do yt-dlp
+            auto_init (bool): Repassado ao YoutubeDL
+            platform (str): Plataforma dona dos buckets (padrão: 'generic')
+            strategy (str): Rótulo da estratégia nas métricas (padrão: 'default')
+        """
+        self.rate_platform = normalize_platform(platform)
+        self.rate_limiter = get_rate_limiter()
+        self.metrics_strategy = strategy or 'default'
+        self.metrics_hook = get_metrics().progress_hook(self.rate_platform, self.metrics_strategy)
+        self._extraction_started = None
+        self._media_depth = 0
+        self._media_lock = threading.Lock()
+        super().__init__(params, auto_init)
+        self.add_progress_hook(self.metrics_hook)
+
+    @contextmanager
+    def media_requests(self):
+        """
+        Bloco cujas requisições (mídia: downloads, fragmentos, streaming) não consomem tokens
+
+        Vale para todas as threads que usam esta instância (o yt-dlp baixa
+        fragmentos em paralelo); erros de limite continuam penalizando o host.
+        """
+        with self._media_lock:
+            self._media_depth += 1
+        try:
+            yield self
+        finally:
+            with self._media_lock:
+                self._media_depth -= 1
+
+    def urlopen(self, req):
+        url = req if isinstance(req, str) else getattr(req, 'url', None) or req.get_full_url()
+        host = urlsplit(url).hostname
+        if not self._media_depth:
+            self.rate_limiter.acquire(self.rate_platform, host)
+        try:
+            return super().urlopen(req)
+        except HTTPError as e:
+            if e.status in (429, 503) or is_rate_limit_error(e):
+                self.rate_limiter.penalize(self.rate_platform, host, _retry_after(e), e)
+            raise
+
+    def extract_info(self, url, download=True, *args, **kwargs):
+        # Só a chamada externa mede (process_ie_result chama extract_info de novo para redirecionamentos)
+        outer = self._extraction_started is None
+        if outer:
+            self._extraction_started = time.perf_counter()
+        try:
+            info = super().extract_info(url, download, *args, **kwargs)
+        except Exception as e:
+            # Limites sinalizados no conteúdo da resposta (ex.: 'dneb_' do Instagram)
+            if is_rate_limit_error(e):
+                self.rate_limiter.penalize(self.rate_platform, urlsplit(url).hostname, reason=e)
+            if outer:
+                if self._extraction_started is not None:
+                    self._observe_extraction(e)
+                else:
+                    get_metrics().record_error(self.rate_platform, self.metrics_strategy, 'download', e)
+            raise
+        if outer:
+            self._observe_extraction()
+        return info
+
+    def process_info(self, info_dict):
+        # Com download=True a extração termina quando o primeiro arquivo vai ser baixado
+        self._observe_extraction()
+        with self.media_requests():
+            return super().process_info(info_dict)
+
+    def _observe_extraction(self, error=None):
+        started, self._extraction_started = self._extraction_started, None
+        if started is not None:
+            get_metrics().observe_extraction(
+                self.rate_platform, self.metrics_strategy, time.perf_counter() - started, error)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Retornar o RateLimiter compartilhado do processo"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
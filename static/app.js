@@ -109,6 +109,11 @@ class VideoDownloaderApp {
             this.downloadSegmentBtn.addEventListener('click', () => this.downloadSegment());
         }
         
+        // Twitch interface events
+        if (this.searchVodsBtn) {
+            this.searchVodsBtn.addEventListener('click', () => this.searchVods());
+        }
+        
         // Progress events
         if (this.downloadFileBtn) {
             this.downloadFileBtn.addEventListener('click', () => this.downloadFile());
@@ -481,6 +486,97 @@ class VideoDownloaderApp {
         this.log(' selectTweet não implementado');
     }
 
+    async searchVods() {
+        const username = this.twitchUsername ? this.twitchUsername.value.trim() : '';
+        if (!username) {
+            this.showAlert('Por favor, digite o nome do streamer', 'warning');
+            return;
+        }
+        
+        this.setButtonLoading(this.searchVodsBtn, true);
+        try {
+            const params = new URLSearchParams({ username, max: this.vodCount ? this.vodCount.value : 10 });
+            const response = await fetch(`/api/twitch/vods?${params}`);
+            const result = await response.json();
+            
+            if (!result.success) {
+                this.showAlert(`Erro: ${result.error}`, 'danger');
+                return;
+            }
+            this.vods = result.vods;
+            this.displayVods(this.vods);
+            this.log(` ${this.vods.length} VODs de ${username}`);
+            if (!this.vods.length) {
+                this.showAlert('Nenhum VOD encontrado. Verifique o nome do streamer.', 'info');
+            }
+        } catch (error) {
+            this.showAlert(`Erro de conexão: ${error.message}`, 'danger');
+        } finally {
+            this.setButtonLoading(this.searchVodsBtn, false);
+        }
+    }
+
+    displayVods(vods) {
+        if (!this.vodsList || !this.vodsListCard) return;
+        
+        this.vodsList.innerHTML = '';
+        vods.forEach((vod, index) => {
+            const item = document.createElement('div');
+            item.className = 'border rounded p-2 mb-2 d-flex align-items-center';
+            item.style.cursor = 'pointer';
+            
+            if (vod.thumbnail) {
+                const thumb = document.createElement('img');
+                thumb.src = vod.thumbnail;
+                thumb.loading = 'lazy';
+                thumb.width = 120;
+                thumb.className = 'me-3 rounded';
+                item.appendChild(thumb);
+            }
+            
+            const text = document.createElement('div');
+            const title = document.createElement('strong');
+            title.textContent = vod.title;
+            const meta = document.createElement('small');
+            meta.className = 'd-block text-muted';
+            const date = vod.upload_date ? `${vod.upload_date.slice(6, 8)}/${vod.upload_date.slice(4, 6)}/${vod.upload_date.slice(0, 4)}` : '';
+            meta.textContent = [this.formatDuration(vod.duration), date, `${(vod.view_count || 0).toLocaleString()} views`]
+                .filter(Boolean).join(' | ');
+            text.append(title, meta);
+            item.appendChild(text);
+            
+            item.addEventListener('click', () => this.selectVod(index));
+            this.vodsList.appendChild(item);
+        });
+        this.vodsListCard.style.display = vods.length ? 'block' : 'none';
+    }
+
+    async selectVod(index) {
+        const vod = this.vods[index];
+        this.selectedVod = vod;
+        if (this.videoUrl) this.videoUrl.value = vod.url;
+        const configCard = document.getElementById('vodConfigCard');
+        if (configCard) configCard.style.display = 'block';
+        this.log(` VOD selecionado: ${vod.title}`);
+        
+        // Data e descrição só são extraídas para o VOD escolhido
+        if (vod.enriched) return;
+        try {
+            const response = await fetch('/api/twitch/vods/details', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ vods: [vod] })
+            });
+            const result = await response.json();
+            if (result.success && result.vods.length) {
+                Object.assign(vod, result.vods[0]);
+                this.displayVods(this.vods);
+            }
+        } catch (error) {
+            this.log(` Erro ao carregar detalhes do VOD: ${error.message}`);
+        }
+    }
+
     async downloadSegment() {
         // X/Twitter segment download não implementado no backend atual
         this.showAlert('Funcionalidade X/Twitter em desenvolvimento. Use a interface padrão para URLs diretas.', 'info');
@@ -516,6 +612,91 @@ class VideoDownloaderApp {
     }
     
     async waitForDownloadComplete(downloadId) {
+        // Preferir Server-Sent Events; polling apenas se o navegador/servidor não suportar
+        if (window.EventSource) {
+            const result = await this.waitForDownloadEvents(downloadId);
+            if (result !== 'fallback') {
+                return;
+            }
+            this.log(' Eventos indisponíveis, usando verificação periódica...');
+        }
+        await this.pollDownloadStatus(downloadId);
+    }
+    
+    waitForDownloadEvents(downloadId) {
+        const timeout = 300000; // 5 minutos
+        
+        return new Promise(resolve => {
+            const source = new EventSource(`/events/${downloadId}`);
+            
+            const finish = (result) => {
+                clearTimeout(timer);
+                source.close();
+                resolve(result);
+            };
+            
+            const timer = setTimeout(() => {
+                this.log(' Tempo limite excedido. Cancelando download...');
+                this.showAlert('Tempo limite excedido. Cancelando download...', 'danger');
+                this.progressCard.style.display = 'none';
+                finish('timeout');
+            }, timeout);
+            
+            const onProgress = (event) => {
+                this.showDownloadProgress(JSON.parse(event.data));
+            };
+            source.addEventListener('status', onProgress);
+            source.addEventListener('progress', onProgress);
+            
+            source.addEventListener('done', (event) => {
+                const data = JSON.parse(event.data);
+                if (data.status === 'completed') {
+                    finish('completed');
+                } else {
+                    const errorMessage = data.error || data.message || 'Download não encontrado';
+                    this.log(` Erro no download: ${errorMessage}`);
+                    this.showAlert(`Erro no download: ${errorMessage}`, 'danger');
+                    this.progressCard.style.display = 'none';
+                    finish('error');
+                }
+            });
+            
+            source.addEventListener('timeout', () => {
+                // Servidor encerrou o stream sem o evento final: continuar por polling
+                finish('fallback');
+            });
+            
+            source.onerror = () => {
+                // Conexão caiu antes do evento final: continuar por polling
+                finish('fallback');
+            };
+        });
+    }
+    
+    showDownloadProgress(data) {
+        if (data.status === 'queued' && data.queue_position) {
+            this.progressText.textContent = `Na fila (posição ${data.queue_position})`;
+            return;
+        }
+        if (data.percent === null || data.percent === undefined) {
+            return;
+        }
+        
+        // Mapear 0-100% do arquivo para 25-95% da barra (o restante é processamento)
+        this.updateProgress(25 + data.percent * 0.7, data.status);
+        const details = [];
+        if (data.speed) {
+            details.push(`${(data.speed / 1024 / 1024).toFixed(2)} MB/s`);
+        }
+        if (data.eta !== null && data.eta !== undefined) {
+            details.push(`ETA ${data.eta}s`);
+        }
+        if (details.length > 0) {
+            this.progressText.textContent += ` (${details.join(', ')})`;
+        }
+    }
+    
+    async pollDownloadStatus(downloadId) {
         const interval = 2000; // 2 segundos
         const timeout = 300000; // 5 minutos
         
@@ -0,0 +1,401 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app, send_file
+
+from config import Config
+
+
+# Subdiretórios de root que não são downloads
+LEASES_DIR = '.leases'
+REMOVING_PREFIX = '.removing-'
+
+
+class StorageManager:
+    """
+    Dono dos diretórios de download: cota em bytes, idade máxima e remoção LRU
+
+    As proteções (leases) são arquivos em root/.leases, um por lease, com o
+    mtime no horário de expiração: valem para todos os workers da máquina, e
+    as de um processo que morreu expiram sozinhas (lease_ttl).
+    """
+
+    def __init__(self, root=None, quota_bytes=None, max_age=None, enforce_interval=None, lease_ttl=None):
+        """
+        Inicializar o gerenciador
+
+        Args:
+            root (str): Diretório raiz onde todos os downloads são criados
+            quota_bytes (int): Espaço máximo ocupado pelos downloads
+            max_age (int): Segundos desde o último envio até o diretório expirar
+            enforce_interval (int): Intervalo mínimo entre varreduras automáticas
+            lease_ttl (int): Segundos até um lease não liberado expirar
+        """
+        config = Config.STORAGE_CONFIG
+        self.root = os.path.abspath(root or config['root'])
+        self.quota_bytes = quota_bytes or config['quota_bytes']
+        self.max_age = max_age or config['max_age']
+        self.enforce_interval = enforce_interval if enforce_interval is not None else config['enforce_interval']
+        self.lease_ttl = lease_ttl or config['lease_ttl']
+        self.leases_dir = os.path.join(self.root, LEASES_DIR)
+
+        self._lock = threading.Lock()
+        self._leases = {}  # Diretório -> arquivos de lease deste processo
+        self._last_enforce = 0.0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+        os.makedirs(self.leases_dir, exist_ok=True)
+
+    def owns(self, path):
+        """Verificar se o caminho está dentro de um diretório de download gerenciado"""
+        return self._entry_dir(path) is not None
+
+    def create_dir(self):
+        """
+        Criar diretório de download (já com lease: não é removido até release())
+
+        Returns:
+            str: Caminho do diretório
+        """
+        self.maybe_enforce()
+        # Lease antes do diretório: outro worker não remove o diretório recém-criado
+        path = os.path.join(self.root, f'dl_{uuid.uuid4().hex}')
+        self._add_lease(path)
+        os.mkdir(path)
+        return path
+
+    @contextmanager
+    def download_dir(self):
+        """Diretório de download temporariamente protegido; removido se o bloco falhar"""
+        path = self.create_dir()
+        try:
+            yield path
+        except BaseException:
+            self.release(path)
+            self.remove(path)
+            raise
+        self.release(path)
+        self.maybe_enforce(force=True)
+
+    def acquire(self, path, expires_in=None):
+        """
+        Proteger o diretório do arquivo contra remoção (ex.: enquanto é servido)
+
+        Também marca o diretório como usado agora (ordem LRU).
+
+        Args:
+            path (str): Arquivo ou diretório gerenciado
+            expires_in (int): Lease sem release(), que só expira após esses segundos
+                (ex.: X-Sendfile, em que o proxy lê o arquivo depois da resposta)
+
+        Returns:
+            bool: False se o caminho não é gerenciado ou não existe mais
+        """
+        entry = self._entry_dir(path)
+        if entry is None or not os.path.exists(path):
+            return False
+        marker = self._add_lease(entry, expires_in)
+        # Conferir depois do lease: remove() renomeia antes de conferir os leases
+        if not os.path.exists(path):
+            self._remove_marker(marker)
+            if expires_in is None:
+                self._forget(entry, marker)
+            return False
+        self.touch(entry)
+        return True
+
+    def release(self, path):
+        """Liberar uma proteção obtida com create_dir()/acquire()"""
+        entry = self._entry_dir(path)
+        with self._lock:
+            markers = self._leases.get(entry)
+            marker = markers.pop() if markers else None
+            if not markers:
+                self._leases.pop(entry, None)
+        if marker:
+            self._remove_marker(marker)
+
+    def _add_lease(self, entry, expires_in=None):
+        """Criar o arquivo de lease (mtime = expiração); só os sem expires_in são liberáveis"""
+        marker = os.path.join(self.leases_dir, f'{os.path.basename(entry)}.{os.getpid()}.{uuid.uuid4().hex[:8]}')
+        expires = time.time() + (expires_in or self.lease_ttl)
+        with open(marker, 'w'):
+            pass
+        os.utime(marker, (expires, expires))
+        if expires_in is None:
+            with self._lock:
+                self._leases.setdefault(entry, []).append(marker)
+        return marker
+
+    def _forget(self, entry, marker):
+        with self._lock:
+            markers = self._leases.get(entry, [])
+            if marker in markers:
+                markers.remove(marker)
+            if not markers:
+                self._leases.pop(entry, None)
+
+    @staticmethod
+    def _remove_marker(marker):
+        try:
+            os.remove(marker)
+        except OSError:
+            pass
+
+    def leased(self, now=None):
+        """
+        Nomes dos diretórios com lease válido (em qualquer processo)
+
+        Leases expirados são apagados.
+        """
+        now = now or time.time()
+        names = set()
+        try:
+            markers = os.listdir(self.leases_dir)
+        except OSError:
+            return names
+        for marker in markers:
+            path = os.path.join(self.leases_dir, marker)
+            try:
+                expires = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if expires > now:
+                names.add(marker.split('.', 1)[0])
+            else:
+                self._remove_marker(path)
+        return names
+
+    def touch(self, path):
+        """Atualizar o horário de último uso (mtime do diretório, visível a outros processos)"""
+        entry = self._entry_dir(path)
+        if entry is not None:
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+
+    def remove(self, path):
+        """
+        Remover o diretório de download que contém o caminho (se não estiver protegido)
+
+        Returns:
+            bool: True se removido
+        """
+        entry = self._entry_dir(path)
+        if entry is None or not os.path.isdir(entry):
+            return False
+        name = os.path.basename(entry)
+        if name in self.leased():
+            return False
+        # Renomear e só então conferir de novo: um acquire() concorrente ou vê
+        # o diretório sumir ou cria o lease antes desta segunda conferência
+        removing = os.path.join(self.root, f'{REMOVING_PREFIX}{int(time.time())}-{name}')
+        try:
+            os.rename(entry, removing)
+        except OSError:
+            return False  # Ex.: arquivo aberto no Windows
+        if name in self.leased():
+            try:
+                os.rename(removing, entry)
+            except OSError as e:
+                print(f"[Storage] Erro ao restaurar {entry}: {e}")
+            return False
+        size = self._dir_size(removing)
+        shutil.rmtree(removing, ignore_errors=True)
+        with self._lock:
+            self.evictions += 1
+            self.evicted_bytes += size
+        return True
+
+    def maybe_enforce(self, force=False):
+        """Aplicar cota/idade no máximo a cada enforce_interval (ou sempre com force)"""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_enforce < self.enforce_interval:
+                return
+            self._last_enforce = now
+        self.enforce(now)
+
+    def enforce(self, now=None):
+        """
+        Remover diretórios expirados e, se a cota for excedida, os menos usados recentemente
+
+        Diretórios protegidos (em download ou sendo servidos) nunca são removidos.
+
+        Returns:
+            int: Quantidade de diretórios removidos
+        """
+        now = now or time.time()
+        self._purge_removing(now)
+        entries = self._scan()
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+
+        # Mais antigos (último uso) primeiro
+        for path, size, last_used in sorted(entries, key=lambda e: e[2]):
+            expired = now - last_used > self.max_age
+            if not expired and total <= self.quota_bytes:
+                break
+            if self.remove(path):
+                removed += 1
+                total -= size
+                print(f"[Storage] Removido {path} ({size} bytes, {'expirado' if expired else 'cota'})")
+
+        if total > self.quota_bytes:
+            print(f"[Storage] Cota excedida por arquivos em uso: {total}/{self.quota_bytes} bytes")
+        return removed
+
+    def _purge_removing(self, now, grace=3600):
+        """Apagar restos de remoções interrompidas (processo morto no meio do rmtree)"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            if not name.startswith(REMOVING_PREFIX):
+                continue
+            try:
+                started = int(name[len(REMOVING_PREFIX):].split('-', 1)[0])
+            except ValueError:
+                continue
+            if now - started > grace:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def stats(self):
+        """Uso atual do armazenamento"""
+        entries = self._scan()
+        leased = len(self.leased() & {os.path.basename(path) for path, _, _ in entries})
+        with self._lock:
+            evictions, evicted_bytes = self.evictions, self.evicted_bytes
+        return {
+            'root': self.root,
+            'quota_bytes': self.quota_bytes,
+            'used_bytes': sum(size for _, size, _ in entries),
+            'directories': len(entries),
+            'leased': leased,
+            'max_age': self.max_age,
+            'evictions': evictions,
+            'evicted_bytes': evicted_bytes,
+        }
+
+    def _entry_dir(self, path):
+        """Diretório de download (filho direto de root) que contém o caminho"""
+        if not path:
+            return None
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, self.root)
+        if relative == '.' or relative.startswith('..'):
+            return None
+        return os.path.join(self.root, relative.split(os.sep, 1)[0])
+
+    def _scan(self):
+        """Listar (caminho, bytes, último uso) dos diretórios de download"""
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+        for name in names:
+            if name.startswith('.'):
+                continue  # .leases e remoções em andamento
+            path = os.path.join(self.root, name)
+            try:
+                if not os.path.isdir(path):
+                    continue
+                entries.append((path, self._dir_size(path), os.stat(path).st_mtime))
+            except OSError:
+                continue
+        return entries
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+
+def file_etag(filepath):
+    """
+    ETag forte a partir da identidade do arquivo no disco
+
+    Usa dispositivo, inode, tamanho e mtime em nanossegundos: igual em todos
+    os workers da máquina e diferente se o arquivo for baixado de novo.
+    """
+    st = os.stat(filepath)
+    identity = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def configure_file_serving(app):
+    """Aplicar a configuração de envio de arquivos a um app Flask"""
+    app.config['USE_X_SENDFILE'] = Config.FILE_SERVING_CONFIG['use_x_sendfile']
+
+
+def send_managed_file(filepath, download_name):
+    """
+    Enviar arquivo gerenciado, protegido contra remoção até ser aberto
+
+    O lease cobre a verificação e a abertura do arquivo (send_file abre na
+    hora) e é liberado antes de retornar: o Werkzeug não chama call_on_close
+    em respostas de arquivo (direct_passthrough). Depois disso uma remoção
+    não interrompe o envio: no POSIX o descritor aberto mantém o conteúdo,
+    e no Windows o rename de remove() falha com o arquivo aberto. Com
+    X-Sendfile o proxy lê o arquivo depois da resposta, então o lease só
+    expira após x_sendfile_lease. A resposta é
+    condicional: Range/If-Range retomam transferências interrompidas (206),
+    If-None-Match/If-Modified-Since respondem 304, e o corpo usa
+    wsgi.file_wrapper (sendfile) ou X-Sendfile quando disponíveis.
+
+    Args:
+        filepath (str): Caminho do arquivo
+        download_name (str): Nome sugerido ao navegador
+
+    Returns:
+        flask.Response: Resposta com o arquivo, ou None se ele não existe mais
+    """
+    storage = get_storage_manager()
+    x_sendfile = current_app.config.get('USE_X_SENDFILE')
+    expires_in = Config.FILE_SERVING_CONFIG['x_sendfile_lease'] if x_sendfile else None
+    managed = storage.acquire(filepath, expires_in)
+    try:
+        if not os.path.exists(filepath):
+            return None
+        response = send_file(
+            filepath,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=file_etag(filepath),
+            max_age=Config.FILE_SERVING_CONFIG['max_age'],
+        )
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+    finally:
+        if managed and not x_sendfile:
+            storage.release(filepath)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_storage_manager():
+    """Retornar o StorageManager compartilhado do processo"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = StorageManager()
+        return _manager
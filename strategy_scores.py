@@ -0,0 +1,263 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS strategy_scores (
+    scope TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    player_client TEXT NOT NULL,
+    country TEXT NOT NULL,
+    user_agent TEXT NOT NULL,
+    successes REAL NOT NULL DEFAULT 0,
+    failures REAL NOT NULL DEFAULT 0,
+    avg_latency REAL,
+    last_error_class TEXT,
+    last_success REAL,
+    last_failure REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (scope, strategy, player_client, country, user_agent)
+);
+"""
+
+# Colunas que podem ser ordenadas/filtradas (dimensões do bandit)
+DIMENSIONS = ('strategy', 'player_client', 'country', 'user_agent')
+
+# Classes de erro: (classe, trechos da mensagem em minúsculas)
+ERROR_CLASSES = (
+    ('bot_check', ('confirm you', 'not a bot', 'sign in to confirm')),
+    ('rate_limited', ('429', 'too many requests', 'rate limit')),
+    ('geo_blocked', ('not available in your country', 'geo restrict', 'geo-restrict')),
+    ('unavailable', ('video unavailable', 'private video', 'has been removed', 'members-only')),
+    ('format', ('requested format', 'no video formats')),
+    ('network', ('timed out', 'timeout', 'connection', 'temporary failure', 'ssl')),
+)
+
+# Erros que não dependem da estratégia (o vídeo não existe): não contam como falha
+NEUTRAL_ERRORS = ('unavailable',)
+
+
+def classify_error(error):
+    """
+    Classificar um erro do yt-dlp
+
+    Returns:
+        str: bot_check, rate_limited, geo_blocked, unavailable, format, network ou other
+    """
+    message = str(error).lower()
+    for error_class, needles in ERROR_CLASSES:
+        if any(needle in message for needle in needles):
+            return error_class
+    return 'other'
+
+
+def _client_key(player_client):
+    """player_client (lista ou str) como texto para a tabela"""
+    if isinstance(player_client, (list, tuple)):
+        return ','.join(player_client)
+    return player_client or ''
+
+
+class StrategyScorer:
+    """Bandit (amostragem de Thompson) sobre os resultados das estratégias anti-bot"""
+
+    def __init__(self, db_path=None, half_life=None, latency_scale=None):
+        """
+        Inicializar o scorer
+
+        Args:
+            db_path (str): Caminho do banco SQLite
+            half_life (int): Segundos para um resultado perder metade do peso
+            latency_scale (float): Latência (s) que reduz o score de uma estratégia à metade
+        """
+        config = Config.STRATEGY_SCORES_CONFIG
+        self.db_path = db_path or config['db_path']
+        self.half_life = half_life or config['half_life']
+        self.latency_scale = latency_scale or config['latency_scale']
+
+        self._local = threading.local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        """Conexão SQLite da thread atual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _decay(self, updated_at, now):
+        """Fator de esquecimento desde a última atualização"""
+        return 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+
+    def record(self, scope, strategy, player_client, country, user_agent, success, latency=None, error=None):
+        """
+        Registrar o resultado de uma tentativa
+
+        Args:
+            scope (str): Quem tentou (ex.: 'youtube_ultimate')
+            strategy (str): Nome da estratégia
+            player_client (list|str): Player clients do YouTube usados
+            country (str): País do geo-bypass
+            user_agent (str): User-Agent usado
+            success (bool): Se a tentativa funcionou
+            latency (float): Duração da tentativa em segundos
+            error (Exception|str): Erro da tentativa (para a classe de erro)
+
+        Returns:
+            str: Classe do erro (None em caso de sucesso)
+        """
+        error_class = None if success else classify_error(error)
+        now = time.time()
+        key = (scope, strategy, _client_key(player_client), country or '', user_agent or '')
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT successes, failures, avg_latency, updated_at FROM strategy_scores "
+                "WHERE scope = ? AND strategy = ? AND player_client = ? AND country = ? AND user_agent = ?",
+                key,
+            ).fetchone()
+            successes, failures, avg_latency, updated_at = row or (0.0, 0.0, None, now)
+            decay = self._decay(updated_at, now)
+            successes *= decay
+            failures *= decay
+            if success:
+                successes += 1
+                if latency is not None:
+                    avg_latency = latency if avg_latency is None else 0.7 * avg_latency + 0.3 * latency
+            elif error_class not in NEUTRAL_ERRORS:
+                failures += 1
+
+            conn.execute(
+                "INSERT INTO strategy_scores (scope, strategy, player_client, country, user_agent, "
+                "successes, failures, avg_latency, last_error_class, last_success, last_failure, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(scope, strategy, player_client, country, user_agent) DO UPDATE SET "
+                "successes = excluded.successes, failures = excluded.failures, avg_latency = excluded.avg_latency, "
+                "last_error_class = COALESCE(excluded.last_error_class, last_error_class), "
+                "last_success = COALESCE(excluded.last_success, last_success), "
+                "last_failure = COALESCE(excluded.last_failure, last_failure), "
+                "updated_at = excluded.updated_at",
+                key + (
+                    successes, failures, avg_latency, error_class,
+                    now if success else None, None if success else now, now,
+                ),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return error_class
+
+    def totals(self, scope, field, **filters):
+        """
+        Contagens (com esquecimento) agrupadas por uma dimensão
+
+        Args:
+            scope (str): Escopo
+            field (str): Dimensão agrupada (uma de DIMENSIONS)
+            **filters: Igualdade em outras dimensões (ex.: strategy='Minimal')
+
+        Returns:
+            dict: valor -> {'successes', 'failures', 'avg_latency'}
+        """
+        if field not in DIMENSIONS or not set(filters) <= set(DIMENSIONS):
+            raise ValueError(f"Dimensão inválida: {field} {list(filters)}")
+        where = ' AND '.join(['scope = ?'] + [f"{name} = ?" for name in filters])
+        params = [scope] + [_client_key(v) if k == 'player_client' else v for k, v in filters.items()]
+        rows = self._conn().execute(
+            f"SELECT {field}, successes, failures, avg_latency, updated_at FROM strategy_scores WHERE {where}",
+            params,
+        ).fetchall()
+
+        now = time.time()
+        totals = {}
+        for value, successes, failures, avg_latency, updated_at in rows:
+            decay = self._decay(updated_at, now)
+            entry = totals.setdefault(value, {'successes': 0.0, 'failures': 0.0, 'avg_latency': None})
+            entry['successes'] += successes * decay
+            entry['failures'] += failures * decay
+            if avg_latency is not None:
+                previous = entry['avg_latency']
+                entry['avg_latency'] = avg_latency if previous is None else min(previous, avg_latency)
+        return totals
+
+    def rank(self, scope, field, candidates, **filters):
+        """
+        Ordenar candidatos por amostragem de Thompson
+
+        Cada candidato recebe uma amostra Beta(sucessos + 1, falhas + 1),
+        penalizada pela latência média. Estratégias falhando há horas quase
+        nunca ficam na frente; candidatos sem histórico ainda são explorados.
+
+        Returns:
+            list: candidates reordenados (melhor primeiro)
+        """
+        totals = self.totals(scope, field, **filters)
+
+        def sample(candidate):
+            entry = totals.get(candidate, {})
+            value = random.betavariate(entry.get('successes', 0) + 1, entry.get('failures', 0) + 1)
+            if entry.get('avg_latency'):
+                value /= 1 + entry['avg_latency'] / self.latency_scale
+            return value
+
+        samples = {id(candidate): sample(candidate) for candidate in candidates}
+        return sorted(candidates, key=lambda candidate: samples[id(candidate)], reverse=True)
+
+    def choose(self, scope, field, candidates, **filters):
+        """Melhor candidato segundo rank()"""
+        return self.rank(scope, field, candidates, **filters)[0]
+
+    def report(self, scope=None):
+        """
+        Scores atuais (com esquecimento aplicado), melhores primeiro
+
+        Returns:
+            list: Uma linha por (escopo, estratégia, player_client, país, User-Agent)
+        """
+        query = "SELECT * FROM strategy_scores"
+        params = ()
+        if scope:
+            query += " WHERE scope = ?"
+            params = (scope,)
+        conn = self._conn()
+        cursor = conn.execute(query, params)
+        columns = [c[0] for c in cursor.description]
+
+        now = time.time()
+        rows = []
+        for values in cursor.fetchall():
+            row = dict(zip(columns, values))
+            decay = self._decay(row['updated_at'], now)
+            row['successes'] = round(row['successes'] * decay, 3)
+            row['failures'] = round(row['failures'] * decay, 3)
+            row['score'] = round((row['successes'] + 1) / (row['successes'] + row['failures'] + 2), 3)
+            rows.append(row)
+        rows.sort(key=lambda r: (r['scope'], -r['score']))
+        return rows
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_strategy_scorer():
+    """Retornar o StrategyScorer compartilhado do processo"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = StrategyScorer()
+        return _scorer
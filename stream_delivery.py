@@ -0,0 +1,155 @@
+import mimetypes
+import queue
+import threading
+
+from yt_dlp.networking import Request
+
+# Protocolos que podem ser repassados byte a byte (arquivo progressivo único)
+STREAMABLE_PROTOCOLS = ('http', 'https')
+
+
+def resolve_progressive_format(ydl, info):
+    """
+    Selecionar o formato e verificar se pode ser repassado diretamente
+
+    O streaming só é possível quando o resultado é um único arquivo
+    progressivo via HTTP, sem merge de streams nem pós-processamento.
+
+    Args:
+        ydl (yt_dlp.YoutubeDL): Instância com as opções do download
+        info (dict): Info dict (de extract_info sem download ou do cache)
+
+    Returns:
+        dict: Info dict com o formato selecionado, ou None se precisar de mux/transcode
+    """
+    if ydl.params.get('postprocessors') or ydl.params.get('external_downloader'):
+        return None
+
+    processed = ydl.process_ie_result(info, download=False)
+    if not processed or processed.get('_type', 'video') != 'video':
+        return None
+    if processed.get('requested_formats'):
+        return None
+    if processed.get('protocol') not in STREAMABLE_PROTOCOLS or not processed.get('url'):
+        return None
+    return processed
+
+
+class ChunkPipe:
+    """Buffer limitado entre o download do upstream e a resposta HTTP"""
+
+    _END = object()
+
+    def __init__(self, max_chunks=8):
+        """
+        Args:
+            max_chunks (int): Quantidade máxima de blocos em memória
+        """
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._closed = threading.Event()
+        self._ready = threading.Event()
+        self._finished = False
+        self.headers = None
+        self.error = None
+        self.bytes_sent = 0
+
+    def announce(self, headers):
+        """Informar que o streaming vai começar (headers=None = usar fallback)"""
+        if not self._ready.is_set():
+            self.headers = headers
+            self._ready.set()
+
+    def wait_ready(self, timeout=None):
+        """Aguardar a decisão do produtor; retorna os headers ou None"""
+        self._ready.wait(timeout)
+        return self.headers
+
+    def put(self, chunk):
+        """
+        Enfileirar um bloco (bloqueia se o buffer estiver cheio)
+
+        Returns:
+            bool: False se o cliente desconectou
+        """
+        while not self._closed.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def finish(self, error=None):
+        """Sinalizar fim dos dados (chamadas repetidas são ignoradas)"""
+        if self._finished:
+            return
+        self._finished = True
+        self.error = error
+        self.announce(None)
+        while not self._closed.is_set():
+            try:
+                self._queue.put(self._END, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """Cliente desconectou ou resposta terminou"""
+        self._closed.set()
+
+    def __iter__(self):
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is self._END:
+                    if self.error is not None:
+                        print(f"[Stream] Streaming interrompido: {self.error}")
+                    return
+                self.bytes_sent += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+
+def pump_format(ydl, fmt, pipe, download_name, chunk_size=256 * 1024):
+    """
+    Repassar o arquivo do upstream para o pipe em blocos
+
+    Abre a conexão, anuncia os headers da resposta (Content-Type,
+    Content-Length quando conhecido) e lê enquanto o cliente consome.
+
+    Args:
+        ydl (RateLimitedYoutubeDL): Instância usada para a conexão (mesmos headers/cookies)
+        fmt (dict): Formato retornado por resolve_progressive_format
+        pipe (ChunkPipe): Buffer compartilhado com a resposta
+        download_name (str): Nome do arquivo para Content-Disposition
+        chunk_size (int): Tamanho de cada leitura
+
+    Returns:
+        int: Bytes lidos do upstream
+    """
+    with ydl.media_requests():
+        response = ydl.urlopen(Request(fmt['url'], headers=fmt.get('http_headers') or {}))
+    total = 0
+    try:
+        mimetype = mimetypes.guess_type(download_name)[0] or f"video/{fmt.get('ext', 'mp4')}"
+        headers = {
+            'Content-Type': mimetype,
+            'Content-Disposition': f'attachment; filename="{download_name}"',
+        }
+        length = response.get_header('Content-Length')
+        if length and not response.get_header('Content-Encoding'):
+            headers['Content-Length'] = length
+        pipe.announce(headers)
+
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            total += len(chunk)
+            if not pipe.put(chunk):
+                print(f"[Stream] Cliente desconectou após {total} bytes")
+                break
+    finally:
+        response.close()
+    return total
@@ -0,0 +1,84 @@
+"""
+Testes do StorageManager: leases em disco e envio de arquivos gerenciados
+
+Rodar com: python -m pytest test_storage_manager.py (ou python test_storage_manager.py)
+"""
+import os
+import tempfile
+
+from flask import Flask
+from werkzeug.test import run_wsgi_app
+
+import storage_manager
+from storage_manager import StorageManager, send_managed_file
+
+
+def _setup(x_sendfile=False):
+    """StorageManager em um root temporário com um download concluído e um app que o serve"""
+    storage = StorageManager(root=tempfile.mkdtemp(), quota_bytes=10 ** 9, max_age=3600, enforce_interval=0)
+    storage_manager._manager = storage
+    with storage.download_dir() as directory:
+        filepath = os.path.join(directory, 'video.mp4')
+        with open(filepath, 'wb') as f:
+            f.write(b'x' * 4096)
+
+    app = Flask(__name__)
+    app.config['USE_X_SENDFILE'] = x_sendfile
+
+    @app.route('/file')
+    def serve():
+        return send_managed_file(filepath, 'video.mp4')
+
+    return storage, app, directory
+
+
+def test_remove_after_serving_with_test_client():
+    storage, app, directory = _setup()
+    response = app.test_client().get('/file')
+    assert response.status_code == 200 and len(response.data) == 4096
+    response.close()
+    assert os.listdir(storage.leases_dir) == []
+    assert storage.remove(directory)
+    assert not os.path.exists(directory)
+
+
+def test_remove_after_serving_with_wsgi_app():
+    storage, app, directory = _setup()
+    app_iter, status, _ = run_wsgi_app(app.wsgi_app, {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/file', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http',
+    })
+    body = b''.join(app_iter)
+    app_iter.close()
+    assert status.startswith('200') and len(body) == 4096
+    assert storage.remove(directory)
+    assert storage._leases == {}
+
+
+def test_directory_protected_while_downloading():
+    storage = StorageManager(root=tempfile.mkdtemp(), quota_bytes=1, max_age=3600, enforce_interval=0)
+    other_worker = StorageManager(root=storage.root, quota_bytes=1, max_age=3600, enforce_interval=0)
+    directory = storage.create_dir()
+    with open(os.path.join(directory, 'video.mp4'), 'wb') as f:
+        f.write(b'x' * 4096)
+    assert not other_worker.remove(directory)
+    storage.release(directory)
+    assert other_worker.remove(directory)
+
+
+def test_x_sendfile_lease_expires():
+    storage, app, directory = _setup(x_sendfile=True)
+    response = app.test_client().get('/file')
+    assert response.headers.get('X-Sendfile')
+    # O proxy ainda vai ler o arquivo: protegido até o lease expirar
+    assert not storage.remove(directory)
+    later = os.path.getmtime(os.path.join(storage.leases_dir, os.listdir(storage.leases_dir)[0])) + 1
+    assert storage.leased(now=later) == set()
+    assert storage.remove(directory)
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
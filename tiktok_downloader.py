@@ -1,9 +1,13 @@
 import os
 import re
-import yt_dlp
 from pathlib import Path
 import json
 
+from batch_download import download_batch, legacy_results
+from extractor_scope import ScopedYoutubeDL
+from info_cache import download_with_cached_info, get_info_cache
+from ydl_pool import get_ydl_pool
+
 
 class TikTokDownloader:
     """Downloader para TikTok - Vídeos Virais"""
@@ -23,14 +27,11 @@ class TikTokDownloader:
             dict: Informações do vídeo
         """
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
+            def extract():
+                with get_ydl_pool().lease(self.platform, quiet=True, no_warnings=True) as ydl:
+                    return ydl.extract_info(url, download=False)
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+            info = get_info_cache().get_or_extract(url, self.platform, extract)
                 
             # Processar informações específicas do TikTok
             processed_info = {
@@ -71,36 +72,15 @@ class TikTokDownloader:
             # Configurar nome do arquivo de saída
             output_template = os.path.join(output_path, '%(uploader)s_%(title)s.%(ext)s')
             
-            # Configurações do yt-dlp para TikTok - CODEC COMPATÍVEL
-            ydl_opts = {
-                'format': 'best[vcodec^=avc1]/best[vcodec^=h264]/best[ext=mp4]/best',  # Priorizar H.264/MP4
-                'outtmpl': output_template,
-                'writeinfojson': False,
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-                'ignoreerrors': False,
-                'no_warnings': False,
-                'embed_subs': False,
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',
-                }],
-                'postprocessor_args': [
-                    '-c:v', 'libx264',  # Forçar codec H.264
-                    '-c:a', 'aac',      # Forçar áudio AAC
-                    '-preset', 'fast',   # Conversão rápida
-                ],
-            }
-            
-            # Adicionar hook de progresso se fornecido
-            if progress_hook:
-                ydl_opts['progress_hooks'] = [progress_hook]
-            
-            # Executar download
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Executar download (instância do pool com o perfil da plataforma)
+            with get_ydl_pool().lease(
+                self.platform,
+                outtmpl=output_template,
+                progress_hooks=[progress_hook] if progress_hook else [],
+            ) as ydl:
                 print(f"Iniciando download do TikTok: {url}")
                 print("Formato: Melhor qualidade disponível (original)")
-                ydl.download([url])
+                download_with_cached_info(ydl, url, self.platform)
                 
             print("Download do TikTok concluído com sucesso!")
             return True
@@ -113,31 +93,26 @@ class TikTokDownloader:
         """
         Baixar múltiplos vídeos do TikTok no formato original
         
+        As URLs são deduplicadas e baixadas em paralelo (limite por plataforma
+        em Config.BATCH_CONFIG).
+        
         Args:
             urls (list): Lista de URLs do TikTok
             output_path (str): Caminho para salvar
             progress_hook (callable): Função de callback para progresso
             
         Returns:
-            dict: Resultados do download (sucessos e falhas)
+            dict: Resultados do download (sucessos, falhas e manifesto do batch)
         """
-        results = {'success': [], 'failed': []}
-        
-        for i, url in enumerate(urls, 1):
-            try:
-                print(f"Baixando vídeo {i}/{len(urls)}: {url}")
-                success = self.download_video(url, output_path, progress_hook)
-                
-                if success:
-                    results['success'].append(url)
-                else:
-                    results['failed'].append(url)
-                    
-            except Exception as e:
-                print(f"Erro ao baixar {url}: {e}")
-                results['failed'].append(url)
+        def download(url, platform, quality, format_type):
+            return self.download_video(url, output_path, progress_hook)
         
-        return results
+        print(f"Baixando {len(urls)} URLs do TikTok em paralelo")
+        manifest = download_batch(
+            urls, download, platform=self.platform,
+            on_result=lambda entry: print(f"[Batch] {entry['status']}: {entry['url']}")
+        )
+        return legacy_results(manifest)
     
     def validate_url(self, url):
         """
@@ -269,7 +244,7 @@ class TikTokDownloader:
                 'extract_flat': False,
             }
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with ScopedYoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
                 
             result = {
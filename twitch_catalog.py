@@ -0,0 +1,243 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from info_cache import get_info_cache, normalize_url
+from ydl_pool import get_ydl_pool
+
+PLATFORM = 'Twitch'
+
+# Campos copiados da extração completa para a entrada da listagem
+DETAIL_FIELDS = ('upload_date', 'timestamp', 'uploader', 'uploader_id', 'description', 'view_count', 'duration')
+
+
+def channel_url(username):
+    """URL da lista de vídeos do canal"""
+    return f"https://www.twitch.tv/{username}/videos"
+
+
+def best_thumbnail(entry):
+    """Thumbnail principal ou a de maior resolução da lista"""
+    if entry.get('thumbnail'):
+        return entry['thumbnail']
+    valid = [t for t in entry.get('thumbnails') or [] if (t.get('url') or '').startswith('http')]
+    if not valid:
+        return None
+    return max(valid, key=lambda t: (t.get('width') or 0) * (t.get('height') or 0))['url']
+
+
+class TwitchVodCatalog:
+    """Listagem de VODs por usuário: passada flat em cache (TTL) e detalhes sob demanda"""
+
+    def __init__(self, ttl=None, max_users=None, enrich_workers=None):
+        """
+        Inicializar o catálogo
+
+        Args:
+            ttl (int): Segundos que a listagem de um usuário fica em cache
+            max_users (int): Usuários mantidos em cache (LRU)
+            enrich_workers (int): Extrações de detalhes em paralelo
+        """
+        config = Config.TWITCH_CATALOG_CONFIG
+        self.ttl = ttl or config['ttl']
+        self.max_users = max_users or config['max_users']
+        self.enrich_workers = enrich_workers or config['enrich_workers']
+
+        self._lock = threading.Lock()
+        self._listings = OrderedDict()
+        self._inflight = {}
+
+    def list_vods(self, username, max_vods=10, refresh=False):
+        """
+        VODs mais recentes do usuário (id, título, thumbnail, duração, views)
+
+        Uma única requisição de listagem, sem extrair cada VOD. Buscas
+        repetidas dentro do TTL (com max_vods igual ou menor) não tocam a rede;
+        buscas simultâneas do mesmo usuário compartilham a extração.
+
+        Args:
+            username (str): Nome do usuário do Twitch
+            max_vods (int): Quantidade máxima de VODs
+            refresh (bool): Ignorar o cache
+
+        Returns:
+            list: Cópia das entradas (ver _vod_entry)
+        """
+        key = username.lower()
+        while True:
+            with self._lock:
+                cached = self._listings.get(key)
+                if (not refresh and cached and time.time() - cached['at'] < self.ttl
+                        and (cached['complete'] or len(cached['vods']) >= max_vods)):
+                    self._listings.move_to_end(key)
+                    return copy.deepcopy(cached['vods'][:max_vods])
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            # Outra thread está listando o mesmo usuário: aguardar e reaproveitar
+            event.wait()
+            refresh = False
+
+        try:
+            vods, complete = self._fetch(username, max_vods)
+            with self._lock:
+                self._listings[key] = {'vods': vods, 'complete': complete, 'at': time.time()}
+                self._listings.move_to_end(key)
+                while len(self._listings) > self.max_users:
+                    self._listings.popitem(last=False)
+            return copy.deepcopy(vods)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def enrich(self, vods):
+        """
+        Completar VODs com os detalhes da extração completa (data, autor, descrição)
+
+        Cada pedido é casado pelo id ou pela URL com a entrada da listagem em
+        cache; a resposta é montada só com essa entrada e com a extração
+        (nada além do id/URL do pedido é usado). As extrações rodam em
+        paralelo e ficam no InfoCache; os DETAIL_FIELDS extraídos também são
+        gravados na listagem em cache do usuário.
+
+        Args:
+            vods (list): Entradas de list_vods, dicts com 'id'/'url' ou URLs
+
+        Returns:
+            list: Novas entradas, na ordem pedida
+        """
+        entries = [self._entry_for(vod) for vod in vods]
+        pending = [entry for entry in entries if not entry.get('enriched') and entry.get('url')]
+        if not pending:
+            return entries
+        with ThreadPoolExecutor(max_workers=min(self.enrich_workers, len(pending)), thread_name_prefix='twitch-enrich') as executor:
+            for entry, info in zip(pending, executor.map(self._extract, pending)):
+                if not info:
+                    continue
+                details = {field: info.get(field) for field in DETAIL_FIELDS if info.get(field) is not None}
+                details['duration'] = int(details.get('duration') or entry.get('duration') or 0)
+                self._store_details(entry, details)
+                entry.update(details, enriched=True)
+                # VOD fora da listagem em cache: identificação também vem da extração
+                entry.setdefault('id', info.get('id', 'N/A'))
+                entry.setdefault('title', info.get('title') or 'VOD sem título')
+                if not entry.get('thumbnail'):
+                    entry['thumbnail'] = best_thumbnail(info)
+        return entries
+
+    def details(self, vod_url):
+        """
+        Info completo de um VOD (formatos inclusos), via InfoCache
+
+        Returns:
+            dict: Info dict do yt-dlp
+        """
+        def extract():
+            with get_ydl_pool().lease(PLATFORM, quiet=True, no_warnings=True) as ydl:
+                return ydl.extract_info(vod_url, download=False)
+
+        return get_info_cache().get_or_extract(vod_url, PLATFORM, extract)
+
+    def cached(self, username):
+        """Listagem em cache do usuário (None se ausente/expirada)"""
+        with self._lock:
+            cached = self._listings.get(username.lower())
+            if cached and time.time() - cached['at'] < self.ttl:
+                return copy.deepcopy(cached['vods'])
+        return None
+
+    def invalidate(self, username=None):
+        """Descartar a listagem de um usuário (ou de todos)"""
+        with self._lock:
+            if username is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(username.lower(), None)
+
+    def _fetch(self, username, max_vods):
+        """Passada flat pela lista de vídeos do canal"""
+        started = time.time()
+        with get_ydl_pool().lease(
+            PLATFORM,
+            quiet=True,
+            no_warnings=True,
+            noplaylist=False,
+            extract_flat='in_playlist',
+            playlistend=max_vods,
+        ) as ydl:
+            info = ydl.extract_info(channel_url(username), download=False)
+
+        entries = [entry for entry in (info or {}).get('entries') or [] if entry][:max_vods]
+        vods = [self._vod_entry(i, entry, username) for i, entry in enumerate(entries, 1)]
+        print(f"[TwitchCatalog] {username}: {len(vods)} VODs listados em {time.time() - started:.2f}s")
+        return vods, len(entries) < max_vods
+
+    @staticmethod
+    def _vod_entry(index, entry, username):
+        return {
+            'index': index,
+            'id': entry.get('id', 'N/A'),
+            'title': entry.get('title') or 'VOD sem título',
+            'url': entry.get('url') or entry.get('webpage_url', ''),
+            'duration': int(entry.get('duration') or 0),
+            'upload_date': entry.get('upload_date', ''),
+            'view_count': entry.get('view_count') or 0,
+            'uploader': username,
+            'thumbnail': best_thumbnail(entry),
+            'enriched': False,
+        }
+
+    def _entry_for(self, vod):
+        """Cópia da entrada em cache do VOD pedido (por id ou URL), ou só a URL"""
+        url = vod.get('url') if isinstance(vod, dict) else vod
+        vod_id = vod.get('id') if isinstance(vod, dict) else None
+        entry = self._find(vod_id, url)
+        if entry is not None:
+            return copy.deepcopy(entry)
+        return {'url': url, 'enriched': False}
+
+    def _find(self, vod_id, url):
+        """Entrada da listagem em cache com o id ou a URL (chamado sem lock)"""
+        with self._lock:
+            return next(self._matches(vod_id, url), None)
+
+    def _matches(self, vod_id, url):
+        """Entradas em cache com o id ou a URL (chamado com lock)"""
+        key = normalize_url(url) if url else None
+        for cached in self._listings.values():
+            for entry in cached['vods']:
+                if ((vod_id and vod_id != 'N/A' and entry['id'] == vod_id)
+                        or (key and entry.get('url') and normalize_url(entry['url']) == key)):
+                    yield entry
+
+    def _extract(self, entry):
+        """Info completo do VOD (None se a extração falhar)"""
+        try:
+            return self.details(entry['url'])
+        except Exception as e:
+            print(f"[TwitchCatalog] Erro ao obter detalhes de {entry['url']}: {e}")
+            return None
+
+    def _store_details(self, entry, details):
+        """Gravar os campos extraídos na listagem em cache (buscas seguintes já vêm completas)"""
+        with self._lock:
+            for cached in self._matches(entry.get('id'), entry.get('url')):
+                cached.update(details, enriched=True)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_twitch_catalog():
+    """Retornar o TwitchVodCatalog compartilhado do processo"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = TwitchVodCatalog()
+        return _catalog
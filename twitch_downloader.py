@@ -1,10 +1,18 @@
 import os
+import math
 import re
-import yt_dlp
+from yt_dlp.utils import sanitize_filename
 from pathlib import Path
 import json
 from datetime import datetime, timedelta
 
+from config import Config
+from hls_segment import SegmentError, SegmentExtractor
+from info_cache import download_with_cached_info
+from playlist_pipeline import PlaylistPipeline
+from twitch_catalog import channel_url, get_twitch_catalog
+from ydl_pool import get_ydl_pool
+
 
 class TwitchDownloader:
     """Downloader para Twitch - VODs com busca e recorte de tempo"""
@@ -12,15 +20,22 @@ class TwitchDownloader:
     def __init__(self):
         """Inicializar o downloader do Twitch"""
         self.platform = "Twitch"
-        self.vods_cache = []
+        self.last_username = None
+        self.last_segment_report = None
         
-    def search_user_vods(self, username, max_vods=10):
+    def search_user_vods(self, username, max_vods=10, refresh=False):
         """
         Buscar VODs de um usuário do Twitch
         
+        Listagem flat (uma requisição, sem extrair cada VOD) com id, título,
+        thumbnail, duração e visualizações, em cache por usuário durante
+        Config.TWITCH_CATALOG_CONFIG['ttl']. Data e demais detalhes vêm
+        depois, sob demanda, com enrich_vods().
+        
         Args:
             username (str): Nome do usuário do Twitch
             max_vods (int): Quantidade máxima de VODs para buscar
+            refresh (bool): Ignorar a listagem em cache
             
         Returns:
             list: Lista de VODs encontrados
@@ -29,77 +44,65 @@ class TwitchDownloader:
             print(f"🔍 Buscando VODs do usuário: {username}")
             print(f"📊 Quantidade máxima: {max_vods}")
             
-            # URL do canal do usuário
-            channel_url = f"https://www.twitch.tv/{username}/videos"
+            vods = get_twitch_catalog().list_vods(username, max_vods, refresh)
+            self.last_username = username
             
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,  # Mudança: False para obter thumbnails completas
-                'playlistend': max_vods,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(channel_url, download=False)
-                
-            if not info or 'entries' not in info:
+            if not vods:
                 print("❌ Nenhum VOD encontrado")
                 return []
             
-            vods = []
-            for i, entry in enumerate(info['entries'][:max_vods], 1):
-                if entry:
-                    # Obter thumbnail do VOD - método melhorado
-                    thumbnail = None
-                    
-                    # Primeiro, tentar thumbnail principal
-                    if entry.get('thumbnail'):
-                        thumbnail = entry.get('thumbnail')
-                        print(f"[DEBUG] VOD {i}: Thumbnail principal encontrada: {thumbnail}")
-                    
-                    # Se não houver, procurar na lista de thumbnails
-                    if not thumbnail and entry.get('thumbnails'):
-                        thumbnails = entry.get('thumbnails', [])
-                        if thumbnails:
-                            # Filtrar thumbnails válidas e selecionar a melhor
-                            valid_thumbnails = [
-                                thumb for thumb in thumbnails 
-                                if thumb.get('url') and thumb['url'].startswith('http')
-                            ]
-                            
-                            if valid_thumbnails:
-                                # Priorizar por resolução (width * height)
-                                best_thumbnail = max(valid_thumbnails, key=lambda x: (
-                                    x.get('width', 0) * x.get('height', 0)
-                                ))
-                                thumbnail = best_thumbnail.get('url')
-                                print(f"[DEBUG] VOD {i}: Melhor thumbnail selecionada: {thumbnail}")
-                    
-                    if not thumbnail:
-                        print(f"[DEBUG] VOD {i}: Nenhuma thumbnail encontrada")
-                    
-                    vod = {
-                        'index': i,
-                        'id': entry.get('id', 'N/A'),
-                        'title': entry.get('title', 'VOD sem título'),
-                        'url': entry.get('url', ''),
-                        'duration': entry.get('duration', 0),
-                        'upload_date': entry.get('upload_date', ''),
-                        'view_count': entry.get('view_count', 0),
-                        'uploader': username,
-                        'thumbnail': thumbnail  # Usar thumbnail encontrada
-                    }
-                    vods.append(vod)
-            
-            self.vods_cache = vods
             print(f"✅ Encontrados {len(vods)} VODs")
-            
             return vods
             
         except Exception as e:
             print(f"❌ Erro ao buscar VODs: {e}")
             return []
     
+    def enrich_vods(self, vods):
+        """
+        Completar VODs da busca com data de upload, autor e descrição
+        
+        Extrai os detalhes em paralelo, apenas dos VODs ainda incompletos.
+        Chame só para os VODs que o usuário escolheu: cada um é uma extração.
+        
+        Args:
+            vods (list): VODs retornados por search_user_vods
+            
+        Returns:
+            list: Novas entradas com os detalhes, na mesma ordem
+        """
+        return get_twitch_catalog().enrich(vods)
+    
+    def download_user_vods(self, username, output_path, max_vods=10, quality="best", format_type="mp4", progress_hook=None, on_item=None):
+        """
+        Baixar os VODs mais recentes de um usuário do Twitch
+        
+        Lista o canal uma vez (sem extrair cada VOD), baixa os VODs em
+        paralelo e registra os concluídos no arquivo de IDs do diretório:
+        rodar de novo baixa apenas os VODs novos ou que falharam.
+        
+        Args:
+            username (str): Nome do usuário do Twitch
+            output_path (str): Caminho para salvar
+            max_vods (int): Quantidade máxima de VODs
+            quality (str): Qualidade desejada
+            format_type (str): Formato do arquivo
+            progress_hook (callable): Função de callback para progresso
+            on_item (callable): Progresso por VOD (ver PlaylistPipeline.run)
+            
+        Returns:
+            dict: Manifesto do download (None em caso de erro na listagem)
+        """
+        try:
+            print(f"📥 Baixando até {max_vods} VODs de {username}")
+            return PlaylistPipeline(self.platform).run(
+                channel_url(username), output_path, quality, format_type,
+                progress_hook=progress_hook, on_item=on_item, max_items=max_vods
+            )
+        except Exception as e:
+            print(f"❌ Erro ao baixar VODs: {e}")
+            return None
+    
     def get_vod_details(self, vod_url):
         """
         Obter detalhes completos de um VOD específico
@@ -111,14 +114,7 @@ class TwitchDownloader:
             dict: Informações detalhadas do VOD
         """
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(vod_url, download=False)
+            info = get_twitch_catalog().details(vod_url)
                 
             # Processar informações específicas do VOD
             processed_info = {
@@ -139,10 +135,14 @@ class TwitchDownloader:
             print(f"Erro ao obter detalhes do VOD: {e}")
             return None
     
-    def download_vod_segment(self, vod_url, output_path, start_time, end_time, custom_filename=None, progress_hook=None):
+    def download_vod_segment(self, vod_url, output_path, start_time, end_time, custom_filename=None, progress_hook=None,
+                             frame_accurate=None):
         """
         Baixar segmento específico de um VOD do Twitch
         
+        Baixa apenas os fragmentos HLS do intervalo (ver hls_segment); se o
+        formato não permitir, usa o ffmpeg sobre o VOD inteiro.
+        
         Args:
             vod_url (str): URL do VOD
             output_path (str): Caminho para salvar
@@ -150,6 +150,8 @@ class TwitchDownloader:
             end_time (str): Tempo de fim (formato: HH:MM:SS ou MM:SS)
             custom_filename (str): Nome personalizado do arquivo (opcional)
             progress_hook (callable): Função de callback para progresso
+            frame_accurate (bool): Cortar no frame exato reencodando só as bordas
+                (padrão: Config.SEGMENT_CONFIG['frame_accurate'])
             
         Returns:
             bool: True se sucesso, False caso contrário
@@ -184,32 +186,23 @@ class TwitchDownloader:
             print(f"   Fim: {end_time} ({end_seconds}s)")
             print(f"   Duração do segmento: {duration}s")
             
-            # Configurações do yt-dlp para Twitch com recorte
-            ydl_opts = {
-                'format': 'best[ext=mp4]/best',  # Preferir MP4
-                'outtmpl': output_template,
-                'writeinfojson': False,
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-                'ignoreerrors': False,
-                'no_warnings': False,
-                'embed_subs': False,
-                # Usar argumentos externos para ffmpeg (mais compatível)
-                'external_downloader': 'ffmpeg',
-                'external_downloader_args': {
-                    'ffmpeg_i': ['-ss', str(start_seconds), '-t', str(duration)]
-                },
-            }
-            
-            # Adicionar hook de progresso se fornecido
-            if progress_hook:
-                ydl_opts['progress_hooks'] = [progress_hook]
-            
-            # Executar download
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                print(f"🚀 Iniciando download do segmento do Twitch...")
-                ydl.download([vod_url])
-                
+            self.last_segment_report = None
+            if Config.SEGMENT_CONFIG['enabled']:
+                if frame_accurate is None:
+                    frame_accurate = Config.SEGMENT_CONFIG['frame_accurate']
+                try:
+                    info = get_twitch_catalog().details(vod_url)
+                    with get_ydl_pool().lease(self.platform, outtmpl=output_template) as ydl:
+                        print("🚀 Baixando apenas os fragmentos do segmento...")
+                        self.last_segment_report = SegmentExtractor(ydl).extract(
+                            info, start_seconds, end_seconds, frame_accurate, progress_hook
+                        )
+                    print(f"✅ Segmento salvo: {self.last_segment_report['filename']}")
+                    return True
+                except SegmentError as e:
+                    print(f"⚠️ Recorte por fragmentos indisponível ({e}), usando ffmpeg no VOD inteiro")
+            
+            self._download_segment_ffmpeg(vod_url, output_template, start_seconds, duration, progress_hook)
             print("✅ Download do segmento do Twitch concluído com sucesso!")
             return True
             
@@ -217,6 +210,118 @@ class TwitchDownloader:
             print(f"❌ Erro no download do segmento: {e}")
             return False
     
+    def download_vod_clips(self, vod_url, output_path, clips, progress_hook=None, frame_accurate=None):
+        """
+        Baixar vários recortes do mesmo VOD de uma vez
+        
+        O VOD é resolvido uma vez e cada fragmento HLS é baixado uma vez,
+        mesmo quando os recortes se sobrepõem; os recortes são gerados em
+        paralelo a partir desses fragmentos.
+        
+        Args:
+            vod_url (str): URL do VOD
+            output_path (str): Caminho para salvar
+            clips (list): (início, fim, nome) ou dicts com start/end/name; tempos
+                em HH:MM:SS, MM:SS ou segundos, nome opcional
+            progress_hook (callable): Função de callback para progresso
+            frame_accurate (bool): Cortar no frame exato reencodando só as bordas
+            
+        Returns:
+            dict: Relatório com o estado de cada recorte (ver SegmentExtractor.extract_clips)
+        """
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        if frame_accurate is None:
+            frame_accurate = Config.SEGMENT_CONFIG['frame_accurate']
+        
+        ranges = self.parse_clips(clips)
+        
+        print(f"✂️ {len(ranges)} recortes do VOD {vod_url}")
+        output_template = os.path.join(output_path, '%(uploader)s_%(title)s_%(upload_date)s.%(ext)s')
+        info = get_twitch_catalog().details(vod_url)
+        try:
+            if not Config.SEGMENT_CONFIG['enabled']:
+                raise SegmentError('desativado (SEGMENT_ENGINE=0)')
+            with get_ydl_pool().lease(self.platform, outtmpl=output_template) as ydl:
+                report = SegmentExtractor(ydl).extract_clips(info, ranges, frame_accurate, progress_hook)
+        except SegmentError as e:
+            # Sem recorte por fragmentos: um download ffmpeg por recorte
+            print(f"⚠️ Recorte por fragmentos indisponível ({e}), usando ffmpeg para cada recorte")
+            report = {'clips': [], 'fallback': str(e)}
+            for position, clip in enumerate(ranges, 1):
+                name = clip['name'] or f"{info.get('title', 'VOD')} [{clip['start']:.0f}-{clip['end']:.0f}]"
+                filename = os.path.join(output_path, sanitize_filename(os.path.splitext(str(name))[0]) + '.mp4')
+                entry = {'name': clip['name'], 'filename': filename, 'requested': [clip['start'], clip['end']]}
+                try:
+                    # filename vira outtmpl: '%' do nome ('100% clutch') não pode ser campo do template
+                    self._download_segment_ffmpeg(vod_url, filename.replace('%', '%%'), clip['start'],
+                                                  clip['end'] - clip['start'], progress_hook)
+                    entry['status'] = 'completed'
+                except Exception as error:
+                    print(f"❌ Erro no recorte {position}: {error}")
+                    entry.update(status='failed', error=str(error))
+                report['clips'].append(entry)
+            report['completed'] = sum(1 for clip in report['clips'] if clip['status'] == 'completed')
+            report['failed'] = len(report['clips']) - report['completed']
+        
+        print(f"✅ {report['completed']} recortes concluídos, {report['failed']} falhas")
+        return report
+    
+    def parse_clips(self, clips):
+        """
+        Normalizar recortes para dicts {start, end, name} com tempos em segundos
+        
+        Args:
+            clips (list): (início, fim, nome) ou dicts com start/end/name
+            
+        Returns:
+            list: Recortes normalizados
+            
+        Raises:
+            ValueError: Se algum tempo for inválido ou fora de 0 <= início < fim
+        """
+        ranges = []
+        for clip in clips:
+            if isinstance(clip, dict):
+                start, end, name = clip.get('start'), clip.get('end'), clip.get('name')
+            elif isinstance(clip, (list, tuple)):
+                start, end, name = (list(clip) + [None])[:3]
+            else:
+                raise ValueError(f"Recorte inválido: {clip!r}")
+            start, end = self._clip_seconds(start), self._clip_seconds(end)
+            if not (math.isfinite(start) and math.isfinite(end)) or start < 0 or start >= end:
+                raise ValueError(f"Recorte {len(ranges) + 1}: início deve ser maior ou igual a 0 e menor que o fim")
+            ranges.append({'start': start, 'end': end, 'name': name})
+        return ranges
+    
+    def _clip_seconds(self, value):
+        """Tempo de um recorte em segundos (aceita número ou HH:MM:SS/MM:SS)"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        value = str(value or '').strip()
+        if ':' not in value:
+            try:
+                return float(value)
+            except ValueError:
+                raise ValueError(f"Tempo inválido: {value or '(vazio)'}") from None
+        seconds = self._time_to_seconds(value)
+        if not seconds and value.strip('0:'):
+            raise ValueError(f"Tempo inválido: {value}")
+        return float(seconds)
+    
+    def _download_segment_ffmpeg(self, vod_url, output_template, start_seconds, duration, progress_hook=None):
+        """Recorte pelo ffmpeg sobre o VOD inteiro (caminho sem HLS por fragmentos)"""
+        with get_ydl_pool().lease(
+            self.platform,
+            outtmpl=output_template,
+            progress_hooks=[progress_hook] if progress_hook else [],
+            external_downloader='ffmpeg',
+            external_downloader_args={
+                'ffmpeg_i': ['-ss', str(start_seconds), '-t', str(duration)]
+            },
+        ) as ydl:
+            print(f"🚀 Iniciando download do segmento do Twitch...")
+            ydl.download([vod_url])
+    
     def _time_to_seconds(self, time_str):
         """
         Converter string de tempo para segundos
@@ -309,7 +414,7 @@ class TwitchDownloader:
         """
         title = vod.get('title', 'N/A')[:50] + '...' if len(vod.get('title', '')) > 50 else vod.get('title', 'N/A')
         duration = self._seconds_to_time(vod.get('duration', 0))
-        upload_date = vod.get('upload_date', 'N/A')
+        upload_date = vod.get('upload_date') or 'N/A'
         view_count = vod.get('view_count', 0)
         
         # Formatar data
@@ -370,9 +475,11 @@ class TwitchDownloader:
         Retornar VODs em cache da última busca
         
         Returns:
-            list: Lista de VODs em cache
+            list: Lista de VODs em cache (vazia se a busca expirou)
         """
-        return self.vods_cache
+        if not self.last_username:
+            return []
+        return get_twitch_catalog().cached(self.last_username) or []
     
     def download_video(self, url, output_path, progress_hook=None):
         """
@@ -395,45 +502,14 @@ class TwitchDownloader:
             
             print(f"🎮 Iniciando download da Twitch: {url}")
             
-            # Configurações otimizadas do yt-dlp para Twitch
-            ydl_opts = {
-                'format': 'best[ext=mp4]/best',  # Preferir MP4
-                'outtmpl': output_template,
-                'writeinfojson': False,
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-                'ignoreerrors': False,
-                'no_warnings': False,
-                'embed_subs': False,
-                
-                # Configurações de rede robustas para Twitch
-                'socket_timeout': 60,
-                'retries': 8,
-                'fragment_retries': 8,
-                'retry_sleep_functions': {
-                    'http': lambda n: min(4 ** n, 60),
-                    'fragment': lambda n: min(4 ** n, 60),
-                },
-                
-                # Headers para evitar bloqueios
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Accept-Encoding': 'gzip, deflate',
-                    'DNT': '1',
-                    'Connection': 'keep-alive',
-                },
-            }
-            
-            # Adicionar hook de progresso se fornecido
-            if progress_hook:
-                ydl_opts['progress_hooks'] = [progress_hook]
-            
-            # Executar download
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Executar download (instância do pool com o perfil da plataforma)
+            with get_ydl_pool().lease(
+                self.platform,
+                outtmpl=output_template,
+                progress_hooks=[progress_hook] if progress_hook else [],
+            ) as ydl:
                 print(f"🚀 Baixando vídeo completo da Twitch...")
-                ydl.download([url])
+                download_with_cached_info(ydl, url, self.platform)
                 
             print("✅ Download da Twitch concluído com sucesso!")
             return True
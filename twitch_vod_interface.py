@@ -125,9 +125,24 @@ class TwitchVODInterface:
         # Dica de formato
         ctk.CTkLabel(time_inputs_frame, text="(Formato: MM:SS ou HH:MM:SS)", font=ctk.CTkFont(size=10)).pack(side="left", padx=10)
         
-        # Botão de download
-        download_btn = ctk.CTkButton(self.twitch_frame, text="🚀 Baixar Segmento", command=self.download_segment, height=40)
-        download_btn.pack(pady=20)
+        # Lista de recortes (vários trechos do mesmo VOD de uma vez)
+        clips_frame = ctk.CTkFrame(config_frame)
+        clips_frame.pack(fill="x", padx=10, pady=10)
+        
+        ctk.CTkLabel(clips_frame, text="Vários Recortes (um por linha: início fim nome):", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=10, pady=(10, 5))
+        
+        self.clips_textbox = ctk.CTkTextbox(clips_frame, height=80)
+        self.clips_textbox.pack(fill="x", padx=10, pady=(0, 10))
+        
+        # Botões de download
+        buttons_frame = ctk.CTkFrame(self.twitch_frame, fg_color="transparent")
+        buttons_frame.pack(pady=20)
+        
+        download_btn = ctk.CTkButton(buttons_frame, text="🚀 Baixar Segmento", command=self.download_segment, height=40)
+        download_btn.pack(side="left", padx=10)
+        
+        clips_btn = ctk.CTkButton(buttons_frame, text="✂️ Baixar Recortes", command=self.download_clips, height=40)
+        clips_btn.pack(side="left", padx=10)
         
         return self.twitch_frame
     
@@ -200,9 +215,23 @@ class TwitchVODInterface:
             clean_title = ''.join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()[:30]
             self.custom_name_var.set(clean_title)
             
+            # Data e descrição só são extraídas para o VOD escolhido
+            if not self.selected_vod.get('enriched'):
+                threading.Thread(target=self._enrich_selected, args=(self.selected_vod,), daemon=True).start()
+            
         except ValueError:
             messagebox.showerror("Erro", "Por favor, digite um número válido.")
     
+    def _enrich_selected(self, vod):
+        """Completar o VOD escolhido com os detalhes da extração e atualizar a lista"""
+        enriched = self.twitch_downloader.enrich_vods([vod])
+        if not enriched or not enriched[0].get('enriched'):
+            return
+        vod.update(enriched[0])
+        self.parent_app.log_message(f"📅 {self.twitch_downloader.format_vod_info(vod)}")
+        if vod in self.vods_list:
+            self.display_vods(self.vods_list)
+    
     def download_segment(self):
         """Baixar segmento do VOD selecionado"""
         if not self.selected_vod:
@@ -244,6 +273,12 @@ class TwitchVODInterface:
                 
                 if success:
                     self.parent_app.log_message("✅ Download do segmento concluído com sucesso!")
+                    report = self.twitch_downloader.last_segment_report
+                    if report:
+                        self.parent_app.log_message(
+                            f"📦 {report['fragments']}/{report['fragments_total']} fragmentos, "
+                            f"~{report['bytes_saved'] / 1e6:.1f} MB economizados"
+                        )
                     messagebox.showinfo("Sucesso", "Segmento do VOD baixado com sucesso!")
                 else:
                     self.parent_app.log_message("❌ Falha no download do segmento")
@@ -262,6 +297,65 @@ class TwitchVODInterface:
         thread.daemon = True
         thread.start()
     
+    def download_clips(self):
+        """Baixar todos os recortes da lista do VOD selecionado"""
+        if not self.selected_vod:
+            messagebox.showerror("Erro", "Primeiro selecione um VOD da lista.")
+            return
+        
+        clips = []
+        for number, line in enumerate(self.clips_textbox.get("1.0", "end").splitlines(), 1):
+            parts = line.split(maxsplit=2)
+            if not parts:
+                continue
+            if len(parts) < 2 or not self._validate_time_format(parts[0]) or not self._validate_time_format(parts[1]):
+                messagebox.showerror("Erro", f"Linha {number} inválida. Use: início fim nome (ex: 01:30 02:45 Jogada)")
+                return
+            clips.append((parts[0], parts[1], parts[2] if len(parts) > 2 else None))
+        
+        if not clips:
+            messagebox.showerror("Erro", "Adicione ao menos um recorte (início fim nome).")
+            return
+        
+        def download_thread():
+            try:
+                output_path = self.parent_app.download_path.get()
+                self.parent_app.log_message(f"✂️ Baixando {len(clips)} recortes de: {self.selected_vod['title']}")
+                
+                report = self.twitch_downloader.download_vod_clips(
+                    self.selected_vod['url'],
+                    output_path,
+                    clips,
+                    self.parent_app.progress_hook
+                )
+                
+                for clip in report['clips']:
+                    if clip['status'] == 'completed':
+                        self.parent_app.log_message(f"✅ {clip['filename']}")
+                    else:
+                        self.parent_app.log_message(f"❌ {clip['name'] or clip['requested']}: {clip.get('error')}")
+                if 'bytes_saved' in report:
+                    self.parent_app.log_message(
+                        f"📦 {report['fragments']}/{report['fragments_total']} fragmentos baixados uma vez, "
+                        f"~{report['bytes_saved'] / 1e6:.1f} MB economizados"
+                    )
+                
+                if report['failed']:
+                    messagebox.showwarning("Recortes", f"{report['completed']} recortes baixados, {report['failed']} falharam.")
+                else:
+                    messagebox.showinfo("Sucesso", f"{report['completed']} recortes baixados com sucesso!")
+                    
+            except Exception as e:
+                error_msg = f"Erro nos recortes: {str(e)}"
+                self.parent_app.log_message(f"❌ {error_msg}")
+                messagebox.showerror("Erro", error_msg)
+            finally:
+                self.parent_app.progress_bar.set(0)
+        
+        thread = threading.Thread(target=download_thread)
+        thread.daemon = True
+        thread.start()
+    
     def _validate_time_format(self, time_str):
         """Validar formato de tempo"""
         import re
@@ -0,0 +1,212 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+from network_profiles import network_opts, throughput_hook
+from platform_profiles import build_opts, normalize_platform, profile_key
+from rate_limiter import RateLimitedYoutubeDL
+
+# Opções lidas a cada uso pelo yt-dlp: podem variar por empréstimo sem
+# recriar a instância. Qualquer outra opção gera uma instância exclusiva.
+LEASE_OPTIONS = frozenset({
+    'outtmpl',
+    'progress_hooks',
+    'quiet',
+    'no_warnings',
+    'noplaylist',
+    'extract_flat',
+    'playlistend',
+    'skip_download',
+    'simulate',
+    'external_downloader',
+    'external_downloader_args',
+    'concurrent_fragment_downloads',
+    'buffersize',
+    'http_chunk_size',
+})
+
+_MISSING = object()
+
+
+class _PooledYdl:
+    """Instância YoutubeDL ociosa e seu histórico de uso"""
+
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.uses = 0
+        self.last_used = time.time()
+
+
+class YdlPool:
+    """Instâncias YoutubeDL aquecidas por perfil de plataforma, emprestadas aos workers"""
+
+    def __init__(self, enabled=None, max_idle_per_profile=None, max_uses=None, idle_timeout=None):
+        """
+        Inicializar o pool
+
+        Args:
+            enabled (bool): False cria uma instância nova por empréstimo (comportamento antigo)
+            max_idle_per_profile (int): Instâncias ociosas mantidas por perfil
+            max_uses (int): Empréstimos até a instância ser recriada
+            idle_timeout (int): Segundos ociosa até a instância ser fechada
+        """
+        config = Config.YDL_POOL_CONFIG
+        self.enabled = config['enabled'] if enabled is None else enabled
+        self.max_idle_per_profile = max_idle_per_profile or config['max_idle_per_profile']
+        self.max_uses = max_uses or config['max_uses']
+        self.idle_timeout = idle_timeout or config['idle_timeout']
+
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.created = 0
+        self.reused = 0
+        self.closed = 0
+
+    @contextmanager
+    def lease(self, platform, quality='best', format_type='mp4', **overrides):
+        """
+        Emprestar uma instância YoutubeDL do perfil (plataforma, qualidade, formato)
+
+        As opções em LEASE_OPTIONS (outtmpl, progress_hooks, quiet...) valem só
+        durante o empréstimo e são restauradas na devolução; os parâmetros de
+        rede são reaplicados a cada empréstimo (ajuste adaptativo). Opções fora
+        de LEASE_OPTIONS são lidas pelo yt-dlp apenas na criação, então geram
+        uma instância exclusiva, fechada ao final.
+
+        Args:
+            platform (str): Nome da plataforma
+            quality (str): Qualidade (chave de Config.QUALITY_OPTIONS)
+            format_type (str): Formato (chave de VIDEO_FORMATS ou AUDIO_FORMATS)
+            **overrides: Opções específicas da chamada
+
+        Yields:
+            RateLimitedYoutubeDL: Instância de uso exclusivo até o fim do bloco
+        """
+        if not self.enabled or not set(overrides) <= LEASE_OPTIONS:
+            with RateLimitedYoutubeDL(build_opts(platform, quality, format_type, **overrides), platform=platform) as ydl:
+                yield ydl
+            return
+
+        key = profile_key(platform, quality, format_type)
+        entry = self._acquire(key)
+        saved = self._apply(entry.ydl, normalize_platform(platform), overrides)
+        try:
+            yield entry.ydl
+        finally:
+            self._restore(entry.ydl, saved)
+            self._release(key, entry)
+
+    def close_idle(self, now=None):
+        """
+        Fechar instâncias ociosas há mais de idle_timeout
+
+        Returns:
+            int: Quantidade de instâncias fechadas
+        """
+        now = now or time.time()
+        expired = []
+        with self._lock:
+            for key, entries in self._idle.items():
+                keep = [e for e in entries if now - e.last_used <= self.idle_timeout]
+                expired.extend(e for e in entries if now - e.last_used > self.idle_timeout)
+                self._idle[key] = keep
+        for entry in expired:
+            self._close(entry)
+        return len(expired)
+
+    def clear(self):
+        """Fechar todas as instâncias ociosas"""
+        with self._lock:
+            entries = [e for idle in self._idle.values() for e in idle]
+            self._idle = {}
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self):
+        """Contadores do pool"""
+        with self._lock:
+            idle = {'/'.join(key): len(entries) for key, entries in self._idle.items() if entries}
+            return {
+                'enabled': self.enabled,
+                'created': self.created,
+                'reused': self.reused,
+                'closed': self.closed,
+                'idle': idle,
+            }
+
+    def _acquire(self, key):
+        """Instância ociosa mais recente do perfil, ou uma nova"""
+        self.close_idle()
+        with self._lock:
+            entries = self._idle.get(key)
+            if entries:
+                self.reused += 1
+                return entries.pop()
+            self.created += 1
+        # Progress hooks vêm de cada empréstimo (_apply)
+        return _PooledYdl(RateLimitedYoutubeDL(build_opts(*key, progress_hooks=[]), platform=key[0]))
+
+    def _release(self, key, entry):
+        """Devolver a instância ao pool (ou fechá-la se esgotada/excedente)"""
+        entry.uses += 1
+        entry.last_used = time.time()
+        with self._lock:
+            entries = self._idle.setdefault(key, [])
+            if entry.uses < self.max_uses and len(entries) < self.max_idle_per_profile:
+                entries.append(entry)
+                return
+        self._close(entry)
+
+    def _close(self, entry):
+        try:
+            entry.ydl.close()
+        except Exception as e:
+            print(f"[YdlPool] Erro ao fechar instância: {e}")
+        with self._lock:
+            self.closed += 1
+
+    @staticmethod
+    def _apply(ydl, platform, overrides):
+        """Aplicar opções do empréstimo; retorna o estado para _restore"""
+        options = dict(network_opts(platform), **overrides)
+        hooks = list(options.pop('progress_hooks', None) or [])
+        hooks.append(ydl.metrics_hook)
+        if Config.ADAPTIVE_NETWORK_CONFIG['enabled']:
+            hooks.append(throughput_hook(platform, options['concurrent_fragment_downloads']))
+
+        saved = {
+            'params': {key: ydl.params.get(key, _MISSING) for key in options},
+            'progress_hooks': ydl._progress_hooks,
+        }
+        for key, value in options.items():
+            if key == 'outtmpl' and not isinstance(value, dict):
+                # Após a criação o yt-dlp guarda outtmpl como dict por tipo de arquivo
+                value = dict(ydl.params.get('outtmpl') or {}, default=value)
+            ydl.params[key] = value
+        ydl._progress_hooks = hooks
+        ydl._download_retcode = 0
+        return saved
+
+    @staticmethod
+    def _restore(ydl, saved):
+        """Desfazer as opções do empréstimo"""
+        for key, value in saved['params'].items():
+            if value is _MISSING:
+                ydl.params.pop(key, None)
+            else:
+                ydl.params[key] = value
+        ydl._progress_hooks = saved['progress_hooks']
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ydl_pool():
+    """Retornar o YdlPool compartilhado do processo"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = YdlPool()
+        return _pool
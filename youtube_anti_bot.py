@@ -1,9 +1,12 @@
 import os
-import yt_dlp
 import random
 import time
 from pathlib import Path
 
+from postprocess_planner import smart_convertor
+from rate_limiter import RateLimitedYoutubeDL
+from strategy_scores import get_strategy_scorer
+
 class YouTubeAntiBot:
     """Classe especializada para contornar detecção de bot do YouTube"""
     
@@ -28,10 +31,15 @@ class YouTubeAntiBot:
         
         # Países para geo-bypass
         self.countries = ['US', 'CA', 'GB', 'AU', 'DE']
+        
+        # Resultados por país/User-Agent (escolhas adaptativas)
+        self.scorer = get_strategy_scorer()
+        self.scope = 'youtube_anti_bot'
+        self.strategy = 'anti_bot'
     
-    def get_random_headers(self):
+    def get_random_headers(self, user_agent=None):
         """Gerar headers HTTP aleatórios e realistas"""
-        user_agent = random.choice(self.user_agents)
+        user_agent = user_agent or random.choice(self.user_agents)
         is_mobile = 'Mobile' in user_agent or 'iPhone' in user_agent
         
         headers = {
@@ -65,15 +73,13 @@ class YouTubeAntiBot:
     
     def get_anti_bot_config(self, progress_hook=None):
         """Configuração definitiva anti-bot para YouTube"""
+        # User-Agent e país com melhor histórico (com exploração)
+        user_agent = self.scorer.choose(self.scope, 'user_agent', self.user_agents, strategy=self.strategy)
+        country = self.scorer.choose(self.scope, 'country', self.countries, strategy=self.strategy)
+        
         return {
             # Headers dinâmicos e realistas
-            'http_headers': self.get_random_headers(),
-            
-            # Rate limiting ultra-conservador
-            'sleep_interval': random.uniform(3, 6),
-            'max_sleep_interval': 10,
-            'sleep_interval_requests': random.uniform(2, 4),
-            'sleep_interval_subtitles': random.uniform(1, 2),
+            'http_headers': self.get_random_headers(user_agent),
             
             # Configurações de rede robustas
             'socket_timeout': 90,
@@ -99,7 +105,7 @@ class YouTubeAntiBot:
             
             # Bypass geo-blocking
             'geo_bypass': True,
-            'geo_bypass_country': random.choice(self.countries),
+            'geo_bypass_country': country,
             
             # Configurações anti-detecção avançadas
             'no_warnings': True,
@@ -119,6 +125,8 @@ class YouTubeAntiBot:
     
     def download_with_anti_bot(self, url, output_path, quality="best", format_type="mp4", progress_hook=None):
         """Download com proteção anti-bot definitiva"""
+        base_config = None
+        started = time.time()
         try:
             # Criar diretório
             Path(output_path).mkdir(parents=True, exist_ok=True)
@@ -156,10 +164,7 @@ class YouTubeAntiBot:
                 base_config.update({
                     'format': format_selector,
                     'merge_output_format': 'mp4',
-                    'postprocessors': [{
-                        'key': 'FFmpegVideoConvertor',
-                        'preferedformat': 'mp4',
-                    }] if format_type == 'mp4' else [],
+                    'postprocessors': [smart_convertor('mp4')] if format_type == 'mp4' else [],
                 })
             
             # Configurações críticas para evitar .mhtml
@@ -178,21 +183,38 @@ class YouTubeAntiBot:
                 'skip_download': False,
             })
             
-            # Delay inicial aleatório
-            time.sleep(random.uniform(1, 3))
+            started = time.time()
             
-            # Executar download
-            with yt_dlp.YoutubeDL(base_config) as ydl:
+            # Executar download (requisições passam pelo RateLimiter)
+            with RateLimitedYoutubeDL(base_config, platform='youtube', strategy=self.strategy) as ydl:
                 print(f"🚀 Iniciando download YouTube com proteção anti-bot...")
                 print(f"📱 User-Agent: {base_config['http_headers']['User-Agent'][:50]}...")
                 print(f"🌍 País: {base_config['geo_bypass_country']}")
-                print(f"⏱️ Rate limiting: {base_config['sleep_interval']:.1f}s")
                 
                 ydl.download([url])
                 
+            self._record(base_config, True, time.time() - started)
             print("✅ Download YouTube concluído com sucesso!")
             return True
             
         except Exception as e:
+            if base_config is not None:
+                self._record(base_config, False, time.time() - started, e)
             print(f"❌ Erro no download YouTube: {e}")
             return False
+    
+    def _record(self, base_config, success, elapsed, error=None):
+        """Registrar o resultado do download no scorer"""
+        try:
+            self.scorer.record(
+                self.scope,
+                self.strategy,
+                base_config['extractor_args']['youtube']['player_client'],
+                base_config['geo_bypass_country'],
+                base_config['http_headers']['User-Agent'],
+                success,
+                elapsed,
+                error,
+            )
+        except Exception as e:
+            print(f"[StrategyScores] Erro ao registrar resultado: {e}")
@@ -1,55 +1,26 @@
 import os
-import yt_dlp
-import random
 import re
 from pathlib import Path
 
+from extractor_scope import ScopedYoutubeDL
+from info_cache import download_with_cached_info, get_info_cache
+from playlist_pipeline import PlaylistPipeline
+from rate_limiter import RateLimitedYoutubeDL
+from ydl_pool import get_ydl_pool
+
 class YouTubeDownloader:
     def __init__(self):
         self.name = "YouTube"
-        # Lista de User-Agents rotativos para evitar detecção
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            # Mobile User-Agents (menos detectáveis)
-            'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
-            'Mozilla/5.0 (Linux; Android 13; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
-        ]
-    
+
     def get_video_info(self, url):
         """Obter informações detalhadas do vídeo sem baixar"""
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'noplaylist': True,
-            'extract_flat': False,
-            # Opções críticas para evitar .mhtml
-            'writesubtitles': False,
-            'writeautomaticsub': False,
-            'writedescription': False,
-            'writeinfojson': False,
-            'writethumbnail': False,
-            'writewebvtt': False,
-            'writedesktoplink': False,
-            'writeurllink': False,
-            'writeannotations': False,
-            # Headers anti-bot para obter informações
-            'http_headers': {
-                'User-Agent': random.choice(self.user_agents),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-            },
-        }
+        # Instância do pool (headers anti-bot com User-Agent rotativo)
+        def extract():
+            with get_ydl_pool().lease(self.name, quiet=True, no_warnings=True) as ydl:
+                return ydl.extract_info(url, download=False)
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                return info
+            return get_info_cache().get_or_extract(url, self.name, extract)
         except Exception as e:
             raise Exception(f"Erro ao obter informações do vídeo: {str(e)}")
     
@@ -74,119 +45,19 @@ class YouTubeDownloader:
             # Configurar nome do arquivo de saída
             output_template = os.path.join(output_path, '%(title)s.%(ext)s')
             
-            # CONFIGURAÇÃO ULTRA-SIMPLES E TESTADA
-            if format_type in ['mp3', 'm4a']:
-                # Para áudio apenas
-                ydl_opts = {
-                    'outtmpl': output_template,
-                    'format': 'bestaudio/best',
-                    'progress_hooks': [progress_hook] if progress_hook else [],
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format_type,
-                        'preferredquality': '192',
-                    }],
-                    # Opções críticas para evitar .mhtml
-                    'writesubtitles': False,
-                    'writeautomaticsub': False,
-                    'writedescription': False,
-                    'writeinfojson': False,
-                    'writethumbnail': False,
-                }
-            else:
-                # Para vídeo - SELETOR ROBUSTO COM FALLBACKS PROGRESSIVOS
-                if quality == 'best':
-                    # Seletor robusto: tentar alta qualidade com fallbacks seguros
-                    format_selector = 'best[height>=1080]/best[height>=720]/best[height>=480]/best'
-                elif quality == 'worst':
-                    format_selector = 'worst'
-                elif quality.endswith('p'):
-                    height = quality[:-1]
-                    # Seletor específico: buscar exatamente a qualidade ou superior
-                    format_selector = f'best[height={height}]/best[height>={height}]/best[height>=720]/best'
-                else:
-                    format_selector = 'best[height>=720]/best'
+            # Perfil pré-calculado: seletor por qualidade, anti-bot, pós-processamento e rede
+            with get_ydl_pool().lease(
+                self.name, quality, format_type,
+                outtmpl=output_template,
+                progress_hooks=[progress_hook] if progress_hook else [],
+            ) as ydl:
+                print(f"[YouTube] URL: {url}")
+                print(f"[YouTube] Qualidade: {quality}, Formato: {format_type}")
+                print(f"[YouTube] Seletor: {ydl.params.get('format', 'N/A')}")
+                print(f"[YouTube] Output: {output_template}")
                 
-                ydl_opts = {
-                    'outtmpl': output_template,
-                    'format': format_selector,
-                    'progress_hooks': [progress_hook] if progress_hook else [],
-                    # ANTI-BOT AVANÇADO: Headers HTTP realistas
-                    'http_headers': {
-                        'User-Agent': random.choice(self.user_agents),
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                        'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Cache-Control': 'max-age=0',
-                    },
-                    # ANTI-BOT AVANÇADO: Rate limiting mais agressivo
-                    'sleep_interval': 2,
-                    'max_sleep_interval': 5,
-                    'sleep_interval_requests': 2,
-                    'sleep_interval_subtitles': 1,
-                    # ANTI-BOT AVANÇADO: Configurações de rede
-                    'socket_timeout': 60,
-                    'retries': 5,
-                    'fragment_retries': 5,
-                    'retry_sleep_functions': {
-                        'http': lambda n: min(4 ** n, 60),
-                        'fragment': lambda n: min(4 ** n, 60),
-                    },
-                    # ANTI-BOT AVANÇADO: Configurações YouTube específicas
-                    'extractor_args': {
-                        'youtube': {
-                            'skip': ['dash', 'hls'],
-                            'player_client': ['android', 'web'],
-                            'player_skip': ['configs'],
-                        }
-                    },
-                    # ANTI-BOT AVANÇADO: Bypass de geo-blocking
-                    'geo_bypass': True,
-                    'geo_bypass_country': 'US',
-                    # Opções críticas para evitar .mhtml
-                    'writesubtitles': False,
-                    'writeautomaticsub': False,
-                    'writedescription': False,
-                    'writeinfojson': False,
-                    'writethumbnail': False,
-                    'writewebvtt': False,
-                    'writedesktoplink': False,
-                    'writeurllink': False,
-                    'writeannotations': False,
-                    # Forçar download de vídeo real
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    # Garantir formato de saída compatível
-                    'merge_output_format': 'mp4',
-                    # Garantir que não baixe apenas metadados
-                    'skip_download': False,
-                    # ANTI-BOT AVANÇADO: Configurações adicionais
-                    'no_warnings': True,
-                    'ignoreerrors': False,
-                    'no_color': True,
-                    'prefer_insecure': False,
-                    # Pós-processamento para garantir áudio compatível
-                    'postprocessors': [{
-                        'key': 'FFmpegVideoConvertor',
-                        'preferedformat': 'mp4',
-                    }] if format_type == 'mp4' else [],
-                }
-            
-            print(f"[YouTube] URL: {url}")
-            print(f"[YouTube] Qualidade: {quality}, Formato: {format_type}")
-            print(f"[YouTube] Seletor: {ydl_opts.get('format', 'N/A')}")
-            print(f"[YouTube] Output: {output_template}")
-            
-            # Realizar download com configurações corrigidas
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+                # Realizar download (reaproveitando info em cache)
+                download_with_cached_info(ydl, url, self.name)
             
             return True
             
@@ -222,37 +93,26 @@ class YouTubeDownloader:
         except Exception as e:
             raise Exception(f"Erro ao obter formatos: {str(e)}")
     
-    def download_playlist(self, url, output_path, quality="best", format_type="mp4", progress_hook=None):
-        """Baixar playlist completa do YouTube"""
+    def download_playlist(self, url, output_path, quality="best", format_type="mp4", progress_hook=None, on_item=None):
+        """
+        Baixar playlist completa do YouTube
+        
+        Os itens são listados uma vez e baixados em paralelo; os concluídos
+        ficam no arquivo de IDs do diretório, então rodar de novo retoma de
+        onde parou.
+        
+        Args:
+            on_item (callable): Progresso por item (ver PlaylistPipeline.run)
+        
+        Returns:
+            bool: True se todos os itens foram baixados (agora ou antes)
+        """
         try:
-            Path(output_path).mkdir(parents=True, exist_ok=True)
-            
-            format_selector = 'best[ext=mp4]/best'
-            output_template = os.path.join(output_path, '%(playlist_index)s - %(title)s.%(ext)s')
-            
-            ydl_opts = {
-                'format': format_selector,
-                'outtmpl': output_template,
-                'progress_hooks': [progress_hook] if progress_hook else [],
-                'extract_flat': False,
-                'noplaylist': False,  # Permitir playlists
-                'merge_output_format': format_type if format_type in ['mp4', 'mkv', 'webm'] else None,
-            }
-            
-            if format_type in ['mp3', 'm4a']:
-                ydl_opts.update({
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': format_type,
-                        'preferredquality': '192',
-                    }],
-                })
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-            
-            return True
+            manifest = PlaylistPipeline(self.name).run(
+                url, output_path, quality, format_type,
+                progress_hook=progress_hook, on_item=on_item
+            )
+            return manifest['failed'] == 0
             
         except Exception as e:
             print(f"Erro durante o download da playlist: {str(e)}")
@@ -269,7 +129,7 @@ class YouTubeDownloader:
                 'extract_flat': True,
             }
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with RateLimitedYoutubeDL(ydl_opts, platform=self.name) as ydl:
                 search_results = ydl.extract_info(search_url, download=False)
                 
                 videos = []
@@ -415,7 +275,7 @@ class YouTubeDownloader:
                 'listformats': False,
             }
             
-            with yt_dlp.YoutubeDL(test_opts) as ydl:
+            with ScopedYoutubeDL(test_opts) as ydl:
                 try:
                     test_info = ydl.extract_info(url, download=False)
                     selected_format = test_info.get('format_id', 'N/A')
@@ -1,9 +1,15 @@
 import os
-import yt_dlp
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from config import Config
+from postprocess_planner import smart_convertor
+from rate_limiter import RateLimitedYoutubeDL
+from strategy_scores import get_strategy_scorer
+
 class YouTubeUltimate:
     """Solução EXTREMA para YouTube - Múltiplas estratégias de fallback"""
     
@@ -31,6 +37,10 @@ class YouTubeUltimate:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0',
         ]
         
+        # Resultados por estratégia/país/User-Agent (ordem adaptativa)
+        self.scorer = get_strategy_scorer()
+        self.scope = 'youtube_ultimate'
+        
         # Países para geo-bypass
         self.countries = ['US', 'CA', 'GB', 'AU', 'DE', 'FR', 'NL', 'JP']
         
@@ -39,8 +49,6 @@ class YouTubeUltimate:
             # Configuração 1: Ultra-conservadora
             {
                 'name': 'Ultra Conservative',
-                'sleep_interval': 5,
-                'max_sleep_interval': 10,
                 'retries': 15,
                 'player_client': ['android'],
                 'skip': ['dash', 'hls'],
@@ -48,8 +56,6 @@ class YouTubeUltimate:
             # Configuração 2: Mobile-first
             {
                 'name': 'Mobile First',
-                'sleep_interval': 3,
-                'max_sleep_interval': 8,
                 'retries': 12,
                 'player_client': ['ios', 'android', 'mweb'],
                 'skip': ['dash'],
@@ -57,8 +63,6 @@ class YouTubeUltimate:
             # Configuração 3: Web-only
             {
                 'name': 'Web Only',
-                'sleep_interval': 4,
-                'max_sleep_interval': 9,
                 'retries': 10,
                 'player_client': ['web'],
                 'skip': ['hls'],
@@ -66,17 +70,15 @@ class YouTubeUltimate:
             # Configuração 4: Minimal
             {
                 'name': 'Minimal',
-                'sleep_interval': 2,
-                'max_sleep_interval': 6,
                 'retries': 8,
                 'player_client': ['android', 'web'],
                 'skip': [],
             }
         ]
     
-    def get_extreme_headers(self, mobile=False):
+    def get_extreme_headers(self, mobile=False, user_agent=None):
         """Headers extremamente realistas"""
-        user_agent = random.choice(self.user_agents)
+        user_agent = user_agent or random.choice(self.user_agents)
         is_mobile = mobile or 'Mobile' in user_agent or 'iPhone' in user_agent
         
         headers = {
@@ -116,16 +118,15 @@ class YouTubeUltimate:
     def get_fallback_config(self, config_index, progress_hook=None):
         """Configuração de fallback específica"""
         config = self.fallback_configs[config_index % len(self.fallback_configs)]
+        name = config['name']
+        
+        # País e User-Agent com melhor histórico para a estratégia (com exploração)
+        user_agent = self.scorer.choose(self.scope, 'user_agent', self.user_agents, strategy=name)
+        country = self.scorer.choose(self.scope, 'country', self.countries, strategy=name)
         
         return {
             # Headers dinâmicos
-            'http_headers': self.get_extreme_headers(),
-            
-            # Rate limiting baseado na configuração
-            'sleep_interval': config['sleep_interval'],
-            'max_sleep_interval': config['max_sleep_interval'],
-            'sleep_interval_requests': config['sleep_interval'] / 2,
-            'sleep_interval_subtitles': 1,
+            'http_headers': self.get_extreme_headers(user_agent=user_agent),
             
             # Configurações de rede ultra-robustas
             'socket_timeout': 120,
@@ -153,7 +154,7 @@ class YouTubeUltimate:
             
             # Bypass geo-blocking extremo
             'geo_bypass': True,
-            'geo_bypass_country': random.choice(self.countries),
+            'geo_bypass_country': country,
             
             # Configurações anti-detecção EXTREMAS
             'no_warnings': True,
@@ -171,90 +172,258 @@ class YouTubeUltimate:
             'progress_hooks': [progress_hook] if progress_hook else [],
         }
     
-    def download_with_extreme_fallback(self, url, output_path, quality="best", format_type="mp4", progress_hook=None):
-        """Download com fallback extremo - tenta todas as configurações"""
+    def build_attempt_config(self, config_index, output_template, quality="best", format_type="mp4", progress_hook=None):
+        """Configuração completa de uma estratégia (formato, pós-processamento e saída)"""
+        base_config = self.get_fallback_config(config_index, progress_hook)
+        base_config['outtmpl'] = output_template
+        
+        # Configurar formato
+        if format_type in ['mp3', 'm4a']:
+            base_config.update({
+                'format': 'bestaudio[ext=m4a]/bestaudio[acodec=aac]/bestaudio/best',
+                'postprocessors': [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': format_type,
+                    'preferredquality': '192',
+                }],
+            })
+        else:
+            # Seletores de formato mais agressivos
+            if quality == 'best':
+                format_selector = 'bestvideo[height<=720]+bestaudio[ext=m4a]/bestvideo[height<=720]+bestaudio[acodec=aac]/best[height<=720]/best'
+            elif quality == 'worst':
+                format_selector = 'worst[height<=360]/worst'
+            elif quality.endswith('p'):
+                height = quality[:-1]
+                format_selector = f'bestvideo[height<={height}]+bestaudio[ext=m4a]/best[height<={height}]/best'
+            else:
+                format_selector = 'bestvideo[height<=480]+bestaudio[ext=m4a]/best[height<=480]/best'
+            
+            base_config.update({
+                'format': format_selector,
+                'merge_output_format': 'mp4',
+                'postprocessors': [smart_convertor('mp4')] if format_type == 'mp4' else [],
+            })
+        
+        # Configurações críticas
+        base_config.update({
+            'writesubtitles': False,
+            'writeautomaticsub': False,
+            'writedescription': False,
+            'writeinfojson': False,
+            'writethumbnail': False,
+            'writewebvtt': False,
+            'writedesktoplink': False,
+            'writeurllink': False,
+            'writeannotations': False,
+            'noplaylist': True,
+            'extract_flat': False,
+            'skip_download': False,
+        })
+        return base_config
+    
+    def strategy_order(self):
+        """Índices das estratégias, melhor score primeiro (amostragem de Thompson)"""
+        names = [config['name'] for config in self.fallback_configs]
+        ranked = self.scorer.rank(self.scope, 'strategy', names)
+        return [names.index(name) for name in ranked]
+    
+    def record_attempt(self, config_index, base_config, success, elapsed, error=None):
+        """Registrar o resultado de uma tentativa no scorer"""
+        try:
+            error_class = self.scorer.record(
+                self.scope,
+                self.fallback_configs[config_index]['name'],
+                base_config['extractor_args']['youtube']['player_client'],
+                base_config['geo_bypass_country'],
+                base_config['http_headers']['User-Agent'],
+                success,
+                elapsed,
+                error,
+            )
+        except Exception as e:
+            print(f"[StrategyScores] Erro ao registrar resultado: {e}")
+            return
+        if error_class:
+            print(f"📉 {self.fallback_configs[config_index]['name']}: erro '{error_class}'")
+    
+    def download_with_extreme_fallback(self, url, output_path, quality="best", format_type="mp4", progress_hook=None, racing=None):
+        """
+        Download com fallback extremo
+        
+        No modo corrida (padrão), as estratégias extraem os metadados em
+        paralelo e apenas a primeira com formatos utilizáveis baixa o vídeo.
+        Sem corrida, tenta cada configuração em sequência.
+        
+        Args:
+            racing (bool): Forçar ou desativar o modo corrida (padrão: Config.YOUTUBE_RACING_CONFIG)
+        """
         
         # Criar diretório
         Path(output_path).mkdir(parents=True, exist_ok=True)
         output_template = os.path.join(output_path, '%(title)s.%(ext)s')
         
-        # Tentar cada configuração de fallback
-        for i, fallback_config in enumerate(self.fallback_configs):
+        if racing is None:
+            racing = Config.YOUTUBE_RACING_CONFIG['enabled']
+        if racing:
+            return self.download_racing(url, output_template, quality, format_type, progress_hook)
+        
+        # Tentar cada configuração de fallback (melhores primeiro)
+        order = self.strategy_order()
+        for attempt, i in enumerate(order):
+            fallback_config = self.fallback_configs[i]
+            base_config = self.build_attempt_config(i, output_template, quality, format_type, progress_hook)
+            started = time.time()
             try:
-                print(f"🚀 Tentativa {i+1}/4: {fallback_config['name']}")
-                
-                # Configuração base
-                base_config = self.get_fallback_config(i, progress_hook)
-                base_config['outtmpl'] = output_template
+                print(f"🚀 Tentativa {attempt+1}/{len(order)}: {fallback_config['name']}")
                 
-                # Configurar formato
-                if format_type in ['mp3', 'm4a']:
-                    base_config.update({
-                        'format': 'bestaudio[ext=m4a]/bestaudio[acodec=aac]/bestaudio/best',
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': format_type,
-                            'preferredquality': '192',
-                        }],
-                    })
-                else:
-                    # Seletores de formato mais agressivos
-                    if quality == 'best':
-                        format_selector = 'bestvideo[height<=720]+bestaudio[ext=m4a]/bestvideo[height<=720]+bestaudio[acodec=aac]/best[height<=720]/best'
-                    elif quality == 'worst':
-                        format_selector = 'worst[height<=360]/worst'
-                    elif quality.endswith('p'):
-                        height = quality[:-1]
-                        format_selector = f'bestvideo[height<={height}]+bestaudio[ext=m4a]/best[height<={height}]/best'
-                    else:
-                        format_selector = 'bestvideo[height<=480]+bestaudio[ext=m4a]/best[height<=480]/best'
-                    
-                    base_config.update({
-                        'format': format_selector,
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoConvertor',
-                            'preferedformat': 'mp4',
-                        }] if format_type == 'mp4' else [],
-                    })
-                
-                # Configurações críticas
-                base_config.update({
-                    'writesubtitles': False,
-                    'writeautomaticsub': False,
-                    'writedescription': False,
-                    'writeinfojson': False,
-                    'writethumbnail': False,
-                    'writewebvtt': False,
-                    'writedesktoplink': False,
-                    'writeurllink': False,
-                    'writeannotations': False,
-                    'noplaylist': True,
-                    'extract_flat': False,
-                    'skip_download': False,
-                })
-                
-                # Delay inicial aleatório
-                time.sleep(random.uniform(2, 5))
-                
-                # Executar download
-                with yt_dlp.YoutubeDL(base_config) as ydl:
+                # Executar download (requisições passam pelo RateLimiter)
+                with RateLimitedYoutubeDL(base_config, platform='youtube', strategy=fallback_config['name']) as ydl:
                     print(f"📱 User-Agent: {base_config['http_headers']['User-Agent'][:50]}...")
                     print(f"🌍 País: {base_config['geo_bypass_country']}")
-                    print(f"⏱️ Rate limiting: {base_config['sleep_interval']}s")
                     print(f"🎯 Player clients: {base_config['extractor_args']['youtube']['player_client']}")
                     
                     ydl.download([url])
                     
+                self.record_attempt(i, base_config, True, time.time() - started)
                 print(f"✅ Sucesso com configuração: {fallback_config['name']}")
                 return True
                 
             except Exception as e:
-                print(f"❌ Falha na tentativa {i+1}: {str(e)[:100]}...")
-                if i < len(self.fallback_configs) - 1:
-                    print(f"🔄 Tentando próxima configuração em 3s...")
-                    time.sleep(3)
+                self.record_attempt(i, base_config, False, time.time() - started, e)
+                print(f"❌ Falha na tentativa {attempt+1}: {str(e)[:100]}...")
+                if attempt < len(order) - 1:
+                    print("🔄 Tentando próxima configuração...")
                 continue
         
         print("❌ Todas as tentativas falharam")
         return False
+    
+    def download_racing(self, url, output_template, quality="best", format_type="mp4", progress_hook=None):
+        """
+        Corrida de extração entre estratégias, download único com a vencedora
+        
+        As estratégias começam em ordem de taxa de sucesso, espaçadas por
+        'stagger' segundos (ou imediatamente quando a anterior falha). A
+        primeira que retornar formatos utilizáveis vence: estratégias ainda
+        não iniciadas são canceladas e as que já estão extraindo têm o
+        resultado descartado. O download usa a mesma instância da vencedora
+        (URLs de mídia ficam ligadas ao player_client e aos headers dela).
+        
+        Returns:
+            bool: True se sucesso, False caso contrário
+        """
+        config = Config.YOUTUBE_RACING_CONFIG
+        order = self.strategy_order()
+        race = _Race()
+        
+        def run(i):
+            name = self.fallback_configs[i]['name']
+            base_config = self.build_attempt_config(i, output_template, quality, format_type, progress_hook)
+            started = time.time()
+            ydl = RateLimitedYoutubeDL(base_config, platform='youtube', strategy=name)
+            error = None
+            try:
+                info = ydl.extract_info(url, download=False)
+                usable = _has_usable_formats(info)
+                if not usable:
+                    error = 'no video formats'
+            except Exception as e:
+                print(f"❌ {name}: {str(e)[:100]}...")
+                usable, error = False, e
+            self.record_attempt(i, base_config, usable, time.time() - started, error)
+            if usable and race.offer(i, ydl, info):
+                return
+            ydl.close()
+            race.failed()
+        
+        print(f"🏎️ Corrida entre: {', '.join(self.fallback_configs[i]['name'] for i in order)}")
+        executor = ThreadPoolExecutor(max_workers=config['max_parallel'], thread_name_prefix='yt-race')
+        futures = []
+        try:
+            deadline = time.time() + config['timeout']
+            for i in order:
+                if race.winner is not None:
+                    break
+                futures.append(executor.submit(run, i))
+                # Próxima estratégia após o intervalo, ou antes se alguma falhar
+                race.wait(min(config['stagger'], max(0, deadline - time.time())))
+            race.wait_result(len(futures), max(0, deadline - time.time()))
+        finally:
+            # Estratégias que terminarem após o timeout fecham a própria instância
+            race.close()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        if race.winner is None:
+            print("❌ Nenhuma estratégia retornou formatos utilizáveis")
+            return False
+        
+        i, ydl, info = race.winner
+        name = self.fallback_configs[i]['name']
+        print(f"🏁 {name} venceu a corrida")
+        started = time.time()
+        try:
+            with ydl:
+                print(f"🎯 Player clients: {ydl.params['extractor_args']['youtube']['player_client']}")
+                ydl.process_ie_result(info, download=True)
+            print(f"✅ Sucesso com configuração: {name}")
+            return True
+        except Exception as e:
+            self.record_attempt(i, ydl.params, False, time.time() - started, e)
+            print(f"❌ Falha no download com {name}: {str(e)[:100]}...")
+            return False
+
+
+def _has_usable_formats(info):
+    """Verificar se o info tem formatos de mídia reais (não só storyboards)"""
+    if not info:
+        return False
+    return any(
+        f.get('url') and f.get('protocol') != 'mhtml'
+        for f in info.get('formats') or [info]
+    )
+
+
+class _Race:
+    """Estado compartilhado de uma corrida de estratégias"""
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.winner = None
+        self.finished = 0
+        self.closed = False
+    
+    def offer(self, index, ydl, info):
+        """Registrar resultado utilizável; retorna True se for o vencedor (False após close())"""
+        with self._cond:
+            self.finished += 1
+            if self.winner is None and not self.closed:
+                self.winner = (index, ydl, info)
+                self._cond.notify_all()
+                return True
+            return False
+    
+    def close(self):
+        """Encerrar a corrida: resultados que chegarem depois são descartados"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+    
+    def failed(self):
+        with self._cond:
+            self.finished += 1
+            self._cond.notify_all()
+    
+    def wait(self, timeout):
+        """Aguardar até timeout, um vencedor ou uma falha"""
+        with self._cond:
+            finished = self.finished
+            self._cond.wait_for(lambda: self.winner is not None or self.finished != finished, timeout)
+    
+    def wait_result(self, started, timeout):
+        """Aguardar um vencedor ou o fim de todas as estratégias iniciadas"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.winner is not None or self.finished >= started, timeout)
+
@@ -1,9 +1,10 @@
 import os
-import yt_dlp
 import random
 import time
 from pathlib import Path
 
+from extractor_scope import ScopedYoutubeDL
+
 class YouTubeVercel:
     """Configuração específica para YouTube no ambiente Vercel"""
     
@@ -201,7 +202,7 @@ class YouTubeVercel:
             print(f"🔄 Retries: {config['retries']}")
             
             # Executar download
-            with yt_dlp.YoutubeDL(config) as ydl:
+            with ScopedYoutubeDL(config) as ydl:
                 ydl.download([url])
                 
             print(f"✅ Download concluído no ambiente {env_type}")
@@ -353,7 +354,7 @@ class TwitchVercel:
             else:
                 config['progress_hooks'] = [debug_progress_hook]
             
-            with yt_dlp.YoutubeDL(config) as ydl:
+            with ScopedYoutubeDL(config) as ydl:
                 print(f"✅ DEBUG - yt-dlp instanciado com sucesso")
                 print(f"🔍 DEBUG - Iniciando extração de informações...")
                 